@@ -1,15 +1,20 @@
+import importlib
 import textwrap
 
 import sys
 
 import argparse
-import yaml
-from typing import Dict
+from pathlib import Path
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
+from kwiq.core import checkpoint
+from kwiq.core.checkpoint import CheckpointStore, DEFAULT_CHECKPOINT_PATH
 from kwiq.core.flow import Flow
 from kwiq.core.errors import ValidationError
+from kwiq.core.metrics import metrics
+from kwiq.core.profiler import PROFILE_MODES, Profiler
 from kwiq.core.utils import set_nested_value
 
 
@@ -17,22 +22,98 @@ class App(BaseModel):
     name: str
 
     flows: Dict[str, Flow] = {}
+    # flows registered by 'module:attribute', imported only when they are run or their help is shown
+    flow_entry_points: Dict[str, str] = {}
+
+    # when set, per task metrics are recorded during run() and written there at its end
+    metrics_json_path: Optional[Path] = None
+    metrics_prometheus_path: Optional[Path] = None
+
+    # when set (or resuming), the output of every completed task is checkpointed there during run()
+    checkpoint_path: Optional[Path] = None
+    # skip the tasks completed by a failed earlier run of the same flow with the same arguments
+    resume: bool = False
+
+    # when set, run() is profiled and the profiles are written to files prefixed with it, see Profiler
+    profile_path: Optional[Path] = None
+    profile_mode: str = 'deterministic'
+    profile_interval: float = 0.005
 
     def register_flow(self, flow: Flow):
-        if flow.name in self.flows:
+        if flow.name in self.flows or flow.name in self.flow_entry_points:
             raise ValueError(f"A flow with the name '{flow.name}' already exists.")
         self.flows[flow.name] = flow
 
-    def run(self, flow_name: str, **kwargs) -> int:
+    def register_flow_entry_point(self, name: str, entry_point: str):
+        """
+        Register a flow without importing it. entry_point is 'package.module:attribute' where the attribute is a
+        Flow instance, a Flow subclass (instantiated with the given name) or a callable returning a Flow.
+        """
+        if name in self.flows or name in self.flow_entry_points:
+            raise ValueError(f"A flow with the name '{name}' already exists.")
+        if ':' not in entry_point:
+            raise ValueError(f"Flow entry point '{entry_point}' must be of the form 'package.module:attribute'")
+        self.flow_entry_points[name] = entry_point
+
+    def flow_names(self) -> List[str]:
+        return list(self.flows) + [name for name in self.flow_entry_points if name not in self.flows]
+
+    def get_flow(self, flow_name: str) -> Optional[Flow]:
         flow = self.flows.get(flow_name)
+        if flow is None and flow_name in self.flow_entry_points:
+            flow = self.load_entry_point(flow_name, self.flow_entry_points[flow_name])
+            self.flows[flow_name] = flow
+        return flow
+
+    @staticmethod
+    def load_entry_point(flow_name: str, entry_point: str) -> Flow:
+        module_name, _, attribute = entry_point.partition(':')
+        target = importlib.import_module(module_name)
+        for part in attribute.split('.'):
+            target = getattr(target, part)
+
+        if isinstance(target, type) and issubclass(target, Flow):
+            target = target(name=flow_name)
+        elif not isinstance(target, Flow) and callable(target):
+            target = target()
+
+        if not isinstance(target, Flow):
+            raise ValueError(f"Flow entry point '{entry_point}' does not resolve to a Flow")
+        return target
+
+    def run(self, flow_name: str, **kwargs) -> int:
+        flow = self.get_flow(flow_name)
         if not flow:
             print(f"No flow found with the name '{flow_name}'.", file=sys.stderr)
             return 1
 
         print(f"Invoking flow:{flow_name} with args: {kwargs}")
 
+        record_metrics = self.metrics_json_path is not None or self.metrics_prometheus_path is not None
+        if record_metrics:
+            # the metrics of this run only, not of the earlier runs of this process
+            metrics.reset()
+            metrics.enable()
+
+        store = None
+        if self.checkpoint_path is not None or self.resume:
+            store = CheckpointStore(db_path=self.checkpoint_path or DEFAULT_CHECKPOINT_PATH)
+            store.start(flow_name, kwargs, resume=self.resume)
+            checkpoint.activate(store)
+
+        profiler = None
+        if self.profile_path is not None:
+            profiler = Profiler(output_path=self.profile_path, mode=self.profile_mode, interval=self.profile_interval)
+            profiler.start()
+
         try:
-            flow.execute(**kwargs)
+            if flow.is_async():
+                import asyncio
+                asyncio.run(flow.aexecute(**kwargs))
+            else:
+                flow.execute(**kwargs)
+            if store is not None:
+                store.complete()
             return 0
         except ValueError as ve:
             print(f"Error in flow execution: {str(ve)}", file=sys.stderr)
@@ -40,35 +121,105 @@ class App(BaseModel):
         except ValidationError as ve:
             print(f"Error in flow execution: {str(ve)}", file=sys.stderr)
             return 1
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                for path in profiler.write():
+                    print(f"Profile written to: {path}")
+            if store is not None:
+                checkpoint.activate(None)
+                print(store.report())
+                store.close()
+            if record_metrics:
+                metrics.disable()
+                self.write_metrics()
+
+    def write_metrics(self):
+        if self.metrics_json_path is not None:
+            metrics.write_json(self.metrics_json_path)
+            print(f"Metrics written to: {self.metrics_json_path}")
+        if self.metrics_prometheus_path is not None:
+            metrics.write_prometheus(self.metrics_prometheus_path)
+            print(f"Metrics written to: {self.metrics_prometheus_path}")
 
     def main(self):
-        if len(self.flows) == 0:
+        flow_names = self.flow_names()
+        if len(flow_names) == 0:
             print("ERROR: No flow registered")
             return
 
         parser = argparse.ArgumentParser(description=self.name)
+        parser.add_argument('--metrics-json',
+                            action='store',
+                            help='Write a JSON summary of per task metrics to this file')
+        parser.add_argument('--metrics-prometheus',
+                            action='store',
+                            help='Write per task metrics to this file in Prometheus textfile format')
+        parser.add_argument('--checkpoint-db',
+                            action='store',
+                            help=f'Checkpoint completed tasks in this sqlite file (default with --resume: '
+                                 f'{DEFAULT_CHECKPOINT_PATH})')
+        parser.add_argument('--resume',
+                            action='store_true',
+                            help='Skip the tasks completed by the last failed run of the flow with the same config')
+        parser.add_argument('--profile',
+                            action='store',
+                            help='Profile the flow, writing <PROFILE>.collapsed (flamegraph stacks) and, in '
+                                 'deterministic mode, <PROFILE>.pstats plus one <PROFILE>.<task>.pstats per task')
+        parser.add_argument('--profile-mode',
+                            choices=PROFILE_MODES,
+                            default='deterministic',
+                            help='deterministic: cProfile every call, sampling: low overhead stack sampling only')
+        parser.add_argument('--profile-interval',
+                            type=float,
+                            default=0.005,
+                            help='Seconds between stack samples (default 0.005)')
 
         # Create subparsers for each flow
         subparsers = parser.add_subparsers(dest='flow', help='Available flows')
 
-        for flow in self.flows.values():
-            flow_parser = subparsers.add_parser(flow.name,
+        # The config schema is only displayed by '<flow> --help': render it for that flow alone, so that the other
+        # flows (and yaml) are not loaded just to build the parser
+        selected_flow = flow_names[0] if len(flow_names) == 1 else next(
+            (arg for arg in sys.argv[1:] if arg in flow_names), None)
+        wants_help = '-h' in sys.argv[1:] or '--help' in sys.argv[1:]
+
+        for flow_name in flow_names:
+            flow_parser = subparsers.add_parser(flow_name,
                                                 help='Options for flow 1',
                                                 formatter_class=argparse.RawTextHelpFormatter)
+            if wants_help and flow_name == selected_flow:
+                config_help = textwrap.dedent(f'''Specify following in config or as x=y on commandline:
+{self.get_flow(flow_name).__class__.get_compact_schema()}''')
+            else:
+                config_help = f"Config file, see '{flow_name} --help' for its keys"
             flow_parser.add_argument('-c',
                                      '--config',
                                      action='store',
-                                     help=textwrap.dedent(f'''Specify following in config or as x=y on commandline:
-{flow.__class__.get_compact_schema()}'''),
+                                     help=config_help,
                                      )
 
         args, extra_args = parser.parse_known_args()
 
         print("Args: ", args, extra_args)
 
+        if args.metrics_json:
+            self.metrics_json_path = Path(args.metrics_json)
+        if args.metrics_prometheus:
+            self.metrics_prometheus_path = Path(args.metrics_prometheus)
+        if args.checkpoint_db:
+            self.checkpoint_path = Path(args.checkpoint_db)
+        if args.resume:
+            self.resume = True
+        if args.profile:
+            self.profile_path = Path(args.profile)
+            self.profile_mode = args.profile_mode
+            self.profile_interval = args.profile_interval
+
         config = {}
         if args.__contains__('config') and args.config:
             # Load configuration from YAML
+            import yaml
             with open(args.config, 'r') as f:
                 loaded_config = yaml.safe_load(f)
                 config = loaded_config.get(args.flow, None)
@@ -84,9 +235,8 @@ class App(BaseModel):
                 set_nested_value(config, key, value)
 
         # Run the specified flow, if any
-        if len(self.flows) == 1:
-            flow = next(iter(self.flows.values()))
-            self.run(flow.name, **config)
+        if len(flow_names) == 1:
+            self.run(flow_names[0], **config)
         elif args.flow:
             self.run(args.flow, **config)
         else:
@@ -0,0 +1,171 @@
+import inspect
+from pathlib import Path
+from typing import Any, Callable, Optional, Union, get_args, get_origin
+
+import pydantic_core
+from pydantic import BaseModel, TypeAdapter
+
+from kwiq.core.errors import ValidationError
+
+BASIC_TYPES = (int, float, str, bool, list, dict, tuple, set, Path)
+
+# How a parameter value is produced from the kwargs given to execute()
+KIND_ANY = 'any'
+KIND_BASIC = 'basic'
+KIND_MODEL = 'model'
+KIND_ADAPTER = 'adapter'
+
+
+def unwrap_optional(annotation) -> (Any, bool):
+    """
+    Returns the annotation with a surrounding Optional removed, plus whether it was optional.
+    A missing annotation is returned as None.
+    """
+    if annotation is inspect.Parameter.empty:
+        return None, False
+
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is Union and type(None) in args:
+        # This is an Optional, extract the first non-None type
+        return next((arg for arg in args if arg is not type(None)), None), True
+
+    return annotation, False
+
+
+class ParamBinding:
+    """
+    Everything execute() needs to know about one fn parameter, worked out once per class.
+    """
+
+    def __init__(self, name: str, param: inspect.Parameter):
+        self.name = name
+        self.param_type, self.is_optional = unwrap_optional(param.annotation)
+        self.has_default = param.default is not inspect.Parameter.empty
+        self.default = param.default
+        self.__adapter: Optional[TypeAdapter] = None
+        self.__list_adapter: Optional[TypeAdapter] = None
+
+        if self.param_type is None:
+            self.kind = KIND_ANY
+        elif inspect.isclass(self.param_type) and issubclass(self.param_type, BASIC_TYPES):
+            self.kind = KIND_BASIC
+        elif inspect.isclass(self.param_type) and issubclass(self.param_type, BaseModel):
+            self.kind = KIND_MODEL
+        else:
+            self.kind = KIND_ADAPTER
+
+        # isinstance() against a subscripted generic raises, so only real classes get the fast path
+        self.instance_type = self.param_type if inspect.isclass(self.param_type) else None
+
+    @property
+    def adapter(self) -> TypeAdapter:
+        # Built on first use: adapters are costly and forward references may not resolve at class creation
+        if self.__adapter is None:
+            self.__adapter = TypeAdapter(self.param_type)
+        return self.__adapter
+
+    @property
+    def list_adapter(self) -> TypeAdapter:
+        if self.__list_adapter is None:
+            self.__list_adapter = TypeAdapter(list[self.param_type])
+        return self.__list_adapter
+
+    def accepts(self, arg: Any) -> bool:
+        return self.kind == KIND_ANY or (self.instance_type is not None and isinstance(arg, self.instance_type))
+
+    def fallback(self) -> Any:
+        if self.has_default:
+            return self.default
+        if self.is_optional:
+            return None
+        raise ValueError(f"Missing required parameter: '{self.name}'")
+
+    def convert(self, arg: Any) -> Any:
+        if self.accepts(arg):
+            return arg
+        if self.kind == KIND_BASIC:
+            return self.param_type(arg)
+        if self.kind == KIND_MODEL:
+            # If expected type is a Pydantic model, parse it accordingly
+            return self.param_type(**arg)
+        # Validate and convert parameter types using Pydantic's TypeAdapter
+        return self.adapter.validate_python(arg)
+
+    def build_from_kwargs(self, kwargs: dict) -> Any:
+        """
+        The parameter was not passed by name: attempt to create it from all the kwargs.
+        """
+        if self.kind == KIND_ANY or self.kind == KIND_BASIC:
+            return self.fallback()
+        if self.kind == KIND_MODEL:
+            return self.param_type(**kwargs)
+        try:
+            return self.adapter.validate_python(kwargs)
+        except pydantic_core.ValidationError as _:
+            return self.fallback()
+
+
+class BindingPlan:
+    """
+    Precompiled mapping from execute(**kwargs) to the arguments of fn, built once per Typed subclass.
+    """
+
+    def __init__(self, fn: Callable):
+        parameters = inspect.signature(fn).parameters
+        self.bindings = [ParamBinding(name, param) for name, param in parameters.items() if name != 'self']
+
+    def bind(self, kwargs: dict) -> dict[str, Any]:
+        fn_args = {}
+        for binding in self.bindings:
+            name = binding.name
+            if name in kwargs:
+                try:
+                    fn_args[name] = binding.convert(kwargs[name])
+                except ValidationError as e:
+                    raise ValidationError(f"Parameter validation failed for '{name}': {str(e)}")
+            else:
+                fn_args[name] = binding.build_from_kwargs(kwargs)
+        return fn_args
+
+    def bind_many(self, kwargs_list: list[dict]) -> list[dict[str, Any]]:
+        """
+        Same as bind() for a whole batch, but every parameter that needs pydantic validation is validated for all
+        items at once with a single list[...] TypeAdapter pass.
+        """
+        batch = [{} for _ in kwargs_list]
+        for binding in self.bindings:
+            name = binding.name
+            given = [name in kwargs for kwargs in kwargs_list]
+
+            if not any(given) and binding.kind != KIND_ADAPTER:
+                # nothing passed by name: one fallback (or model built from kwargs) for the whole batch
+                if binding.kind == KIND_MODEL:
+                    values = binding.list_adapter.validate_python(kwargs_list)
+                else:
+                    values = [binding.fallback()] * len(kwargs_list)
+                for fn_args, value in zip(batch, values):
+                    fn_args[name] = value
+                continue
+
+            # (index in batch, raw value) of the items validated together
+            pending = []
+            for index, kwargs in enumerate(kwargs_list):
+                if given[index]:
+                    arg = kwargs[name]
+                    if binding.accepts(arg):
+                        batch[index][name] = arg
+                    elif binding.kind == KIND_BASIC:
+                        batch[index][name] = binding.param_type(arg)
+                    else:
+                        pending.append((index, arg))
+                elif binding.kind == KIND_MODEL:
+                    pending.append((index, kwargs))
+                else:
+                    batch[index][name] = binding.build_from_kwargs(kwargs)
+
+            if pending:
+                values = binding.list_adapter.validate_python([arg for _, arg in pending])
+                for (index, _), value in zip(pending, values):
+                    batch[index][name] = value
+        return batch
@@ -0,0 +1,100 @@
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import BaseModel, PrivateAttr
+
+from kwiq.core.fingerprint import digest
+from kwiq.db.sqlite import DB
+
+
+class ResultCache(BaseModel):
+    """
+    On-disk cache of task results keyed by a hash of the task, its validated inputs and the stat information of
+    Path inputs. Least recently used results are evicted once the cache grows past max_size_bytes. A cache can be
+    shared by tasks running on several threads (e.g. steps of a Scheduler).
+    """
+    db_path: Path
+    max_size_bytes: int = 512 * 1024 * 1024
+
+    hits: int = 0
+    misses: int = 0
+
+    __db: Optional[DB] = None
+    __total_size: Optional[int] = None
+    # guards the counters, the total size and the opening of the database
+    __lock: threading.RLock = PrivateAttr(default_factory=threading.RLock)
+
+    @property
+    def db(self) -> DB:
+        if self.__db is not None:
+            return self.__db
+        with self.__lock:
+            if self.__db is not None:
+                return self.__db
+            db = DB(db_path=self.db_path)
+            db.command(sql='''
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (key)
+            )
+            ''')
+            db.command(sql='CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)')
+            self.__total_size = db.select(sql='SELECT COALESCE(SUM(size), 0) FROM results')[0][0]
+            self.__db = db
+            return db
+
+    def key(self, typed: BaseModel, fn_args: dict[str, Any]) -> Optional[str]:
+        return digest(typed, fn_args)
+
+    def get(self, key: str) -> (bool, Any):
+        rows = self.db.select(sql='SELECT value FROM results WHERE key = ?', parameters=(key,))
+        with self.__lock:
+            if len(rows) == 0:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        self.db.command(sql='UPDATE results SET last_access = ? WHERE key = ?', parameters=(time.time(), key))
+        return True, pickle.loads(rows[0][0])
+
+    def put(self, key: str, value: Any):
+        try:
+            data = pickle.dumps(value)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        if len(data) > self.max_size_bytes:
+            return
+
+        db = self.db
+        with self.__lock:
+            previous = db.select(sql='SELECT size FROM results WHERE key = ?', parameters=(key,))
+            db.command(sql='''
+                INSERT INTO results (key, value, size, last_access)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                    value = excluded.value, size = excluded.size, last_access = excluded.last_access
+                ''', parameters=(key, data, len(data), time.time()))
+            self.__total_size += len(data) - (previous[0][0] if previous else 0)
+            self.evict()
+
+    def evict(self):
+        with self.__lock:
+            if self.__total_size <= self.max_size_bytes:
+                return
+
+            db = self.db
+            for key, size in db.select(sql='SELECT key, size FROM results ORDER BY last_access'):
+                if self.__total_size <= self.max_size_bytes:
+                    break
+                db.command(sql='DELETE FROM results WHERE key = ?', parameters=(key,))
+                self.__total_size -= size
+
+    def close(self):
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
@@ -0,0 +1,177 @@
+import contextvars
+import pickle
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, TYPE_CHECKING
+
+from pydantic import BaseModel, PrivateAttr
+
+from kwiq.core.fingerprint import digest
+
+if TYPE_CHECKING:
+    from kwiq.db.sqlite import DB
+
+DEFAULT_CHECKPOINT_PATH = Path('.kwiq-checkpoints.db')
+
+# set while a checkpointed execution runs: a context variable follows it into coroutines and into the threads that
+# run with a copy of its context (Scheduler steps, blocking fns of aexecute)
+_nested: contextvars.ContextVar[bool] = contextvars.ContextVar('kwiq_checkpoint_nested', default=False)
+
+
+class CheckpointStore(BaseModel):
+    """
+    Records the validated output of every task completed during a flow run, so that a restarted run of the same
+    flow with the same arguments can skip them. Only the outermost task executions are checkpointed: the tasks a
+    task executes itself are redone with it.
+
+    A task is identified by its class, fields and inputs plus how many identical executions came before it in
+    the run, so that e.g. a command run twice is not skipped the second time.
+    """
+    db_path: Path = DEFAULT_CHECKPOINT_PATH
+    run_id: Optional[str] = None
+
+    saved: int = 0
+    skipped: int = 0
+
+    __db: Optional['DB'] = None
+    __occurrences: Dict[str, int] = PrivateAttr(default_factory=dict)
+    __lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def db(self) -> 'DB':
+        if self.__db is None:
+            from kwiq.db.sqlite import DB
+            self.__db = DB(db_path=self.db_path)
+            self.__db.command(sql='''
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                run_id TEXT NOT NULL,
+                step_key TEXT NOT NULL,
+                task_name TEXT NOT NULL,
+                output BLOB NOT NULL,
+                completed_at REAL NOT NULL,
+                PRIMARY KEY (run_id, step_key)
+            )
+            ''')
+        return self.__db
+
+    def start(self, flow_name: str, kwargs: dict, resume: bool):
+        """
+        Begin a run of flow_name. Unless resuming, checkpoints left by an earlier run of the same flow and
+        arguments are discarded.
+        """
+        # files are expected to have changed since the failed run, identify the run by its arguments only
+        self.run_id = digest(flow_name, kwargs, with_stats=False) or flow_name
+        self.__occurrences = {}
+        self.saved = 0
+        self.skipped = 0
+
+        if resume:
+            count = self.db.select(sql='SELECT COUNT(*) FROM checkpoints WHERE run_id = ?',
+                                   parameters=(self.run_id,))[0][0]
+            print(f"Resuming flow:{flow_name}, {count} completed tasks will be skipped")
+        else:
+            self.db.command(sql='DELETE FROM checkpoints WHERE run_id = ?', parameters=(self.run_id,))
+
+    def complete(self):
+        """
+        The run succeeded: nothing is left to resume.
+        """
+        self.db.command(sql='DELETE FROM checkpoints WHERE run_id = ?', parameters=(self.run_id,))
+
+    def run(self, typed: BaseModel, fn_args: dict[str, Any], call: Callable[[], Any]) -> Any:
+        """
+        Returns the checkpointed output of this task execution, or calls it and checkpoints its output.
+        """
+        if _nested.get():
+            return call()
+
+        step_key = self.step_key(typed, fn_args)
+        if step_key is not None:
+            found, output = self.load(step_key)
+            if found:
+                return output
+
+        token = _nested.set(True)
+        try:
+            output = call()
+        finally:
+            _nested.reset(token)
+
+        if step_key is not None:
+            self.save(step_key, getattr(typed, 'name', type(typed).__name__), output)
+        return output
+
+    async def arun(self, typed: BaseModel, fn_args: dict[str, Any], call: Callable[[], Awaitable]) -> Any:
+        """
+        run() for aexecute().
+        """
+        if _nested.get():
+            return await call()
+
+        step_key = self.step_key(typed, fn_args)
+        if step_key is not None:
+            found, output = self.load(step_key)
+            if found:
+                return output
+
+        token = _nested.set(True)
+        try:
+            output = await call()
+        finally:
+            _nested.reset(token)
+
+        if step_key is not None:
+            self.save(step_key, getattr(typed, 'name', type(typed).__name__), output)
+        return output
+
+    def step_key(self, typed: BaseModel, fn_args: dict[str, Any]) -> Optional[str]:
+        key = digest(typed, fn_args, with_stats=False)
+        if key is None:
+            return None
+
+        with self.__lock:
+            occurrence = self.__occurrences.get(key, 0)
+            self.__occurrences[key] = occurrence + 1
+        return f"{key}:{occurrence}"
+
+    def load(self, step_key: str) -> (bool, Any):
+        rows = self.db.select(sql='SELECT output FROM checkpoints WHERE run_id = ? AND step_key = ?',
+                              parameters=(self.run_id, step_key))
+        if len(rows) == 0:
+            return False, None
+
+        self.skipped += 1
+        return True, pickle.loads(rows[0][0])
+
+    def save(self, step_key: str, task_name: str, output: Any):
+        try:
+            data = pickle.dumps(output)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # not resumable, the task will simply run again
+            return
+
+        self.db.command(sql='''
+            INSERT INTO checkpoints (run_id, step_key, task_name, output, completed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(run_id, step_key) DO UPDATE SET
+                output = excluded.output, completed_at = excluded.completed_at
+            ''', parameters=(self.run_id, step_key, task_name, data, time.time()))
+        self.saved += 1
+
+    def report(self) -> str:
+        return f"Checkpoints: {self.saved} tasks saved, {self.skipped} tasks skipped"
+
+    def close(self):
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
+
+
+# store of the flow run in progress, set by App.run when checkpointing is requested
+active_store: Optional[CheckpointStore] = None
+
+
+def activate(store: Optional[CheckpointStore]):
+    global active_store
+    active_store = store
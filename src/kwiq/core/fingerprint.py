@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class UncacheableError(Exception):
+    """Raised when a value can not be fingerprinted (e.g. a lambda)."""
+
+
+def path_fingerprint(path: Path) -> Any:
+    """
+    Identifies the content of a path by stat information only: size and mtime of a file, or of every file below
+    a directory.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return [str(path), None]
+
+    if not path.is_dir():
+        return [str(path), stat.st_size, stat.st_mtime_ns]
+
+    files = []
+    for dir_path, dir_names, filenames in os.walk(path):
+        dir_names.sort()
+        for filename in sorted(filenames):
+            file_path = os.path.join(dir_path, filename)
+            try:
+                file_stat = os.stat(file_path)
+            except FileNotFoundError:
+                continue
+            files.append([os.path.relpath(file_path, path), file_stat.st_size, file_stat.st_mtime_ns])
+    return [str(path), files]
+
+
+def fingerprint(value: Any, with_stats: bool = True) -> Any:
+    """
+    JSON serializable form of value for hashing. With with_stats, paths include the stat information of what
+    they point to.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, Path):
+        return {'path': path_fingerprint(value) if with_stats else str(value)}
+    if isinstance(value, BaseModel):
+        return {'model': f"{type(value).__module__}.{type(value).__qualname__}",
+                'fields': {name: fingerprint(getattr(value, name), with_stats) for name in type(value).model_fields}}
+    if isinstance(value, dict):
+        return {'dict': sorted([str(key), fingerprint(item, with_stats)] for key, item in value.items())}
+    if isinstance(value, (list, tuple)):
+        return [fingerprint(item, with_stats) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return {'set': sorted(json.dumps(fingerprint(item, with_stats), sort_keys=True) for item in value)}
+    raise UncacheableError(f"Can not build a cache key from value of type {type(value).__name__}")
+
+
+def digest(*values: Any, with_stats: bool = True) -> Optional[str]:
+    """
+    sha256 of the fingerprints of values, None when one of them can not be fingerprinted.
+    """
+    try:
+        content = json.dumps([fingerprint(value, with_stats) for value in values], sort_keys=True)
+    except UncacheableError:
+        return None
+    return hashlib.sha256(content.encode()).hexdigest()
@@ -0,0 +1,116 @@
+import time
+from typing import Any, Callable, List, Optional
+
+
+class Execution:
+    """
+    One Typed.execute() call as seen by the execution hooks. Times are from time.perf_counter() (wall) and
+    time.thread_time(), inclusive of any nested task executions.
+
+    cpu_time is the CPU time of the thread running fn only, not of the threads or processes fn hands work to. It is
+    None when no thread runs the execution alone: for aexecute() of an async fn, whose event loop thread runs other
+    coroutines meanwhile, and when aexecute() does not call fn (cached or checkpointed result).
+    """
+    __slots__ = ('typed', 'kwargs', 'fn_args', 'result', 'error',
+                 'start', 'bound', 'fn_end', 'end', 'cpu_start', 'cpu_end')
+
+    def __init__(self, typed, kwargs: dict, measure_cpu: bool = True):
+        self.typed = typed
+        self.kwargs = kwargs
+        self.fn_args: Optional[dict] = None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.start = time.perf_counter()
+        self.cpu_start: Optional[float] = time.thread_time() if measure_cpu else None
+        self.bound: Optional[float] = None
+        self.fn_end: Optional[float] = None
+        self.end: Optional[float] = None
+        self.cpu_end: Optional[float] = None
+
+    def mark_bound(self, fn_args: dict):
+        self.fn_args = fn_args
+        self.bound = time.perf_counter()
+
+    def mark_fn_end(self):
+        self.fn_end = time.perf_counter()
+
+    def run_fn(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Calls fn, measuring cpu_time in the thread calling it: for a fn run by another thread than the execution's.
+        """
+        cpu_start = time.thread_time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.cpu_start = cpu_start
+            self.cpu_end = time.thread_time()
+
+    @property
+    def wall_time(self) -> float:
+        return self.end - self.start
+
+    @property
+    def cpu_time(self) -> Optional[float]:
+        if self.cpu_end is None:
+            return None
+        return self.cpu_end - self.cpu_start
+
+    @property
+    def fn_time(self) -> float:
+        if self.bound is None:
+            return 0.0
+        return (self.fn_end or self.end) - self.bound
+
+    @property
+    def validation_time(self) -> float:
+        # binding/validating the inputs plus validating the result
+        return self.wall_time - self.fn_time
+
+
+class ExecutionHook:
+    """
+    Observer of every Typed.execute() call, e.g. for metrics or profiling. after() is called even when the
+    execution failed, with execution.error set.
+    """
+
+    def before(self, execution: Execution):
+        pass
+
+    def after(self, execution: Execution):
+        pass
+
+
+hooks: List[ExecutionHook] = []
+
+
+def add_hook(hook: ExecutionHook):
+    if hook not in hooks:
+        hooks.append(hook)
+
+
+def remove_hook(hook: ExecutionHook):
+    if hook in hooks:
+        hooks.remove(hook)
+
+
+def begin(typed, kwargs: dict, measure_cpu: bool = True) -> Optional[Execution]:
+    if not hooks:
+        return None
+
+    execution = Execution(typed, kwargs, measure_cpu)
+    for hook in hooks:
+        hook.before(execution)
+    return execution
+
+
+def end(execution: Optional[Execution], result: Any = None, error: Optional[BaseException] = None):
+    if execution is None:
+        return
+
+    execution.end = time.perf_counter()
+    if execution.cpu_start is not None and execution.cpu_end is None:
+        execution.cpu_end = time.thread_time()
+    execution.result = result
+    execution.error = error
+    for hook in reversed(hooks):
+        hook.after(execution)
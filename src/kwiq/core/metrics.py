@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+from pydantic import BaseModel, PrivateAttr
+
+from kwiq.core import hooks
+from kwiq.core.flow import Flow
+
+
+def size_of(value: Any) -> int:
+    """
+    Rough size of a task input or output: number of items of strings and collections, summed over the fields
+    of models, 1 for any other value.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, BaseModel):
+        return sum(size_of(getattr(value, name)) for name in type(value).model_fields)
+    if isinstance(value, (str, bytes, list, tuple, set, frozenset, dict)):
+        return len(value)
+    return 1
+
+
+class TaskMetrics(BaseModel):
+    name: str
+    kind: str
+    calls: int = 0
+    # exception class name -> count
+    errors: Dict[str, int] = {}
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    validation_time: float = 0.0
+    fn_time: float = 0.0
+    input_size: int = 0
+    output_size: int = 0
+
+
+class Metrics(hooks.ExecutionHook, BaseModel):
+    """
+    Per task and flow execution metrics, recorded by an execution hook while enabled. Times are inclusive: a
+    flow's time contains the time of the tasks it executed.
+    """
+    tasks: Dict[str, TaskMetrics] = {}
+    __lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def enable(self):
+        hooks.add_hook(self)
+
+    def disable(self):
+        hooks.remove_hook(self)
+
+    def reset(self):
+        with self.__lock:
+            self.tasks = {}
+
+    def after(self, execution: hooks.Execution):
+        typed = execution.typed
+        name = getattr(typed, 'name', type(typed).__name__)
+        kind = 'flow' if isinstance(typed, Flow) else 'task'
+        input_size = sum(size_of(value) for value in (execution.fn_args or {}).values())
+        output_size = size_of(execution.result)
+
+        with self.__lock:
+            metrics = self.tasks.get(name)
+            if metrics is None:
+                metrics = self.tasks[name] = TaskMetrics(name=name, kind=kind)
+            metrics.calls += 1
+            if execution.error is not None:
+                error_name = type(execution.error).__name__
+                metrics.errors[error_name] = metrics.errors.get(error_name, 0) + 1
+            metrics.wall_time += execution.wall_time
+            if execution.cpu_time is not None:
+                metrics.cpu_time += execution.cpu_time
+            metrics.validation_time += execution.validation_time
+            metrics.fn_time += execution.fn_time
+            metrics.input_size += input_size
+            metrics.output_size += output_size
+
+    def to_json(self) -> str:
+        with self.__lock:
+            summary = {name: metrics.model_dump() for name, metrics in self.tasks.items()}
+        return json.dumps(summary, indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheus text exposition format, suitable for the node exporter textfile collector.
+        """
+        counters = [
+            ('kwiq_task_calls_total', 'Number of executions.', 'calls'),
+            ('kwiq_task_wall_seconds_total', 'Wall time of executions.', 'wall_time'),
+            ('kwiq_task_cpu_seconds_total', 'CPU time of the thread running fn.', 'cpu_time'),
+            ('kwiq_task_validation_seconds_total', 'Time spent validating inputs and results.', 'validation_time'),
+            ('kwiq_task_fn_seconds_total', 'Time spent in fn.', 'fn_time'),
+            ('kwiq_task_input_size_total', 'Size of the inputs (items).', 'input_size'),
+            ('kwiq_task_output_size_total', 'Size of the results (items).', 'output_size'),
+        ]
+        with self.__lock:
+            tasks = list(self.tasks.values())
+
+        lines = []
+        for metric, help_text, field in counters:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for metrics in tasks:
+                lines.append(f'{metric}{{task="{_escape(metrics.name)}",kind="{metrics.kind}"}} '
+                             f'{getattr(metrics, field)}')
+
+        lines.append("# HELP kwiq_task_errors_total Number of executions that raised, by exception class.")
+        lines.append("# TYPE kwiq_task_errors_total counter")
+        for metrics in tasks:
+            for error_name, count in metrics.errors.items():
+                lines.append(f'kwiq_task_errors_total{{task="{_escape(metrics.name)}",kind="{metrics.kind}",'
+                             f'exception="{_escape(error_name)}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path: Path):
+        _write_atomically(path, self.to_json())
+
+    def write_prometheus(self, path: Path):
+        _write_atomically(path, self.to_prometheus())
+
+
+def _escape(label_value: str) -> str:
+    return label_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _write_atomically(path: Path, content: str):
+    # collectors may read the file at any time, never let them see it half written
+    temp_path = Path(f"{path}.tmp")
+    with open(temp_path, 'w') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+
+
+# process wide metrics, recorded by App.run when metrics output is requested, reset at the start of each run
+metrics = Metrics()
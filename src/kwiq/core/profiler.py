@@ -0,0 +1,167 @@
+import re
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from pydantic import BaseModel, PrivateAttr
+
+from kwiq.core import hooks
+from kwiq.core.flow import Flow
+
+if TYPE_CHECKING:
+    import cProfile
+
+PROFILE_MODES = ('deterministic', 'sampling')
+
+
+class Profiler(hooks.ExecutionHook, BaseModel):
+    """
+    Profiles a flow run, with a section per task: the outermost task executed by the flow on each thread.
+
+    'deterministic' mode runs cProfile, with one profiler per section and thread, and writes the combined stats to
+    <output_path>.pstats and the stats of each section to <output_path>.<task>.pstats. Both modes sample the
+    stacks of the threads running tasks every interval seconds and write them to <output_path>.collapsed in the
+    collapsed stack format of flamegraph tools, each stack prefixed with the flow and task executions it is in.
+    'sampling' mode does only that, which costs little enough for production size inputs.
+
+    Coroutines of an asynchronous flow share a thread: their samples are attributed to the task that started last.
+    From Python 3.12 only one cProfile profiler can be enabled at a time in a process: a section starting on a
+    thread while another thread's is profiled is only sampled, and counted in unprofiled_sections.
+    """
+    output_path: Path
+    mode: str = 'deterministic'
+    interval: float = 0.005
+
+    samples: int = 0
+    unprofiled_sections: int = 0
+
+    # thread id -> labels of the executions in progress on it, outermost first
+    __stacks: Dict[int, List[str]] = PrivateAttr(default_factory=dict)
+    __local: threading.local = PrivateAttr(default_factory=threading.local)
+    __profiles: List[Tuple[str, 'cProfile.Profile']] = PrivateAttr(default_factory=list)
+    __collapsed: Counter = PrivateAttr(default_factory=Counter)
+    __labels: Dict[object, str] = PrivateAttr(default_factory=dict)
+    __stop: threading.Event = PrivateAttr(default_factory=threading.Event)
+    __lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    __sampler: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{self.mode}', expected one of {', '.join(PROFILE_MODES)}")
+
+        self.__stop.clear()
+        self.__sampler = threading.Thread(target=self.__sample_loop, name='kwiq-profiler', daemon=True)
+        self.__sampler.start()
+        hooks.add_hook(self)
+
+    def stop(self):
+        hooks.remove_hook(self)
+        if self.__sampler is not None:
+            self.__stop.set()
+            self.__sampler.join()
+            self.__sampler = None
+
+    def before(self, execution: hooks.Execution):
+        typed = execution.typed
+        label = f"{'flow' if isinstance(typed, Flow) else 'task'}:{getattr(typed, 'name', type(typed).__name__)}"
+        stack = self.__stacks.setdefault(threading.get_ident(), [])
+        stack.append(label)
+        if self.mode == 'deterministic':
+            self.__switch_section(stack)
+
+    def after(self, execution: hooks.Execution):
+        stack = self.__stacks.get(threading.get_ident())
+        if stack:
+            stack.pop()
+            if self.mode == 'deterministic':
+                self.__switch_section(stack)
+
+    def __switch_section(self, stack: List[str]):
+        section = next((label for label in stack if label.startswith('task:')), stack[0] if stack else None)
+        local = self.__local
+        if getattr(local, 'section', None) == section:
+            return
+
+        profile = getattr(local, 'profile', None)
+        if profile is not None:
+            profile.disable()
+
+        profile = None
+        if section is not None:
+            profiles = local.__dict__.setdefault('profiles', {})
+            profile = profiles.get(section)
+            if profile is None:
+                import cProfile
+                profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # another profiler is active: the samples of the section are all there is
+                with self.__lock:
+                    if self.unprofiled_sections == 0:
+                        print(f"Profiler: another profiler is active, '{section}' is only sampled", file=sys.stderr)
+                    self.unprofiled_sections += 1
+                profile = None
+            else:
+                if section not in profiles:
+                    profiles[section] = profile
+                    self.__profiles.append((section, profile))
+        local.section = section
+        local.profile = profile
+
+    def __sample_loop(self):
+        own_ident = threading.get_ident()
+        while not self.__stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = self.__stacks.get(ident)
+                if not stack:
+                    continue
+                self.__collapsed[';'.join(stack + self.__frame_labels(frame))] += 1
+            self.samples += 1
+
+    def __frame_labels(self, frame) -> List[str]:
+        labels = self.__labels
+        frame_labels = []
+        while frame is not None:
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+            frame_labels.append(label)
+            frame = frame.f_back
+        frame_labels.reverse()
+        return frame_labels
+
+    def write(self) -> List[Path]:
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        written = []
+
+        collapsed_path = Path(f"{self.output_path}.collapsed")
+        with open(collapsed_path, 'w') as f:
+            for stack, count in sorted(self.__collapsed.items()):
+                f.write(f"{stack} {count}\n")
+        written.append(collapsed_path)
+
+        if self.__profiles:
+            import pstats
+            combined = pstats.Stats(*[profile for _, profile in self.__profiles])
+            combined_path = Path(f"{self.output_path}.pstats")
+            combined.dump_stats(combined_path)
+            written.append(combined_path)
+
+            sections: Dict[str, List['cProfile.Profile']] = {}
+            for section, profile in self.__profiles:
+                sections.setdefault(section, []).append(profile)
+            for section, profiles in sections.items():
+                section_path = Path(f"{self.output_path}.{_file_name(section)}.pstats")
+                pstats.Stats(*profiles).dump_stats(section_path)
+                written.append(section_path)
+        return written
+
+
+def _file_name(section: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', section.partition(':')[2] or section)
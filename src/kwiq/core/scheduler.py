@@ -0,0 +1,188 @@
+import contextvars
+import time
+from concurrent.futures import Executor, FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from kwiq.core.step import Step
+
+
+class StepTiming(BaseModel):
+    name: str
+    # seconds since the start of the schedule, from when the step started running: time waiting for a free worker
+    # is not included
+    start: float
+    end: float
+
+    @property
+    def wall_time(self) -> float:
+        return self.end - self.start
+
+
+class ScheduleResult(BaseModel):
+    artifacts: Dict[str, Any]
+    timings: Dict[str, StepTiming]
+    critical_path: List[str]
+    critical_path_time: float
+    wall_time: float
+
+    def report(self) -> str:
+        lines = [f"Schedule wall time: {self.wall_time:.3f}s, "
+                 f"critical path ({self.critical_path_time:.3f}s): {' -> '.join(self.critical_path)}"]
+        for timing in sorted(self.timings.values(), key=lambda t: t.start):
+            lines.append(f"  {timing.name}: {timing.wall_time:.3f}s (start {timing.start:.3f}s)")
+        return '\n'.join(lines)
+
+
+def _run_step(step: Step, inputs: Dict[str, Any]) -> (Any, float, float):
+    # module level so that it can be sent to a process pool, whose clock for perf_counter() may not be the one of
+    # the scheduling process: the start is a time() timestamp, the duration is measured with perf_counter()
+    started = time.time()
+    start = time.perf_counter()
+    result = step.run(**inputs)
+    return result, started, time.perf_counter() - start
+
+
+class Scheduler(BaseModel):
+    """
+    Runs steps as soon as the steps they depend on are done, independent steps concurrently.
+    A step depends on the producers of its inputs and on the steps listed in its after.
+    """
+    max_workers: Optional[int] = None
+    # processes side-step the GIL for CPU bound steps, but steps, inputs and results must then be picklable
+    use_processes: bool = False
+
+    def run(self, steps: List[Step], artifacts: Optional[Dict[str, Any]] = None) -> ScheduleResult:
+        artifacts = dict(artifacts or {})
+        dependencies = self.resolve_dependencies(steps, artifacts)
+        steps_by_name = {step.name: step for step in steps}
+        dependents = {step.name: [] for step in steps}
+        for name, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(name)
+
+        remaining = {name: len(deps) for name, deps in dependencies.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        durations = {}
+        timings = {}
+        schedule_start = time.perf_counter()
+        schedule_started = time.time()
+
+        with self.create_executor() as executor:
+            running = {}
+            while ready or running:
+                for name in ready:
+                    step = steps_by_name[name]
+                    inputs = {key: artifacts[key] for key in step.inputs}
+                    if self.use_processes:
+                        future = executor.submit(_run_step, step, inputs)
+                    else:
+                        # steps run in the context of the schedule, e.g. inside a checkpointed task
+                        future = executor.submit(contextvars.copy_context().run, _run_step, step, inputs)
+                    running[future] = name
+                ready = []
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        result, started, duration = future.result()
+                    except Exception:
+                        for pending in running:
+                            pending.cancel()
+                        print(f"Step '{name}' failed, cancelling the steps not started yet")
+                        raise
+
+                    durations[name] = duration
+                    start = started - schedule_started
+                    timings[name] = StepTiming(name=name, start=start, end=start + duration)
+                    artifacts.update(steps_by_name[name].collect_outputs(result))
+
+                    for dependent in dependents[name]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            ready.append(dependent)
+
+        critical_path, critical_path_time = self.critical_path(dependencies, durations)
+        result = ScheduleResult(artifacts=artifacts,
+                                timings=timings,
+                                critical_path=critical_path,
+                                critical_path_time=critical_path_time,
+                                wall_time=time.perf_counter() - schedule_start)
+        print(result.report())
+        return result
+
+    def create_executor(self) -> Executor:
+        if self.use_processes:
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+    @staticmethod
+    def resolve_dependencies(steps: List[Step], artifacts: Dict[str, Any]) -> Dict[str, List[str]]:
+        names = set()
+        producers = {}
+        for step in steps:
+            if step.name in names:
+                raise ValueError(f"A step with the name '{step.name}' already exists.")
+            names.add(step.name)
+            for output in step.outputs:
+                if output in producers:
+                    raise ValueError(f"Output '{output}' is produced by both '{producers[output]}' and '{step.name}'")
+                producers[output] = step.name
+
+        dependencies = {}
+        for step in steps:
+            deps = []
+            for key in step.inputs:
+                if key in producers:
+                    deps.append(producers[key])
+                elif key not in artifacts:
+                    raise ValueError(f"Step '{step.name}' input '{key}' is neither produced by a step nor given")
+            for name in step.after:
+                if name not in names:
+                    raise ValueError(f"Step '{step.name}' runs after unknown step '{name}'")
+                deps.append(name)
+            dependencies[step.name] = list(dict.fromkeys(deps))
+
+        # Kahn's algorithm, only to reject cycles before anything runs
+        remaining = {name: len(deps) for name, deps in dependencies.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for other, deps in dependencies.items():
+                if name in deps:
+                    remaining[other] -= 1
+                    if remaining[other] == 0:
+                        ready.append(other)
+        if visited != len(dependencies):
+            cyclic = sorted(name for name, count in remaining.items() if count > 0)
+            raise ValueError(f"Steps have cyclic dependencies: {cyclic}")
+
+        return dependencies
+
+    @staticmethod
+    def critical_path(dependencies: Dict[str, List[str]], durations: Dict[str, float]) -> (List[str], float):
+        """
+        Longest chain of dependent steps weighted by their wall time. durations must be in completion order, which
+        is a topological order since a step only starts once its dependencies completed.
+        """
+        finish = {}
+        previous = {}
+        for name, duration in durations.items():
+            before = max(dependencies[name], key=finish.get, default=None)
+            previous[name] = before
+            finish[name] = duration + (finish[before] if before else 0.0)
+
+        if not finish:
+            return [], 0.0
+
+        last = max(finish, key=finish.get)
+        path = []
+        name = last
+        while name is not None:
+            path.append(name)
+            name = previous[name]
+        return list(reversed(path)), finish[last]
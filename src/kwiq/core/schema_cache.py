@@ -0,0 +1,82 @@
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+from kwiq.core.binding import unwrap_optional
+
+
+def schema_cache_dir() -> Path:
+    cache_dir = os.environ.get('KWIQ_CACHE_DIR')
+    if cache_dir:
+        return Path(cache_dir) / 'schemas'
+    return Path.home() / '.cache' / 'kwiq' / 'schemas'
+
+
+def _collect_model_modules(model: type, modules: set, seen: set):
+    if model in seen:
+        return
+    seen.add(model)
+    modules.add(model.__module__)
+    for field_info in model.model_fields.values():
+        field_type, _ = unwrap_optional(field_info.annotation)
+        if inspect.isclass(field_type) and issubclass(field_type, BaseModel):
+            _collect_model_modules(field_type, modules, seen)
+
+
+def source_key(cls: type) -> Optional[str]:
+    """
+    Hash of the source files a Typed subclass's schema is derived from: the module of the class, the modules of
+    the pydantic models of its fn parameters (recursively) and the schema code itself. None when the class has
+    no source file.
+    """
+    modules = {cls.__module__, __name__, 'kwiq.core.typed'}
+    seen = set()
+    for name, param in inspect.signature(cls.fn).parameters.items():
+        param_type, _ = unwrap_optional(param.annotation)
+        if inspect.isclass(param_type) and issubclass(param_type, BaseModel):
+            _collect_model_modules(param_type, modules, seen)
+
+    hasher = hashlib.sha256(f"{cls.__module__}.{cls.__qualname__}".encode())
+    for module_name in sorted(modules):
+        source_file = getattr(sys.modules.get(module_name), '__file__', None)
+        if source_file is None:
+            if module_name == cls.__module__:
+                return None
+            continue
+        try:
+            with open(source_file, 'rb') as f:
+                hasher.update(f.read())
+        except OSError:
+            return None
+    return hasher.hexdigest()
+
+
+def load(key: str) -> Optional[Any]:
+    try:
+        with open(schema_cache_dir() / f"{key}.pickle", 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        # unreadable or stale entry, the schema is simply rebuilt
+        return None
+
+
+def store(key: str, value: Any):
+    cache_dir = schema_cache_dir()
+    try:
+        data = pickle.dumps(value)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_dir / f"{key}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, cache_dir / f"{key}.pickle")
+    except (OSError, pickle.PicklingError, TypeError, AttributeError):
+        # caching is best effort (e.g. read-only home directory, defaults that can not be pickled)
+        pass
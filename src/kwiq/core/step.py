@@ -1,10 +1,38 @@
 from abc import ABC
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
 from kwiq.core.flow import Flow
+from kwiq.core.typed import Typed
 
 
 class Step(ABC, BaseModel):
     name: str
-    flow: Flow
+    flow: Optional[Flow] = None
+
+    # task executed by the default run(), with args and the named inputs as kwargs
+    task: Optional[Typed] = None
+    args: Dict[str, Any] = {}
+
+    # names of the artifacts consumed (passed to run as kwargs) and produced (from the result) by this step
+    inputs: List[str] = []
+    outputs: List[str] = []
+    # names of steps that must complete first without exchanging artifacts (e.g. they write files used here)
+    after: List[str] = []
+
+    def run(self, **inputs) -> Any:
+        if self.task is None:
+            raise ValueError(f"Step '{self.name}' has no task, either set one or override run()")
+        return self.task.execute(**self.args, **inputs)
+
+    def collect_outputs(self, result: Any) -> Dict[str, Any]:
+        if len(self.outputs) == 0:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        if isinstance(result, dict):
+            return {output: result[output] for output in self.outputs}
+        if len(result) != len(self.outputs):
+            raise ValueError(f"Step '{self.name}' returned {len(result)} values for outputs {self.outputs}")
+        return dict(zip(self.outputs, result))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Any
+from typing import Any, ClassVar
 from abc import abstractmethod
 
 from kwiq.core.typed import Typed
@@ -7,6 +7,7 @@ from kwiq.core.typed import Typed
 
 class Task(Typed, BaseModel):
     name: str
+    checkpointed: ClassVar[bool] = True
 
     @abstractmethod
     def fn(self, *args, **kwargs) -> Any:
@@ -1,18 +1,25 @@
-import pydantic_core
+import contextvars
+import gc
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
 
 import sys
 
 import inspect
-import yaml
 from abc import ABC, abstractmethod
 from pydantic_core import PydanticUndefined
-from typing import Union, Type, ClassVar, Any, Callable, get_args, get_origin
+from typing import Union, Type, ClassVar, Any, Callable, Iterable, Optional, TYPE_CHECKING, get_args, get_origin
 
-from pydantic import BaseModel, parse_obj_as
+from pydantic import BaseModel, TypeAdapter
 
+from kwiq.core import checkpoint, hooks, schema_cache
+from kwiq.core.binding import BindingPlan
 from kwiq.core.errors import ValidationError
 
+if TYPE_CHECKING:
+    from kwiq.core.cache import ResultCache
+
 InputType = Union[Type[BaseModel], None]
 OutputType = Union[Type[BaseModel], type, None]
 
@@ -22,6 +29,11 @@ class Typed(ABC, BaseModel):
     __output_type: ClassVar[Type] = None
     __schema: ClassVar[dict] = None
     __compact_schema: ClassVar[str] = None
+    __binding_plan: ClassVar[BindingPlan] = None
+    __result_list_adapter: ClassVar[TypeAdapter] = None
+    __result_cache: Optional['ResultCache'] = None
+    # whether the output is recorded by the active checkpoint store, see kwiq.core.checkpoint
+    checkpointed: ClassVar[bool] = False
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -34,83 +46,192 @@ class Typed(ABC, BaseModel):
         sig = inspect.signature(cls.fn)
         cls.__input_fn_params = sig.parameters
         cls.__output_type = sig.return_annotation
+        cls.__binding_plan = BindingPlan(cls.fn)
+        # the schema is only needed for help and config, it is built (or read from disk) on first use
+        cls.__schema = None
+        cls.__compact_schema = None
+
+    @classmethod
+    def __ensure_schema(cls):
+        if cls.__schema is not None or cls.__binding_plan is None:
+            return
+
+        key = schema_cache.source_key(cls)
+        cached = schema_cache.load(key) if key is not None else None
+        if cached is not None:
+            cls.__schema, cls.__compact_schema = cached
+            return
+
         cls.validate_and_build_fn_schema(cls.fn)
+        if key is not None:
+            schema_cache.store(key, (cls.__schema, cls.__compact_schema))
 
     @classmethod
     def get_schema(cls):
+        cls.__ensure_schema()
         return cls.__schema
 
     @classmethod
     def get_compact_schema(cls):
+        cls.__ensure_schema()
         return cls.__compact_schema
 
+    @classmethod
+    def is_async(cls) -> bool:
+        return inspect.iscoroutinefunction(cls.fn)
+
+    def use_cache(self, cache: Optional['ResultCache']) -> 'Typed':
+        """
+        Memoize execute() in the given cache (None to turn it off again). Only for tasks whose result depends on
+        nothing but their fields, their inputs and the files given as Path inputs.
+        """
+        self.__result_cache = cache
+        return self
+
     def execute(self, **kwargs) -> Any:
-        fn_params = self.__class__.__input_fn_params
+        if not hooks.hooks:
+            return self.__execute(kwargs, None)
+
+        execution = hooks.begin(self, kwargs)
+        try:
+            result = self.__execute(kwargs, execution)
+        except BaseException as error:
+            hooks.end(execution, error=error)
+            raise
+        hooks.end(execution, result=result)
+        return result
 
-        # Prepare and validate arguments to pass to fn based on the signature
-        fn_args = {}
-        for name, param in fn_params.items():
-            if name == 'self':
-                continue
+    def __execute(self, kwargs: dict, execution: Optional[hooks.Execution]) -> Any:
+        fn_args = self.__class__.__binding_plan.bind(kwargs)
+        if execution is not None:
+            execution.mark_bound(fn_args)
 
-            is_optional = False
-            param_type = param.annotation
-            if param_type is inspect.Parameter.empty:
-                param_type = None
-            else:
-                origin = get_origin(param_type)
-                args = get_args(param_type)
-                if origin is Union and type(None) in args:
-                    # This is an Optional, extract the first non-None type
-                    param_type = next((arg for arg in args if arg is not type(None)), None)
-                    is_optional = True
-
-            if name in kwargs:
-                arg = kwargs[name]
-                try:
-                    if param_type is None or isinstance(arg, param_type):
-                        fn_args[name] = arg
-                    elif issubclass(param_type, (int, float, str, bool, list, dict, tuple, set, Path)):
-                        fn_args[name] = param_type(arg)
-                    elif issubclass(param_type, BaseModel):
-                        # If expected type is a Pydantic model, parse it accordingly
-                        fn_args[name] = param_type(**arg if isinstance(arg, dict) else arg)
-                    else:
-                        # Validate and convert parameter types using Pydantic's parse_obj_as
-                        fn_args[name] = parse_obj_as(param_type, arg)
-                except ValidationError as e:
-                    raise ValidationError(f"Parameter validation failed for '{name}': {str(e)}")
-            elif param_type is not None:
-                # attempt to create from kwargs
-
-                    if issubclass(param_type, (int, float, str, bool, list, dict, tuple, set, Path)):
-                        if param.default is not inspect.Parameter.empty:
-                            fn_args[name] = param.default
-                        elif is_optional:
-                            fn_args[name] = None
-                        else:
-                            raise ValueError(f"Missing required parameter: '{name}'")
-                    elif issubclass(param_type, BaseModel):
-                        fn_args[name] = param_type(**kwargs)
-                    else:
-                        # Validate and convert parameter types using Pydantic's parse_obj_as
-                        try:
-                            fn_args[name] = parse_obj_as(param_type, kwargs)
-                        except pydantic_core.ValidationError as _:
-                            if param.default is not inspect.Parameter.empty:
-                                fn_args[name] = param.default
-                            elif is_optional:
-                                fn_args[name] = None
-                            else:
-                                raise ValueError(f"Missing required parameter: '{name}'")
-            elif param.default is not inspect.Parameter.empty:
-                fn_args[name] = param.default
-            else:
-                raise ValueError(f"Missing required parameter: '{name}'")
+        store = checkpoint.active_store if self.checkpointed else None
+        if store is not None:
+            return store.run(self, fn_args, partial(self.__run, fn_args, execution))
+        return self.__run(fn_args, execution)
+
+    def __run(self, fn_args: dict[str, Any], execution: Optional[hooks.Execution]) -> Any:
+        cache_key = self.__cache_key(fn_args)
+        if cache_key is not None:
+            found, result = self.__result_cache.get(cache_key)
+            if found:
+                return result
 
         result = self.fn(**fn_args)
+        if inspect.isawaitable(result):
+            # async def fn invoked from synchronous code
+            result = _run_coroutine(result)
+        if execution is not None:
+            execution.mark_fn_end()
+
+        result = self.validate_result_data(result)
+        if cache_key is not None:
+            self.__result_cache.put(cache_key, result)
+        return result
 
-        return self.validate_result_data(result)
+    async def aexecute(self, **kwargs) -> Any:
+        """
+        Asynchronous counterpart of execute(). An async fn is awaited directly, a blocking fn runs on the event
+        loop's default executor so that many of them can wait on I/O concurrently.
+        """
+        # the event loop thread runs other coroutines meanwhile: only the executor thread running fn is measured
+        execution = hooks.begin(self, kwargs, measure_cpu=False)
+        try:
+            result = await self.__aexecute(kwargs, execution)
+        except BaseException as error:
+            hooks.end(execution, error=error)
+            raise
+        hooks.end(execution, result=result)
+        return result
+
+    async def __aexecute(self, kwargs: dict, execution: Optional[hooks.Execution]) -> Any:
+        fn_args = self.__class__.__binding_plan.bind(kwargs)
+        if execution is not None:
+            execution.mark_bound(fn_args)
+
+        store = checkpoint.active_store if self.checkpointed else None
+        if store is not None:
+            return await store.arun(self, fn_args, partial(self.__arun, fn_args, execution))
+        return await self.__arun(fn_args, execution)
+
+    async def __arun(self, fn_args: dict[str, Any], execution: Optional[hooks.Execution]) -> Any:
+        cache_key = self.__cache_key(fn_args)
+        if cache_key is not None:
+            found, result = self.__result_cache.get(cache_key)
+            if found:
+                return result
+
+        if self.is_async():
+            result = await self.fn(**fn_args)
+        else:
+            import asyncio
+            call = partial(self.fn, **fn_args)
+            if execution is not None:
+                call = partial(execution.run_fn, call)
+            # run_in_executor does not carry the context (e.g. checkpoint nesting) into the thread like to_thread
+            result = await asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, call)
+        if execution is not None:
+            execution.mark_fn_end()
+
+        result = self.validate_result_data(result)
+        if cache_key is not None:
+            self.__result_cache.put(cache_key, result)
+        return result
+
+    def __cache_key(self, fn_args: dict[str, Any]) -> Optional[str]:
+        # read straight from the private dict: pydantic's private attribute lookup is costly on this hot path
+        cache = self.__pydantic_private__.get('_Typed__result_cache')
+        if cache is None:
+            return None
+        return cache.key(self, fn_args)
+
+    def execute_many(self, kwargs_iterable: Iterable[dict], batch_size: Optional[int] = None) -> list[Any]:
+        """
+        Execute once per kwargs dict of the iterable, validating the inputs (and model results) of a whole batch
+        in one pydantic pass instead of paying the per-call cost of execute(). While execution hooks are installed,
+        a result cache is set or a checkpoint store records this task, every item goes through execute() instead,
+        so that metrics, profiling, caching and resume see each call.
+
+        Parameters:
+        - kwargs_iterable: One kwargs dict per invocation, as would be given to execute().
+        - batch_size: Number of invocations validated and handed to fn_batch together, everything when None.
+
+        Returns:
+        - The results, in the order of the inputs.
+        """
+        if self.__observed():
+            return [self.execute(**kwargs) for kwargs in kwargs_iterable]
+
+        plan = self.__class__.__binding_plan
+        results = []
+        for kwargs_list in _batches(kwargs_iterable, batch_size):
+            with _gc_paused():
+                batch = plan.bind_many(kwargs_list)
+            fn_results = self.fn_batch(batch)
+            with _gc_paused():
+                results.extend(self.validate_result_batch(fn_results))
+        return results
+
+    def __observed(self) -> bool:
+        return (bool(hooks.hooks) or self.__pydantic_private__.get('_Typed__result_cache') is not None
+                or (self.checkpointed and checkpoint.active_store is not None))
+
+    def fn_batch(self, batch: list[dict[str, Any]]) -> list[Any]:
+        """
+        Execute fn for every item of a validated batch. Override when a whole batch can be processed more cheaply
+        than one item at a time.
+
+        Parameters:
+        - batch: The validated keyword arguments of fn, one dict per invocation.
+
+        Returns:
+        - One result per item of the batch, in the same order.
+        """
+        results = [self.fn(**fn_args) for fn_args in batch]
+        if self.is_async():
+            results = _run_coroutine(_gather(results))
+        return results
 
     @abstractmethod
     def fn(self, *args, **kwargs) -> Any:
@@ -148,6 +269,26 @@ class Typed(ABC, BaseModel):
             result = data
         return result
 
+    def validate_result_batch(self, results: list) -> list:
+        output_type = self.__class__.__output_type
+
+        if output_type is None:
+            return [None] * len(results)
+        if not (inspect.isclass(output_type) and issubclass(output_type, BaseModel)):
+            return [self.validate_result_data(result) for result in results]
+
+        # validate everything that is not a model instance yet in a single pass
+        pending = [index for index, result in enumerate(results) if not isinstance(result, output_type)]
+        if pending:
+            cls = self.__class__
+            if cls.__result_list_adapter is None:
+                cls.__result_list_adapter = TypeAdapter(list[output_type])
+            validated = cls.__result_list_adapter.validate_python([results[index] for index in pending])
+            results = list(results)
+            for index, result in zip(pending, validated):
+                results[index] = result
+        return results
+
     @classmethod
     def get_pydantic_model_schema(cls, model: Type[BaseModel]):
         schema = {}
@@ -256,5 +397,50 @@ class Typed(ABC, BaseModel):
                 print(error, file=sys.stderr)
             raise ValidationError("ERROR in function implementation")
         else:
+            import yaml
             cls.__schema = schema
             cls.__compact_schema = yaml.dump(Typed.get_schema_compact(schema))
+
+
+def _run_coroutine(coroutine) -> Any:
+    import asyncio
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # no event loop in this thread, drive the coroutine on a fresh one
+        return asyncio.run(coroutine)
+
+    coroutine.close()
+    raise RuntimeError("async fn can not be executed synchronously inside a running event loop, use aexecute()")
+
+
+async def _gather(coroutines: list) -> list:
+    import asyncio
+    return list(await asyncio.gather(*coroutines))
+
+
+@contextmanager
+def _gc_paused():
+    # validating a batch allocates many objects at once, which would otherwise trigger repeated full collections
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _batches(iterable: Iterable, batch_size: Optional[int]) -> Iterable[list]:
+    if batch_size is None:
+        yield list(iterable)
+        return
+
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -1,13 +1,122 @@
 import re
+from collections import deque
 from datetime import datetime
+from functools import partial
 from re import Pattern
-from typing import AnyStr
+from typing import Any, AnyStr, Callable, Iterable, Iterator, List, Optional, Sequence
 
 
 def word_pattern(word: str) -> Pattern[AnyStr]:
     return re.compile(r'\b[\w-]*' + re.escape(word) + r'[\w-]*\b', re.IGNORECASE)
 
 
+def word_pattern_bytes(word: str) -> Pattern[bytes]:
+    """
+    word_pattern for bytes content, where \\w only matches ASCII word characters.
+    """
+    return re.compile(rb'\b[\w-]*' + re.escape(word.encode()) + rb'[\w-]*\b', re.IGNORECASE)
+
+
+def batches(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def map_batches(fn: Callable[[List[Any]], Any], iterable: Iterable[Any], batch_size: int, workers: int,
+                initializer: Optional[Callable] = None, initargs: Sequence = (),
+                ordered: bool = False) -> Iterator[Any]:
+    """
+    Yields fn(batch) for the batches of iterable, computed on a pool of workers processes (in this process when
+    workers is 1) as they complete, or in the order of the batches when ordered. initializer(*initargs) is called
+    once per worker process, e.g. to set up state too costly to send with every batch, see map_batches_with_state.
+    Only a few batches per worker are queued, iterable can be huge.
+    """
+    if workers <= 1:
+        for batch in batches(iterable, batch_size):
+            yield fn(batch)
+        return
+
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+        if ordered:
+            queued = deque()
+            for batch in batches(iterable, batch_size):
+                if len(queued) >= workers * 2:
+                    yield queued.popleft().result()
+                queued.append(executor.submit(fn, batch))
+            while queued:
+                yield queued.popleft().result()
+            return
+
+        pending = set()
+        for batch in batches(iterable, batch_size):
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(executor.submit(fn, batch))
+        for future in pending:
+            yield future.result()
+
+
+# state of a worker process of map_batches_with_state, the pool owning the process built it
+_process_state: Any = None
+
+
+def _init_process_state(initializer: Callable, initargs: Sequence):
+    global _process_state
+    _process_state = initializer(*initargs)
+
+
+def _call_with_process_state(fn: Callable[[Any, List[Any]], Any], batch: List[Any]) -> Any:
+    return fn(_process_state, batch)
+
+
+def map_batches_with_state(fn: Callable[[Any, List[Any]], Any], iterable: Iterable[Any], batch_size: int,
+                           workers: int, initializer: Callable[..., Any], initargs: Sequence = (),
+                           ordered: bool = False) -> Iterator[Any]:
+    """
+    map_batches yielding fn(state, batch), state being initializer(*initargs): built once per worker process, or
+    once for this call when workers is 1. Calls running at the same time in threads of one process each keep their
+    own state.
+    """
+    if workers <= 1:
+        return map_batches(partial(fn, initializer(*initargs)), iterable, batch_size, 1, ordered=ordered)
+    return map_batches(partial(_call_with_process_state, fn), iterable, batch_size, workers,
+                       initializer=_init_process_state, initargs=(initializer, initargs), ordered=ordered)
+
+
+def trie_regex(words: Iterable[str]) -> str:
+    """
+    Regex matching any of words, built from their prefix tree so that matching a position costs the length of the
+    word rather than the number of words. Longer words are preferred, as in an alternation sorted longest first.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _trie_node_regex(trie)
+
+
+def _trie_node_regex(node: dict) -> str:
+    branches = [re.escape(char) + _trie_node_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    is_word_end = '' in node
+    if len(branches) == 1 and not is_word_end:
+        return branches[0]
+    regex = '(?:' + '|'.join(branches) + ')'
+    return regex + '?' if is_word_end else regex
+
+
 def current_date():
     return datetime.now().strftime('%Y_%m_%d')
 
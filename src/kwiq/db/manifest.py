@@ -0,0 +1,144 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Set, Union
+
+from pydantic import BaseModel, PrivateAttr
+
+from kwiq.db.sqlite import DB
+
+# entries written per transaction
+RECORD_BATCH_SIZE = 10000
+# bytes hashed per read by hash_file
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ManifestEntry(NamedTuple):
+    key: str
+    size: int
+    mtime_ns: int
+    hash: str
+    result: Any
+
+
+def content_hash(content: Union[bytes, memoryview, Any]) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def hash_file(file: BinaryIO) -> str:
+    """
+    content_hash of the rest of an open binary file, read block by block.
+    """
+    file_hash = hashlib.blake2b(digest_size=16)
+    while block := file.read(HASH_BLOCK_SIZE):
+        file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+class FileManifest(BaseModel):
+    """
+    The files a task processed in earlier runs: their size, mtime and content hash, and the result the task
+    computed for each, stored in sqlite. key identifies the parameters the results depend on (e.g. the words
+    searched): results recorded with another key are stale.
+
+    A file whose size and mtime did not change is unchanged. One whose stat changed but whose content hash did not
+    (e.g. touched or checked out again) is unchanged too, without processing it again.
+
+    root is the directory the runs scan: only the files below it are loaded and forgotten when a run does not find
+    them anymore, so runs over other directories can share the database.
+    """
+    db_path: Path
+    task: str
+    key: str
+    root: Path
+
+    __db: Optional[DB] = None
+    __entries: Optional[Dict[str, ManifestEntry]] = None
+    __seen: Set[str] = PrivateAttr(default_factory=set)
+    __pending: List[tuple] = PrivateAttr(default_factory=list)
+
+    @property
+    def db(self) -> DB:
+        if self.__db is None:
+            self.__db = DB(db_path=self.db_path)
+            self.__db.command(sql='''
+            CREATE TABLE IF NOT EXISTS manifest (
+                task TEXT NOT NULL,
+                path TEXT NOT NULL,
+                key TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                result BLOB,
+                PRIMARY KEY (task, path)
+            )
+            ''')
+        return self.__db
+
+    @property
+    def entries(self) -> Dict[str, ManifestEntry]:
+        if self.__entries is None:
+            # the paths of the files found below root, as os.scandir joins them
+            prefix = os.path.join(os.fspath(self.root), '')
+            rows = self.db.select(sql='''
+                SELECT path, key, size, mtime_ns, hash, result FROM manifest
+                    WHERE task = ? AND substr(path, 1, ?) = ?
+                ''', parameters=(self.task, len(prefix), prefix))
+            self.__entries = {path: ManifestEntry(key, size, mtime_ns, file_hash,
+                                                  pickle.loads(result) if result is not None else None)
+                              for path, key, size, mtime_ns, file_hash, result in rows}
+        return self.__entries
+
+    def unchanged(self, dir_entry: os.DirEntry) -> Optional[ManifestEntry]:
+        """
+        The entry of a file found by the current run when its result is still valid by its stat, else None.
+        """
+        path = dir_entry.path
+        self.__seen.add(path)
+        entry = self.entries.get(path)
+        if entry is None or entry.key != self.key:
+            return None
+        stat = dir_entry.stat()
+        if entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+            return entry
+        return None
+
+    def known_hash(self, path: str) -> Optional[str]:
+        """
+        Content hash of a file whose recorded result is for the current key.
+        """
+        entry = self.entries.get(path)
+        return entry.hash if entry is not None and entry.key == self.key else None
+
+    def record(self, path: str, size: int, mtime_ns: int, file_hash: str, result: Any):
+        self.__seen.add(path)
+        self.__pending.append((self.task, path, self.key, size, mtime_ns, file_hash, pickle.dumps(result)))
+        if len(self.__pending) >= RECORD_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.__pending:
+            return
+        self.db.command_many(sql='''
+            INSERT INTO manifest (task, path, key, size, mtime_ns, hash, result)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(task, path) DO UPDATE SET
+                key = excluded.key, size = excluded.size, mtime_ns = excluded.mtime_ns, hash = excluded.hash,
+                result = excluded.result
+            ''', seq_of_parameters=self.__pending)
+        self.__pending = []
+
+    def finish(self):
+        """
+        Writes what is left to record and forgets the files below root the current run did not find anymore.
+        """
+        self.flush()
+        removed = [(self.task, path) for path in self.entries if path not in self.__seen]
+        if removed:
+            self.db.command_many(sql='DELETE FROM manifest WHERE task = ? AND path = ?', seq_of_parameters=removed)
+
+    def close(self):
+        if self.__db is not None:
+            self.__db.close()
+            self.__db = None
@@ -1,12 +1,13 @@
+import threading
 from sqlite3 import Connection, Cursor
 
-from typing import Optional, Any
+from typing import Iterable, Optional, Any
 
 from pathlib import Path
 
 import sqlite3
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 
 class DB(BaseModel):
@@ -15,11 +16,13 @@ class DB(BaseModel):
     db_path: Path
     __conn: Optional[Connection] = None
     __cursor: Optional[Cursor] = None
+    # the connection is shared by every thread using this DB (e.g. tasks run through aexecute), one at a time
+    __lock: threading.RLock = PrivateAttr(default_factory=threading.RLock)
 
     @property
     def conn(self):
         if self.__conn is None:
-            self.__conn = sqlite3.connect(self.db_path)
+            self.__conn = sqlite3.connect(self.db_path, check_same_thread=False)
 
         return self.__conn
 
@@ -31,19 +34,37 @@ class DB(BaseModel):
         return self.__cursor
 
     def command(self, sql: str, parameters: Optional[tuple] = None):
-        if parameters is None:
-            self.cursor.execute(sql)
-        else:
-            self.cursor.execute(sql, parameters)
-        self.conn.commit()
+        with self.__lock:
+            if parameters is None:
+                self.cursor.execute(sql)
+            else:
+                self.cursor.execute(sql, parameters)
+            self.conn.commit()
+
+    def command_many(self, sql: str, seq_of_parameters: Iterable[tuple]):
+        """
+        Executes sql for every parameters tuple in a single transaction.
+        """
+        with self.__lock:
+            self.cursor.executemany(sql, seq_of_parameters)
+            self.conn.commit()
 
     def select(self, sql: str, parameters: Optional[tuple] = None) -> Any:
-        if parameters is None:
-            self.cursor.execute(sql)
-        else:
-            self.cursor.execute(sql, parameters)
+        with self.__lock:
+            if parameters is None:
+                self.cursor.execute(sql)
+            else:
+                self.cursor.execute(sql, parameters)
 
-        return self.cursor.fetchall()
+            return self.cursor.fetchall()
+
+    async def acommand(self, sql: str, parameters: Optional[tuple] = None):
+        import asyncio
+        await asyncio.to_thread(self.command, sql, parameters)
+
+    async def aselect(self, sql: str, parameters: Optional[tuple] = None) -> Any:
+        import asyncio
+        return await asyncio.to_thread(self.select, sql, parameters)
 
     def close(self):
         self.conn.close()
@@ -1,31 +1,356 @@
 import csv
+import gc
+import io
+import locale
+import os
+from array import array
+from operator import itemgetter
 from pathlib import Path
-from typing import Type, Iterator, List, Optional
+from typing import Callable, Dict, Iterable, Type, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
 from pydantic import BaseModel
 
+from kwiq.core import utils
+
+# typecodes of the array columns() builds for the fields of these types
+ARRAY_TYPECODES = {int: 'q', float: 'd'}
+# bytes of the file parsed per task sent to a worker process
+CSV_RANGE_SIZE = 4 * 1024 * 1024
+# bytes read at a time looking for the record boundaries
+SCAN_BLOCK_SIZE = 1024 * 1024
+
+
+class RangeParser(NamedTuple):
+    file_path: Path
+    encoding: str
+    data_model: Type[BaseModel]
+    fieldnames: List[str]
+    build: Callable[[List[List[str]]], List[BaseModel]]
+    values: Optional[Callable[[BaseModel], tuple]]
+
+
+def validating_builder(data_model: Type[BaseModel],
+                       fieldnames: List[str]) -> Callable[[List[List[str]]], List[BaseModel]]:
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(List[data_model])
+    return lambda rows: adapter.validate_python([dict(zip(fieldnames, row)) for row in rows])
+
+
+def trusted_builder(data_model: Type[BaseModel],
+                    fieldnames: List[str]) -> Callable[[List[List[str]]], List[BaseModel]]:
+    """
+    Builds the models like model_construct. When the file has a column for every field and the model has neither
+    private attributes nor extra fields, what model_construct works out for every row (defaults, extra and
+    private attributes) is known once: model_construct alone costs more than validating the row.
+    """
+    fields = data_model.model_fields
+    converters = [(index, fields[name].annotation) for index, name in enumerate(fieldnames)
+                  if name in fields and fields[name].annotation in ARRAY_TYPECODES]
+
+    if not set(fields) <= set(fieldnames) or not is_plain_model(data_model):
+        construct = data_model.model_construct
+
+        def build(rows: List[List[str]]) -> List[BaseModel]:
+            models = []
+            for row in rows:
+                for index, convert in converters:
+                    row[index] = convert(row[index])
+                models.append(construct(**dict(zip(fieldnames, row))))
+            return models
+
+        return build
+
+    # the columns of the fields, like model_construct ignores the others
+    columns = [index for index, name in enumerate(fieldnames) if name in fields]
+    construct = model_constructor(data_model, [fieldnames[index] for index in columns], fields)
+    all_columns = len(columns) == len(fieldnames)
+
+    def build(rows: List[List[str]]) -> List[BaseModel]:
+        models = []
+        for row in rows:
+            for index, convert in converters:
+                row[index] = convert(row[index])
+            models.append(construct(row if all_columns else [row[index] for index in columns]))
+        return models
+
+    return build
+
+
+def is_plain_model(data_model: Type[BaseModel]) -> bool:
+    """
+    Whether the state of data_model instances is only the values of their fields.
+    """
+    return not data_model.__private_attributes__ and data_model.model_config.get('extra') != 'allow'
+
+
+def model_constructor(data_model: Type[BaseModel], names: List[str],
+                      fields_set: Iterable[str]) -> Callable[[Sequence], BaseModel]:
+    """
+    Builds a plain data_model from the values of the fields names, without validation.
+    """
+    fields_set = set(fields_set)
+    new = data_model.__new__
+    set_attribute = object.__setattr__
+
+    def construct(values: Sequence) -> BaseModel:
+        model = new(data_model)
+        set_attribute(model, '__dict__', dict(zip(names, values)))
+        set_attribute(model, '__pydantic_fields_set__', set(fields_set))
+        set_attribute(model, '__pydantic_extra__', None)
+        set_attribute(model, '__pydantic_private__', None)
+        return model
+
+    return construct
+
+
+def check_row_lengths(data_model: Type[BaseModel], fieldnames: List[str], rows: List[List[str]], first_row: int):
+    """
+    Raises a ValidationError for the first row of rows without one value per field name, first_row being the
+    number of the first one: columns of different lengths would not line up.
+    """
+    width = len(fieldnames)
+    if all(len(row) == width for row in rows):
+        return
+    from pydantic import ValidationError
+
+    number, row = next((first_row + index, row) for index, row in enumerate(rows) if len(row) != width)
+    if len(row) < width:
+        errors = [{'type': 'missing', 'loc': (number, name), 'input': row} for name in fieldnames[len(row):]]
+    else:
+        errors = [{'type': 'too_long', 'loc': (number,), 'input': row,
+                   'ctx': {'field_type': 'Row', 'max_length': width, 'actual_length': len(row)}}]
+    raise ValidationError.from_exception_data(data_model.__name__, errors)
+
+
+def build_batch(build: Callable[[List[List[str]]], List[BaseModel]], rows: List[List[str]]) -> List[BaseModel]:
+    # the models of a batch all survive: collections while building them would only traverse them again
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return build(rows)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def record_starts(file, start: int, range_size: int) -> Iterator[int]:
+    """
+    Yields offsets of a binary CSV file, about range_size bytes apart from start, where a record starts: after a
+    newline outside quotes. A newline is outside quotes when an even number of quote characters precedes it, escaped
+    quotes being doubled; start must not be inside quotes.
+    """
+    file.seek(start)
+    block_start = start
+    in_quotes = False
+    target = start + range_size
+    while block := file.read(SCAN_BLOCK_SIZE):
+        offset = 0
+        block_end = block_start + len(block)
+        while target < block_end:
+            search = max(target - block_start, offset)
+            in_quotes ^= block.count(b'"', offset, search) & 1
+            offset = search
+            newline = block.find(b'\n', offset)
+            if newline == -1:
+                break
+            in_quotes ^= block.count(b'"', offset, newline) & 1
+            offset = newline + 1
+            target = block_start + offset
+            if not in_quotes:
+                yield target
+                target += range_size
+        in_quotes ^= block.count(b'"', offset) & 1
+        block_start = block_end
+
+
+def record_ranges(file_path: Path, start: int, range_size: int) -> Iterator[Tuple[int, int]]:
+    """
+    Splits a CSV file from start in byte ranges of whole records.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as file:
+        for end in record_starts(file, start, range_size):
+            if end >= size:
+                break
+            yield start, end
+            start = end
+    if start < size:
+        yield start, size
+
+
+def range_parser(file_path: Path, encoding: str, data_model: Type[BaseModel], fieldnames: List[str],
+                 trusted: bool) -> RangeParser:
+    build = (trusted_builder if trusted else validating_builder)(data_model, fieldnames)
+    values = None
+    if is_plain_model(data_model):
+        get_values = itemgetter(*data_model.model_fields)
+        if len(data_model.model_fields) == 1:
+            values = lambda model: (get_values(model.__dict__),)
+        else:
+            values = lambda model: get_values(model.__dict__)
+    return RangeParser(file_path, encoding, data_model, fieldnames, build, values)
+
+
+def _parse_ranges(parser: RangeParser, ranges: List[Tuple[int, int]]) -> List[Union[BaseModel, tuple]]:
+    """
+    The models of the records of ranges, or the values of their fields for plain models: sending tuples of values
+    back costs a fraction of pickling models.
+    """
+    models = []
+    with open(parser.file_path, 'rb') as file:
+        for start, end in ranges:
+            file.seek(start)
+            # newline=None translates the line endings like open() does
+            text = io.StringIO(file.read(end - start).decode(parser.encoding), newline=None)
+            # empty rows are skipped like csv.DictReader does
+            rows = [row for row in csv.reader(text) if row]
+            check_row_lengths(parser.data_model, parser.fieldnames, rows, 0)
+            models.extend(build_batch(parser.build, rows))
+    if parser.values is not None:
+        return [parser.values(model) for model in models]
+    return models
+
 
 class CSVIterator:
+    """
+    Yields a data_model per row. With a batch_size, rows are validated batch_size at a time by a single TypeAdapter
+    call; trusted rows are built with model_construct, without validation, only converting int and float fields.
+
+    With more than one worker, the file is split in byte ranges of whole records parsed by a pool of workers
+    processes, delivered in the order of the file when ordered, else as soon as they are parsed. Records are found
+    by the parity of the quotes before them: the file must use the default '"' quote character.
+
+    In batches, rows without one value per field name raise a ValidationError locating the row from the first one of
+    the file, or of its byte range with more than one worker.
+    """
+
     def __init__(self, data_model: Type[BaseModel], file_path: Path, fieldnames: Optional[List[str]] = None,
-                 has_header: bool = True):
+                 has_header: bool = True, batch_size: Optional[int] = None, trusted: bool = False,
+                 workers: int = 1, ordered: bool = True):
         self.data_model = data_model
         self.file_path = file_path
         self.fieldnames = fieldnames
         self.has_header = has_header
+        self.batch_size = batch_size
+        self.trusted = trusted
+        self.workers = workers
+        self.ordered = ordered
 
     def __iter__(self) -> Iterator[BaseModel]:
+        if self.batch_size is None and not self.trusted and self.workers <= 1:
+            with open(self.file_path, mode='r') as infile:
+                reader = csv.DictReader(infile, fieldnames=self.read_fieldnames(infile))
+                for row in reader:
+                    yield self.data_model(**row)
+            return
+
+        for batch in self.iter_batches():
+            yield from batch
+
+    def read_fieldnames(self, infile) -> List[str]:
+        if self.has_header:
+            csv_fieldnames = next(csv.reader(infile))
+            if self.fieldnames and csv_fieldnames != self.fieldnames:
+                raise ValueError("Provided fieldnames do not match the CSV header")
+            self.fieldnames = self.fieldnames or csv_fieldnames
+        elif not self.fieldnames:
+            raise ValueError("fieldnames must be provided when has_header is False")
+        return self.fieldnames
+
+    def iter_rows(self) -> Iterator[List[List[str]]]:
+        """
+        Yields the rows of the file as lists of values, batch_size rows at a time.
+        """
+        batch_size = self.batch_size or 1000
         with open(self.file_path, mode='r') as infile:
-            if self.has_header:
-                csv_fieldnames = next(csv.reader(infile))
-                if self.fieldnames and csv_fieldnames != self.fieldnames:
-                    raise ValueError("Provided fieldnames do not match the CSV header")
-                self.fieldnames = self.fieldnames or csv_fieldnames
-            elif not self.fieldnames:
-                raise ValueError("fieldnames must be provided when has_header is False")
+            self.read_fieldnames(infile)
+            batch = []
+            for row in csv.reader(infile):
+                # skipped like csv.DictReader does
+                if not row:
+                    continue
+                batch.append(row)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def iter_batches(self) -> Iterator[List[BaseModel]]:
+        """
+        Yields lists of up to batch_size models, of the models of a byte range with more than one worker.
+        """
+        if self.workers > 1:
+            yield from self.iter_parallel_batches()
+            return
+
+        build = None
+        row_count = 0
+        for rows in self.iter_rows():
+            # once the header gave the fieldnames
+            if build is None:
+                build = (trusted_builder if self.trusted else validating_builder)(self.data_model, self.fieldnames)
+            check_row_lengths(self.data_model, self.fieldnames, rows, row_count)
+            row_count += len(rows)
+            yield build_batch(build, rows)
+
+    def iter_parallel_batches(self) -> Iterator[List[BaseModel]]:
+        encoding = locale.getpreferredencoding(False)
+        data_start = 0
+        if self.has_header:
+            with open(self.file_path, 'rb') as file:
+                data_start = next(record_starts(file, 0, 0), os.path.getsize(self.file_path))
+                file.seek(0)
+                header = io.StringIO(file.read(data_start).decode(encoding), newline=None)
+            self.read_fieldnames(header)
+        else:
+            self.read_fieldnames(None)
+
+        batches = utils.map_batches_with_state(_parse_ranges,
+                                               record_ranges(self.file_path, data_start, CSV_RANGE_SIZE), 1,
+                                               self.workers, initializer=range_parser,
+                                               initargs=(self.file_path, encoding, self.data_model,
+                                                         self.fieldnames, self.trusted),
+                                               ordered=self.ordered)
+        if not is_plain_model(self.data_model):
+            yield from batches
+            return
+
+        fields = self.data_model.model_fields
+        construct = model_constructor(self.data_model, list(fields),
+                                      [name for name in self.fieldnames if name in fields])
+        for values in batches:
+            yield build_batch(lambda rows: [construct(row) for row in rows], values)
+
+    def columns(self) -> Dict[str, Union[array, list]]:
+        """
+        The whole file column by column: int and float fields in arrays, the other fields of data_model in lists of
+        their validated values, the columns data_model does not declare in lists of strings. Rows without one value
+        per column raise a ValidationError.
+        """
+        from pydantic import TypeAdapter
 
-            reader = csv.DictReader(infile, fieldnames=self.fieldnames)
+        fields = self.data_model.model_fields
+        values: Optional[List[list]] = None
+        row_count = 0
+        for rows in self.iter_rows():
+            if values is None:
+                values = [[] for _ in self.fieldnames]
+            check_row_lengths(self.data_model, self.fieldnames, rows, row_count)
+            row_count += len(rows)
+            for column, column_values in zip(values, zip(*rows)):
+                column.extend(column_values)
 
-            for row in reader:
-                yield self.data_model(**row)
+        columns = {}
+        for name, column in zip(self.fieldnames, values or [[] for _ in self.fieldnames]):
+            field = fields.get(name)
+            if field is None or field.annotation is str:
+                columns[name] = column
+            elif field.annotation in ARRAY_TYPECODES:
+                columns[name] = array(ARRAY_TYPECODES[field.annotation], map(field.annotation, column))
+            else:
+                columns[name] = TypeAdapter(List[field.annotation]).validate_python(column)
+        return columns
 
 
 class CSVIteratorBuilder:
@@ -34,6 +359,10 @@ class CSVIteratorBuilder:
         self.file_path = None
         self.fieldnames = None
         self.has_header = True
+        self.batch_size = None
+        self.trusted = False
+        self.workers = 1
+        self.ordered = True
 
     def with_data_model(self, model: Type[BaseModel]) -> 'CSVIteratorBuilder':
         self.data_model = model
@@ -51,9 +380,27 @@ class CSVIteratorBuilder:
         self.has_header = has_header
         return self
 
+    def with_batch_size(self, batch_size: int) -> 'CSVIteratorBuilder':
+        self.batch_size = batch_size
+        return self
+
+    def with_trusted(self, trusted: bool = True) -> 'CSVIteratorBuilder':
+        self.trusted = trusted
+        return self
+
+    def with_workers(self, workers: int, ordered: bool = True) -> 'CSVIteratorBuilder':
+        self.workers = workers
+        self.ordered = ordered
+        return self
+
     def build(self) -> CSVIterator:
         if not self.data_model or not self.file_path:
             raise ValueError("Model and file_path must be provided")
         if not self.has_header and not self.fieldnames:
             raise ValueError("fieldnames must be provided when header is False")
-        return CSVIterator(self.data_model, self.file_path, self.fieldnames, self.has_header)
+        if self.batch_size is not None and self.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if self.workers < 1:
+            raise ValueError("workers must be at least 1")
+        return CSVIterator(self.data_model, self.file_path, self.fieldnames, self.has_header, self.batch_size,
+                           self.trusted, self.workers, self.ordered)
@@ -1,24 +1,105 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Callable, Optional, List
+from typing import Any, Callable, Iterator, Optional, List, Pattern
 import os
 import fnmatch
+import re
+
+
+def compile_filters(filters: List[str]) -> Optional[Pattern]:
+    """
+    Single regex matching a file name against any of the fnmatch patterns, None when every name matches.
+    """
+    if '*' in filters:
+        return None
+    return re.compile('|'.join(f"(?:{fnmatch.translate(pattern)})" for pattern in filters))
+
+
+def ignore_predicate(ignore: Any) -> Callable[[str, bool], bool]:
+    """
+    (path, is_dir) predicate of an ignore argument: a GitIgnoreMatcher, which like git also ignores .git
+    directories, or a callable taking a path and returning True when it is ignored.
+    """
+    from kwiq.task.gitignore_matcher import GitIgnoreMatcher
+    if isinstance(ignore, GitIgnoreMatcher):
+        is_ignored = ignore.tree.is_ignored
+        return lambda path, is_dir: (is_dir and os.path.basename(path) == '.git') or is_ignored(path, is_dir)
+    if not callable(ignore):
+        raise ValueError(f"ignore must be a GitIgnoreMatcher or a callable, got {type(ignore).__name__}")
+    return lambda path, is_dir: ignore(path)
 
 
 class FileIterator:
-    def __init__(self, directory: Path, fn: Callable[[str], None], filters: Optional[List[str]] = None):
+    """
+    Walks directory with os.scandir, reusing the file type information of the directory entries instead of
+    stat'ing every file. Like os.walk, symbolic links to directories are not followed, files are listed before
+    the sub directories of their directory and unreadable directories are skipped.
+
+    ignore is called with the path of every directory and matching file below directory and whether it is a
+    directory: ignored directories are pruned without being listed.
+    """
+
+    def __init__(self, directory: Path, fn: Optional[Callable[[str], None]] = None,
+                 filters: Optional[List[str]] = None, workers: int = 1,
+                 ignore: Optional[Callable[[str, bool], bool]] = None):
         self.directory = directory
         self.fn = fn
         self.filters = filters or ['*']  # Default to all files if no filter is provided
+        self.workers = workers
+        self.ignore = ignore
+        self.__filter_pattern = compile_filters(self.filters)
+
+    def iter_entries(self) -> Iterator[os.DirEntry]:
+        matches = self.__filter_pattern.match if self.__filter_pattern is not None else None
+        ignore = self.ignore
+        stack = [os.fspath(self.directory)]
+        while stack:
+            dir_path = stack.pop()
+            sub_dirs = []
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if ignore is None or not ignore(entry.path, True):
+                                    sub_dirs.append(entry.path)
+                                continue
+                            if matches is not None and matches(entry.name) is None:
+                                continue
+                            # follows symbolic links, as os.path.isfile did
+                            if entry.is_file() and (ignore is None or not ignore(entry.path, False)):
+                                yield entry
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            stack.extend(reversed(sub_dirs))
+
+    def __iter__(self) -> Iterator[str]:
+        for entry in self.iter_entries():
+            yield entry.path
 
     def iterate_files(self) -> None:
-        for dir_path, dir_names, filenames in os.walk(self.directory):
-            for filename in filenames:
-                if not any(fnmatch.fnmatch(filename, pattern) for pattern in self.filters):
-                    continue  # Skip files that don't match the filter pattern
+        if self.fn is None:
+            raise ValueError("process_file function must be provided to iterate_files")
+
+        if self.workers <= 1:
+            for filepath in self:
+                self.fn(filepath)
+            return
 
-                filepath = os.path.join(dir_path, filename)
-                if os.path.isfile(filepath):
-                    self.fn(filepath)
+        # bound the queued files, a tree can hold millions of them
+        max_pending = self.workers * 4
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            for filepath in self:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(executor.submit(self.fn, filepath))
+            for future in pending:
+                future.result()
 
 
 class FileIteratorBuilder:
@@ -26,6 +107,8 @@ class FileIteratorBuilder:
         self.directory = None
         self.process_file = None
         self.filters = None
+        self.workers = 1
+        self.ignore = None
 
     def with_directory(self, directory: Path) -> 'FileIteratorBuilder':
         self.directory = directory
@@ -39,7 +122,20 @@ class FileIteratorBuilder:
         self.filters = filters
         return self
 
+    def with_workers(self, workers: int) -> 'FileIteratorBuilder':
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        return self
+
+    def with_ignore(self, ignore: Any) -> 'FileIteratorBuilder':
+        """
+        Skip the files and prune the directories matched by a GitIgnoreMatcher or an ignore predicate.
+        """
+        self.ignore = ignore_predicate(ignore)
+        return self
+
     def build(self) -> FileIterator:
-        if not self.directory or not self.process_file:
-            raise ValueError("Directory and process_file function must be provided")
-        return FileIterator(self.directory, self.process_file, self.filters)
+        if not self.directory:
+            raise ValueError("Directory must be provided")
+        return FileIterator(self.directory, self.process_file, self.filters, self.workers, self.ignore)
@@ -5,24 +5,48 @@ import argparse
 from pathlib import Path
 
 from pydantic import BaseModel
-from typing import Type, Optional, Iterator
-
-import jmespath
+from typing import Any, Type, Optional, Iterator
 
 from kwiq.iterator.commons import IteratorResult
+from kwiq.iterator.json_lines import iter_json_lines
+from kwiq.iterator.json_stream import DEFAULT_CHUNK_SIZE, JsonStream, stream_path_keys
 
 
 class JsonIterator(BaseModel):
     file_path: Path
     json_path: str = '*'
     data_model: Optional[Type[BaseModel]] = None
+    # parse the file incrementally, json_path being a dotted key path, instead of loading it whole
+    stream: bool = False
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+    # JSON Lines file: one record per line, json_path applied to each ('*' keeps the record), parsed by workers
+    # processes
+    json_lines: bool = False
+    workers: int = 1
+
+    __expression: Optional[Any] = None
+
+    @property
+    def expression(self) -> Any:
+        if self.__expression is None:
+            import jmespath
+            self.__expression = jmespath.compile(self.json_path)
+        return self.__expression
 
     def __iter__(self) -> Iterator[IteratorResult]:
+        if self.json_lines:
+            yield from iter_json_lines(self.file_path, self.json_path, self.data_model, self.workers)
+            return
+        if self.stream:
+            yield from self.iter_stream()
+            return
+
         with open(self.file_path, mode='r') as infile:
             content = json.load(infile)
-            result = jmespath.search(self.json_path, content)
+            result = self.expression.search(content)
             if result is None:
                 yield None
+                return
 
             if isinstance(result, dict):
                 for key, value in result.items():
@@ -33,6 +57,36 @@ class JsonIterator(BaseModel):
             else:
                 yield self.cast_to_basemodel(result)
 
+    def iter_stream(self) -> Iterator[IteratorResult]:
+        """
+        Yields what the jmespath mode yields, as it is parsed: the elements of the array or the (key, value) of the
+        object at json_path, the values a trailing wildcard projects.
+        """
+        keys, wildcard = stream_path_keys(self.json_path)
+        with open(self.file_path, mode='r') as infile:
+            stream = JsonStream(infile, self.chunk_size)
+            if not stream.descend(keys):
+                yield None
+                return
+
+            container = stream.peek()
+            if wildcard is not None:
+                # like jmespath projections: nothing to project but another container, null values left out
+                if container != wildcard:
+                    yield None
+                    return
+                for value in stream.elements() if container == '[' else stream.values():
+                    if value is not None:
+                        yield self.cast_to_basemodel(value)
+            elif container == '{':
+                for key, value in stream.items():
+                    yield key, self.cast_to_basemodel(value)
+            elif container == '[':
+                for value in stream.elements():
+                    yield self.cast_to_basemodel(value)
+            else:
+                yield self.cast_to_basemodel(stream.value())
+
     def cast_to_basemodel(self, value):
         if self.data_model is None:
             return value
@@ -44,6 +98,9 @@ def test():
     parser = argparse.ArgumentParser(description="Test JSON Iterator")
     parser.add_argument("input_file", help="Path to the input file")
     parser.add_argument("json_path", help="Path to the output file")
+    parser.add_argument("--stream", action="store_true", help="Parse the file incrementally")
+    parser.add_argument("--json-lines", action="store_true", help="The file is JSON Lines")
+    parser.add_argument("--workers", type=int, default=1, help="Processes parsing a JSON Lines file")
 
     args = parser.parse_args()
 
@@ -51,7 +108,8 @@ def test():
     print("Json path:", args.json_path)
 
     # jmespath.exceptions.LexerError
-    result = JsonIterator(file_path=args.input_file, json_path=args.json_path)
+    result = JsonIterator(file_path=args.input_file, json_path=args.json_path, stream=args.stream,
+                          json_lines=args.json_lines, workers=args.workers)
     for index, value in enumerate(result):
         print(index, value)
 
@@ -0,0 +1,121 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from kwiq.core import utils
+
+# bytes of the file parsed per task sent to a worker process
+LINES_RANGE_SIZE = 4 * 1024 * 1024
+# json paths selecting the whole record of a line
+IDENTITY_PATHS = ('*', '@', '')
+
+_DOTTED_PATH = re.compile(r'[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*')
+_decoder = json.JSONDecoder()
+
+
+class LinesParser(NamedTuple):
+    file_path: Path
+    expression: Optional[Callable[[Any], Any]]
+    adapter: Any
+
+
+def compile_json_path(json_path: str) -> Optional[Callable[[Any], Any]]:
+    """
+    The function selecting the value of json_path in a record, None when it selects the whole record. Dotted key
+    paths are plain dict lookups, other expressions are parsed once by jmespath and evaluated by one interpreter.
+    """
+    if json_path.strip() in IDENTITY_PATHS:
+        return None
+    if _DOTTED_PATH.fullmatch(json_path):
+        keys = json_path.split('.')
+
+        def lookup(value):
+            for key in keys:
+                if not isinstance(value, dict):
+                    return None
+                value = value.get(key)
+            return value
+
+        return lookup
+
+    import jmespath
+    from jmespath.visitor import Options, TreeInterpreter
+    parsed = jmespath.compile(json_path).parsed
+    interpreter = TreeInterpreter(Options())
+    return lambda value: interpreter.visit(parsed, value)
+
+
+def byte_ranges(file_path: Path, range_size: int) -> Iterator[Tuple[int, int]]:
+    size = os.path.getsize(file_path)
+    for start in range(0, size, range_size):
+        yield start, min(start + range_size, size)
+
+
+def read_range(file, start: int, end: int) -> bytes:
+    """
+    The lines starting in [start, end) of a binary file: the line going on at start belongs to the range before.
+    """
+    if start > 0:
+        file.seek(start - 1)
+        file.readline()
+    else:
+        file.seek(0)
+    position = file.tell()
+    if position >= end:
+        return b''
+    data = file.read(end - position)
+    if data.endswith(b'\n'):
+        return data
+    # and the rest of the last line
+    return data + file.readline()
+
+
+def lines_parser(file_path: Path, json_path: str, data_model: Optional[Type[BaseModel]]) -> LinesParser:
+    adapter = None
+    if data_model is not None:
+        from pydantic import TypeAdapter
+        adapter = TypeAdapter(List[data_model])
+    return LinesParser(file_path, compile_json_path(json_path), adapter)
+
+
+def _parse_ranges(parser: LinesParser, ranges: List[Tuple[int, int]]) -> List[Any]:
+    """
+    The values selected by the expression in the lines of ranges: lists are flattened, lines without a value
+    skipped, and the values built into data models in one validation.
+    """
+    values = []
+    expression = parser.expression
+    decode = _decoder.decode
+    with open(parser.file_path, 'rb') as file:
+        for start, end in ranges:
+            for line in read_range(file, start, end).decode('utf-8').split('\n'):
+                if not line or line.isspace():
+                    continue
+                value = decode(line)
+                if expression is not None:
+                    value = expression(value)
+                if value is None:
+                    continue
+                if isinstance(value, list):
+                    values.extend(value)
+                else:
+                    values.append(value)
+    if parser.adapter is not None:
+        return parser.adapter.validate_python(values)
+    return values
+
+
+def iter_json_lines(file_path: Path, json_path: str = '*', data_model: Optional[Type[BaseModel]] = None,
+                    workers: int = 1, range_size: int = LINES_RANGE_SIZE) -> Iterator[Any]:
+    """
+    Yields the values json_path selects in every line of a JSON Lines file, in the order of the file. The file is
+    split in byte ranges parsed by a pool of workers processes.
+    """
+    for values in utils.map_batches_with_state(_parse_ranges, byte_ranges(file_path, range_size), 1, workers,
+                                               initializer=lines_parser, initargs=(file_path, json_path, data_model),
+                                               ordered=True):
+        yield from values
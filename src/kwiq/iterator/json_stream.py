@@ -0,0 +1,179 @@
+import json
+import re
+from typing import Any, Iterator, List, Optional, TextIO, Tuple
+
+# characters read from the file at a time
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRUCTURE = re.compile(r'["{}\[\]]')
+_STRING_END = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_KEY = re.compile(r'[A-Za-z_][A-Za-z0-9_-]*')
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+_decoder = json.JSONDecoder()
+
+
+def stream_path_keys(json_path: str) -> Tuple[List[str], Optional[str]]:
+    """
+    The object keys leading to the value a streamed JsonIterator iterates, from a dotted path like 'data.items', and
+    the container a trailing wildcard projects: '{' for '*' and '.*', '[' for '[*]', None without one. '' and '@'
+    select the whole document.
+    """
+    path = json_path.strip()
+    wildcard = None
+    for suffix, container in (('[*]', '['), ('.*', '{'), ('*', '{')):
+        if path.endswith(suffix):
+            path = path[:-len(suffix)]
+            wildcard = container
+            break
+    if path in ('', '@'):
+        return [], wildcard
+    keys = path.split('.')
+    if not all(_KEY.fullmatch(key) for key in keys):
+        raise ValueError(f"Streaming only supports dotted key paths like 'data.items', not '{json_path}'")
+    return keys, wildcard
+
+
+class JsonStream:
+    """
+    Incremental JSON tokenizer over a text file: only the chunk being parsed and the value being decoded are held in
+    memory. The values of the selected container are decoded one at a time with the json module, everything else
+    is skipped without being decoded.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self, size: Optional[int] = None) -> bool:
+        if self.eof:
+            return False
+        data = self.file.read(size or self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        # drop what was parsed already
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else 'end of file'
+            raise ValueError(f"Invalid JSON: expected one of {chars!r}, found {found}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """
+        Decodes the next value, reading more of the file until it is complete.
+        """
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # a number cut by the end of the buffer goes on in the next chunk
+                if self.eof or (end < len(self.buffer) and self.buffer[end] not in _NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # decoding starts over: reading more each time keeps large values linear
+            if not self.read_more(size):
+                continue
+            size *= 2
+
+    def skip(self):
+        """
+        Skips the next value without decoding it.
+        """
+        if self.peek() not in ('{', '['):
+            self.value()
+            return
+        depth = 0
+        while True:
+            match = _STRUCTURE.search(self.buffer, self.pos)
+            if match is None:
+                self.pos = len(self.buffer)
+                if not self.read_more():
+                    raise ValueError("Invalid JSON: unexpected end of file")
+                continue
+            char = match.group()
+            if char == '"':
+                self.pos = match.start()
+                self.string()
+                continue
+            self.pos = match.end()
+            depth += 1 if char in '{[' else -1
+            if depth == 0:
+                return
+
+    def string(self) -> str:
+        if self.peek() != '"':
+            raise ValueError(f"Invalid JSON: expected a string at {self.buffer[self.pos:self.pos + 20]!r}")
+        while _STRING_END.match(self.buffer, self.pos + 1) is None:
+            if not self.read_more():
+                raise ValueError("Invalid JSON: unterminated string")
+        return self.value()
+
+    def descend(self, keys: List[str]) -> bool:
+        """
+        Moves to the value at keys, False when it is not there.
+        """
+        for key in keys:
+            if self.peek() != '{':
+                return False
+            for name in self.members():
+                if name == key:
+                    break
+                self.skip()
+            else:
+                return False
+        return True
+
+    def members(self) -> Iterator[str]:
+        """
+        Yields the keys of the object starting at the current position, the caller consumes each value.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.string()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def elements(self) -> Iterator[Any]:
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+    def values(self) -> Iterator[Any]:
+        for _ in self.members():
+            yield self.value()
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for key in self.members():
+            yield key, self.value()
@@ -0,0 +1,118 @@
+import codecs
+import locale
+import os
+from pathlib import Path
+from typing import Callable, Iterator, List, Match, Optional, Pattern, Tuple, Union
+
+# like git, files with a NUL byte in their first 8000 bytes are binary
+BINARY_SNIFF_SIZE = 8000
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_OVERLAP = 64 * 1024
+
+
+def is_binary(block: bytes) -> bool:
+    return b'\0' in block[:BINARY_SNIFF_SIZE]
+
+
+class TextFileReader:
+    """
+    Reads a text file without holding more than a chunk of it in memory. The first block is sniffed for binary
+    content before anything else is read or decoded.
+
+    finditer() and subn() match a regex over the whole file in chunks of chunk_size bytes, each searched with the
+    last overlap characters of the previous one as context: matches must be shorter than overlap characters.
+    Content is decoded with encoding (the locale's by default, as open()), line endings are left as they are, and
+    decoding errors raise UnicodeDecodeError.
+    """
+
+    def __init__(self, path: Union[str, Path], encoding: Optional[str] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, overlap: int = DEFAULT_OVERLAP):
+        self.path = path
+        self.encoding = encoding or locale.getpreferredencoding(False)
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.__head: Optional[bytes] = None
+        self.__size: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        if self.__size is None:
+            self.__size = os.stat(self.path).st_size
+        return self.__size
+
+    def head(self) -> bytes:
+        if self.__head is None:
+            with open(self.path, 'rb') as file:
+                self.__head = file.read(BINARY_SNIFF_SIZE)
+        return self.__head
+
+    def is_binary(self) -> bool:
+        return is_binary(self.head())
+
+    def is_large(self) -> bool:
+        return self.size > self.chunk_size
+
+    def read_text(self) -> str:
+        with open(self.path, 'rb') as file:
+            return file.read().decode(self.encoding)
+
+    def chunks(self) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        with open(self.path, 'rb') as file:
+            while True:
+                data = file.read(self.chunk_size)
+                text = decoder.decode(data, final=not data)
+                if text:
+                    yield text
+                if not data:
+                    return
+
+    def finditer(self, pattern: Pattern) -> Iterator[Match]:
+        for _, _, matches, _ in self.__scan(pattern):
+            yield from matches
+
+    def subn(self, pattern: Pattern, repl: Callable[[Match], str], write: Callable[[str], None]) -> int:
+        """
+        Writes the content with the matches of pattern replaced by repl(match), returns the number of replacements.
+        """
+        count = 0
+        for buffer, position, matches, resume in self.__scan(pattern):
+            for match in matches:
+                write(buffer[position:match.start()])
+                write(repl(match))
+                position = match.end()
+                count += 1
+            write(buffer[position:resume])
+        return count
+
+    def __scan(self, pattern: Pattern) -> Iterator[Tuple[str, int, List[Match], int]]:
+        """
+        Yields for every chunk the buffer searched, the position the search started at, the matches starting
+        before the last overlap characters (or all of them for the last chunk) and the position the next search
+        resumes at. Everything before that position is done with.
+        """
+        overlap = self.overlap
+        buffer = ''
+        start = 0
+        chunks = self.chunks()
+        text = next(chunks, None)
+        while text is not None:
+            buffer += text
+            text = next(chunks, None)
+            cut = len(buffer) if text is None else len(buffer) - overlap
+            if cut <= start:
+                continue
+
+            matches = []
+            resume = cut
+            for match in pattern.finditer(buffer, start):
+                if match.start() >= cut:
+                    break
+                matches.append(match)
+                resume = max(resume, match.end())
+            yield buffer, start, matches, resume
+
+            # keep some context before the resume position, for look behinds and \b
+            keep = max(0, resume - overlap)
+            buffer = buffer[keep:]
+            start = resume - keep
@@ -1,11 +1,27 @@
+import difflib
+import os
 import re
+import shutil
+import sys
+import tempfile
+from collections import Counter
 from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Match, NamedTuple, Optional, Tuple
 
 from pydantic import BaseModel
 
-from kwiq.iterator.csv_iterator import CSVIteratorBuilder
+from kwiq.core import utils
+from kwiq.iterator.csv_iterator import CSV_RANGE_SIZE, CSVIteratorBuilder
 from kwiq.iterator.file_iterator import FileIteratorBuilder
+from kwiq.iterator.text_file import DEFAULT_OVERLAP, TextFileReader
 from kwiq.core.task import Task
+from kwiq.task.gitignore_matcher import GitIgnoreMatcher
+
+
+# files renamed per task sent to a worker process
+RENAME_BATCH_SIZE = 64
+# mappings validated at a time
+MAPPING_BATCH_SIZE = 10000
 
 
 class MappingData(BaseModel):
@@ -13,54 +29,286 @@ class MappingData(BaseModel):
     renamed_word: str
 
 
-def apply_renames(search_directory: Path, mapping_csv_path: Path):
-    # Read the mapping from CSV file
-    mappings = []
-    csv_iterator = (CSVIteratorBuilder()
-                    .with_data_model(MappingData)
-                    .with_file_path(mapping_csv_path)
-                    .build())
+class RenameEngine:
+    """
+    Replaces every whole word occurrence of the original words of mappings in a single pass: one regex built from
+    the prefix tree of all the original words, the renamed word looked up by the matched text. Every occurrence is
+    renamed once, renamed words are not renamed again by later mappings. When an original word is mapped more than
+    once, the first mapping applies.
+    """
 
-    for row in csv_iterator:
-        mappings.append(row)
+    def __init__(self, mappings: Iterable[MappingData]):
+        self.renames = {}
+        for mapping in mappings:
+            if mapping.original_word:
+                self.renames.setdefault(mapping.original_word, mapping.renamed_word)
+        self.pattern = re.compile(r'\b' + utils.trie_regex(self.renames) + r'\b') if self.renames else None
+        self.longest_word = max(map(len, self.renames), default=0)
+
+    def replacement(self, hits: Optional[Counter] = None) -> Callable[[Match], str]:
+        """
+        The replacement function of pattern, counting the hits per original word in hits when given.
+        """
+        renames = self.renames
+        if hits is None:
+            return lambda match: renames[match.group()]
+
+        def replacement(match):
+            word = match.group()
+            hits[word] += 1
+            return renames[word]
+
+        return replacement
+
+    def apply(self, content: str, hits: Optional[Counter] = None) -> Tuple[str, int]:
+        """
+        Returns the renamed content and the number of renames, counted per original word in hits when given.
+        """
+        if self.pattern is None:
+            return content, 0
+        return self.pattern.subn(self.replacement(hits), content)
+
+
+def read_mappings(mapping_csv_path: Path, workers: int = 1) -> list[MappingData]:
+    """
+    The mappings in the order of the file, parsed by workers processes when it is large enough to be split.
+    """
+    builder = (CSVIteratorBuilder()
+               .with_data_model(MappingData)
+               .with_file_path(mapping_csv_path)
+               .with_batch_size(MAPPING_BATCH_SIZE))
+    if workers > 1 and os.path.getsize(mapping_csv_path) > CSV_RANGE_SIZE:
+        builder.with_workers(workers, ordered=True)
+    return list(builder.build())
+
+
+class RenameResult(BaseModel):
+    files_changed: int = 0
+    # original word -> number of occurrences renamed
+    hits: Dict[str, int] = {}
+
+
+def rename_file(engine: RenameEngine, filepath: str, search_directory: Path,
+                dry_run: bool) -> Optional[Tuple[str, Counter, Optional[str]]]:
+    """
+    Renames the words of a file, returns its path, the hits per original word and in dry run mode its unified diff,
+    or None when nothing was renamed. Files are replaced atomically: a failure leaves either the original or the
+    renamed content. Binary files are skipped, large ones are renamed in chunks.
+    """
+    if engine.pattern is None:
+        return None
+    reader = TextFileReader(filepath, overlap=max(DEFAULT_OVERLAP, 2 * engine.longest_word))
+    if reader.is_binary():
+        # skip
+        return None
+    try:
+        if reader.is_large():
+            return rename_large_file(engine, reader, search_directory, dry_run)
+        # decoding bytes keeps the line endings of the file as they are, like newline=''
+        content = reader.read_text()
+    except UnicodeDecodeError:
+        # skip
+        return None
+
+    return rename_content(engine, filepath, content, search_directory, dry_run)
+
+
+def rename_large_file(engine: RenameEngine, reader: TextFileReader, search_directory: Path,
+                      dry_run: bool) -> Optional[Tuple[str, Counter, Optional[str]]]:
+    """
+    rename_file for files larger than a chunk, streamed into the temporary file replacing them. In dry run mode
+    only the hits are counted: the diff of such a file is left out.
+    """
+    filepath = os.fspath(reader.path)
+    hits = Counter()
+    if dry_run:
+        count = reader.subn(engine.pattern, engine.replacement(hits), lambda text: None)
+        if count == 0:
+            return None
+        relative_path = os.path.relpath(filepath, search_directory)
+        return filepath, hits, f"Files a/{relative_path} and b/{relative_path} differ ({count} renames, diff omitted)\n"
+
+    # a symbolic link stays a link, the file it points to is renamed
+    target_path = os.path.realpath(filepath)
+    fd, temp_path = temp_file(target_path)
+    try:
+        with os.fdopen(fd, 'w', encoding=reader.encoding, newline='') as file:
+            count = reader.subn(engine.pattern, engine.replacement(hits), file.write)
+        if count == 0:
+            os.unlink(temp_path)
+            return None
+        shutil.copymode(target_path, temp_path)
+        os.replace(temp_path, target_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return filepath, hits, None
+
+
+def rename_content(engine: RenameEngine, filepath: str, content: str, search_directory: Path,
+                   dry_run: bool) -> Optional[Tuple[str, Counter, Optional[str]]]:
+    hits = Counter()
+    renamed, count = engine.apply(content, hits)
+    if count == 0:
+        return None
+
+    if dry_run:
+        relative_path = os.path.relpath(filepath, search_directory)
+        diff_lines = difflib.unified_diff(content.splitlines(keepends=True), renamed.splitlines(keepends=True),
+                                          fromfile=f"a/{relative_path}", tofile=f"b/{relative_path}")
+        diff = ''.join(line if line.endswith('\n') else f"{line}\n\\ No newline at end of file\n"
+                       for line in diff_lines)
+        return filepath, hits, diff
+
+    write_atomically(filepath, renamed)
+    return filepath, hits, None
 
-    def apply_mapping(filepath: str):
-        try:
-            changed = False
-            with open(filepath, 'r') as file:
-                content = file.read()
 
-            for mapping in mappings:
-                pattern = re.compile(r'\b' + re.escape(mapping.original_word) + r'\b')
+def rename_tracked_file(engine: RenameEngine, filepath: str, known_hash: Optional[str], search_directory: Path,
+                        dry_run: bool) -> Tuple[Optional[Tuple[str, Counter, Optional[str]]], tuple]:
+    """
+    rename_file for a file tracked by a FileManifest: also returns its (size, mtime_ns, hash) once renamed. Files
+    whose content hash is known_hash were already renamed by an earlier run and are left alone.
+    """
+    from kwiq.db.manifest import hash_file
 
-                def replacement(match, renamed_word=mapping.renamed_word):
-                    nonlocal changed
-                    changed = True
-                    return renamed_word
+    def file_state() -> tuple:
+        with open(filepath, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            return stat.st_size, stat.st_mtime_ns, hash_file(file)
 
-                content = pattern.sub(replacement, content)
+    state = file_state()
+    if state[2] == known_hash:
+        return None, state
 
-            if changed:
-                with open(filepath, 'w') as file:
-                    print(f"Writing file: {filepath}")
-                    file.write(content)
-        except UnicodeDecodeError:
-            # skip
-            return
+    renamed_file = rename_file(engine, filepath, search_directory, dry_run)
+    if renamed_file is not None and not dry_run:
+        state = file_state()
+    return renamed_file, state
+
+
+def temp_file(filepath: str) -> Tuple[int, str]:
+    """
+    A new temporary file next to filepath, on the same file system so that it can replace it atomically.
+    """
+    directory, name = os.path.split(filepath)
+    return tempfile.mkstemp(dir=directory or '.', prefix=f".{name}.", suffix='.tmp')
+
+
+def write_atomically(filepath: str, content: str):
+    """
+    Replaces the content of filepath, or of the file it links to when it is a symbolic link.
+    """
+    filepath = os.path.realpath(filepath)
+    fd, temp_path = temp_file(filepath)
+    try:
+        with os.fdopen(fd, 'w', newline='') as file:
+            file.write(content)
+        shutil.copymode(filepath, temp_path)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class RenameOptions(NamedTuple):
+    engine: RenameEngine
+    search_directory: Path
+    dry_run: bool
+
+
+def _rename_files(options: RenameOptions, filepaths: List[str]) -> list:
+    results = (rename_file(options.engine, filepath, options.search_directory, options.dry_run)
+               for filepath in filepaths)
+    return [result for result in results if result is not None]
+
+
+def _rename_tracked_files(options: RenameOptions, files: List[Tuple[str, Optional[str]]]) -> list:
+    return [(filepath, rename_tracked_file(options.engine, filepath, known_hash, options.search_directory,
+                                           options.dry_run))
+            for filepath, known_hash in files]
+
+
+def _mappings_key(engine: RenameEngine) -> str:
+    from kwiq.db.manifest import content_hash
+    return content_hash(repr(sorted(engine.renames.items())).encode())
+
+
+def apply_renames(search_directory: Path, mapping_csv_path: Path, respect_gitignore: bool = False,
+                  dry_run: bool = False, workers: int = 1,
+                  manifest_path: Optional[Path] = None) -> RenameResult:
+    """
+    Renames the words of mapping_csv_path in the files of search_directory, in this process or on a pool of workers
+    processes. In dry run mode nothing is written: the unified diff of every file that would change is printed
+    instead.
+
+    With manifest_path, files left unchanged since an earlier (not dry) run with the same mappings are skipped.
+    """
+    engine = RenameEngine(read_mappings(mapping_csv_path, workers))
+    result = RenameResult(hits={word: 0 for word in engine.renames})
+
+    builder = FileIteratorBuilder().with_directory(search_directory)
+    if respect_gitignore:
+        builder.with_ignore(GitIgnoreMatcher(base_dir=search_directory))
+    initargs = (engine, search_directory, dry_run)
+
+    def collect(renamed_file: Tuple[str, Counter, Optional[str]]):
+        filepath, hits, diff = renamed_file
+        result.files_changed += 1
+        for word, count in hits.items():
+            result.hits[word] += count
+        if dry_run:
+            sys.stdout.write(diff)
+        else:
+            print(f"Writing file: {filepath}")
+
+    if manifest_path is None:
+        for renamed_files in utils.map_batches_with_state(_rename_files, builder.build(), RENAME_BATCH_SIZE, workers,
+                                                          initializer=RenameOptions, initargs=initargs):
+            for renamed_file in renamed_files:
+                collect(renamed_file)
+    else:
+        from kwiq.db.manifest import FileManifest
+        manifest = FileManifest(db_path=manifest_path, task='apply-renames', key=_mappings_key(engine),
+                                root=search_directory)
+        changed_files = ((dir_entry.path, manifest.known_hash(dir_entry.path))
+                         for dir_entry in builder.build().iter_entries() if manifest.unchanged(dir_entry) is None)
+        try:
+            for tracked_files in utils.map_batches_with_state(_rename_tracked_files, changed_files,
+                                                              RENAME_BATCH_SIZE, workers,
+                                                              initializer=RenameOptions, initargs=initargs):
+                for filepath, (renamed_file, (size, mtime_ns, file_hash)) in tracked_files:
+                    if renamed_file is not None:
+                        collect(renamed_file)
+                    if not dry_run:
+                        manifest.record(filepath, size, mtime_ns, file_hash,
+                                        dict(renamed_file[1]) if renamed_file is not None else {})
+            if not dry_run:
+                manifest.finish()
+        finally:
+            manifest.close()
 
-    (FileIteratorBuilder()
-     .with_directory(search_directory)
-     .with_fn(apply_mapping)
-     .build()).iterate_files()
+    if dry_run:
+        for word, renamed_word in engine.renames.items():
+            print(f"{word} -> {renamed_word}: {result.hits[word]} hits")
+        print(f"{result.files_changed} files would change")
+    return result
 
 
 class InputModel(BaseModel):
     mapping_csv_path: Path
     search_directory: Path
+    respect_gitignore: bool = False
+    dry_run: bool = False
+    workers: int = 1
+    # when set, only the files changed since the last run with this manifest are renamed
+    manifest_path: Optional[Path] = None
 
 
 class ApplyRenames(Task):
     name: str = "apply-renames"
 
-    def fn(self, data: InputModel) -> None:
-        apply_renames(data.search_directory, data.mapping_csv_path)
+    def fn(self, data: InputModel) -> RenameResult:
+        return apply_renames(data.search_directory, data.mapping_csv_path, data.respect_gitignore, data.dry_run,
+                             data.workers, data.manifest_path)
@@ -1,25 +1,153 @@
 import os
 import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Callable, List, Optional, Set
 
 from pydantic import BaseModel
 
 from kwiq.core.task import Task
 
+TRASH_SUFFIX = '.kwiq-trash-'
+
+# background deletions started by deferred cleans, not daemon threads: the interpreter waits for them at exit
+_deletions: List[threading.Thread] = []
+# trash directories being filled or deleted by this process, which sweeps of stale trash leave alone
+_trash_in_progress: Set[str] = set()
+_deletions_lock = threading.Lock()
+
 
 class InputModel(BaseModel):
     directory: Path
     filter: Optional[Callable[[str], bool]]
+    # threads deleting sub trees in parallel, 1 deletes them one after the other
+    workers: int = 1
+    # move the entries to a trash directory next to directory and delete it in the background
+    deferred: bool = False
+
+
+def doomed_entries(directory: Path, filter: Optional[Callable[[str], bool]] = None) -> List[str]:
+    """
+    The entries of directory CleanDirectory removes: the directories filter does not keep, and the files.
+    """
+    doomed = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                if filter is None or not filter(entry.name):
+                    doomed.append(entry.path)
+            elif entry.is_file():
+                doomed.append(entry.path)
+    return doomed
+
+
+def _ignore_missing(function, path, exc_info):
+    # removed by another deletion in the meantime
+    if not issubclass(exc_info[0], FileNotFoundError):
+        raise exc_info[1]
+
+
+def remove_entry(path: str, missing_ok: bool = False):
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, onerror=_ignore_missing if missing_ok else None)
+        else:
+            os.remove(path)
+    except FileNotFoundError:
+        if not missing_ok:
+            raise
+
+
+def remove_entries_parallel(paths: List[str], workers: int, missing_ok: bool = False):
+    """
+    Removes paths, spreading the sub trees of the doomed directories over a pool of workers threads. With
+    missing_ok, entries something else removed first are skipped.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        directories = []
+        futures = []
+        for path in paths:
+            if os.path.isdir(path) and not os.path.islink(path):
+                directories.append(path)
+                try:
+                    with os.scandir(path) as entries:
+                        futures.extend(executor.submit(remove_entry, entry.path, missing_ok) for entry in entries)
+                except FileNotFoundError:
+                    if not missing_ok:
+                        raise
+            else:
+                futures.append(executor.submit(remove_entry, path, missing_ok))
+        for future in futures:
+            future.result()
+    for directory in directories:
+        remove_entry(directory, missing_ok)
+
+
+def defer_removal(directory: Path, paths: List[str], workers: int = 1) -> Path:
+    """
+    Moves paths out of directory, into a new trash directory next to it (on the same file system, so that every move
+    is an atomic rename), and deletes the trash in the background. Trash left by an interrupted earlier run is
+    deleted as well, unless a deletion of this process is still at it.
+    """
+    directory = Path(directory).resolve()
+    trash_prefix = f".{directory.name}{TRASH_SUFFIX}"
+    trash = directory.parent / f"{trash_prefix}{uuid.uuid4().hex}"
+    # claimed before it exists: a sweep finding it knows it is not stale
+    with _deletions_lock:
+        _trash_in_progress.add(str(trash))
+    try:
+        os.mkdir(trash)
+        for path in paths:
+            os.rename(path, trash / os.path.basename(path))
+    except BaseException:
+        with _deletions_lock:
+            _trash_in_progress.discard(str(trash))
+        raise
+
+    found_trash = [entry.path for entry in os.scandir(directory.parent)
+                   if entry.name.startswith(trash_prefix) and entry.is_dir(follow_symlinks=False)]
+    with _deletions_lock:
+        stale_trash = [path for path in found_trash if path not in _trash_in_progress]
+        _trash_in_progress.update(stale_trash)
+    doomed_trash = [str(trash)] + stale_trash
+
+    def delete_trash():
+        try:
+            for trash_dir in doomed_trash:
+                if workers > 1:
+                    remove_entries_parallel([trash_dir], workers, missing_ok=True)
+                else:
+                    shutil.rmtree(trash_dir, ignore_errors=True)
+        finally:
+            with _deletions_lock:
+                _trash_in_progress.difference_update(doomed_trash)
+
+    thread = threading.Thread(target=delete_trash, name=f"kwiq-clean-{directory.name}")
+    with _deletions_lock:
+        _deletions[:] = [deletion for deletion in _deletions if deletion.is_alive()]
+        _deletions.append(thread)
+    thread.start()
+    return trash
+
+
+def wait_for_deferred_deletions():
+    with _deletions_lock:
+        deletions = list(_deletions)
+    for deletion in deletions:
+        deletion.join()
 
 
 class CleanDirectory(Task):
     name: str = "clean_directory"
 
     def fn(self, data: InputModel) -> None:
-        for item in os.listdir(data.directory):
-            path = os.path.join(data.directory, item)
-            if os.path.isdir(path) and (data.filter is None or not data.filter(item)):
-                shutil.rmtree(path)
-            elif os.path.isfile(path):
-                os.remove(path)
+        paths = doomed_entries(data.directory, data.filter)
+        if data.deferred:
+            defer_removal(data.directory, paths, data.workers)
+        elif data.workers > 1:
+            remove_entries_parallel(paths, data.workers)
+        else:
+            for path in paths:
+                remove_entry(path)
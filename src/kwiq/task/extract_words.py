@@ -1,41 +1,211 @@
+import mmap
+import os
+from collections import Counter
 from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Pattern, Tuple
 
 from pydantic import BaseModel
 
 from kwiq.core import utils
 from kwiq.iterator.file_iterator import FileIteratorBuilder
+from kwiq.iterator.text_file import BINARY_SNIFF_SIZE, TextFileReader
 from kwiq.core.task import Task
+from kwiq.task.gitignore_matcher import GitIgnoreMatcher
 
+# files searched per task sent to a worker process
+EXTRACT_BATCH_SIZE = 64
 
-def extract_words(words_regex: str, search_directory: Path) -> set[str]:
+
+class WordSearch(NamedTuple):
+    pattern: Pattern
+    mmap_files: bool
+
+
+def word_search(words_regex: str, mmap_files: bool) -> WordSearch:
+    pattern = utils.word_pattern_bytes(words_regex) if mmap_files else utils.word_pattern(words_regex)
+    return WordSearch(pattern, mmap_files)
+
+
+def _find_matches(search: WordSearch, filepath: str) -> Optional[List[str]]:
+    if not search.mmap_files:
+        reader = TextFileReader(filepath)
+        if reader.is_binary():
+            # skip
+            return None
+        try:
+            return [match.group() for match in reader.finditer(search.pattern)]
+        except UnicodeDecodeError:
+            # skip
+            return None
+
+    with open(filepath, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+            return _find_matches_in_bytes(search, content)
+
+
+def _find_matches_in_bytes(search: WordSearch, content) -> Optional[List[str]]:
+    if content.find(b'\0', 0, BINARY_SNIFF_SIZE) != -1:
+        # skip
+        return None
+    return [match.decode('utf-8', 'replace') for match in search.pattern.findall(content)]
+
+
+def _count_file_words(search: WordSearch, files: List[Tuple[str, Optional[str]]]) -> List[tuple]:
+    """
+    For the (path, hash recorded by the manifest) of files, returns their (path, size, mtime_ns, hash, word counts)
+    with None word counts when the content hash did not change.
+    """
+    from kwiq.db.manifest import hash_file
+
+    results = []
+    for filepath, known_hash in files:
+        with open(filepath, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            file_hash = hash_file(file)
+        counts = None if file_hash == known_hash else dict(Counter(_find_matches(search, filepath) or ()))
+        results.append((filepath, stat.st_size, stat.st_mtime_ns, file_hash, counts))
+    return results
+
+
+def _find_words(search: WordSearch, filepaths: List[str]) -> set[str]:
+    words = set()
+    for filepath in filepaths:
+        matches = _find_matches(search, filepath)
+        if matches:
+            words.update(matches)
+    return words
+
+
+def _count_words(search: WordSearch, filepaths: List[str]) -> Tuple[Counter, Dict[str, List[str]]]:
+    counts = Counter()
+    files = {}
+    for filepath in filepaths:
+        matches = _find_matches(search, filepath)
+        if matches:
+            counts.update(matches)
+            for word in set(matches):
+                files.setdefault(word, []).append(filepath)
+    return counts, files
+
+
+def _file_paths(search_directory: Path, respect_gitignore: bool):
+    builder = FileIteratorBuilder().with_directory(search_directory)
+    if respect_gitignore:
+        builder.with_ignore(GitIgnoreMatcher(base_dir=search_directory))
+    return builder.build()
+
+
+def _file_word_counts(words_regex: str, search_directory: Path, respect_gitignore: bool, mmap_files: bool,
+                      workers: int, manifest_path: Path) -> Iterator[Tuple[str, Dict[str, int]]]:
+    """
+    The word counts of every file, only searching the files that changed since the run that recorded
+    manifest_path.
+    """
+    from kwiq.db.manifest import FileManifest
+
+    manifest = FileManifest(db_path=manifest_path, task='extract-words', root=search_directory,
+                            key=f"{words_regex}:{'bytes' if mmap_files else 'text'}")
+    unchanged = []
+
+    def changed_files():
+        for dir_entry in _file_paths(search_directory, respect_gitignore).iter_entries():
+            entry = manifest.unchanged(dir_entry)
+            if entry is not None:
+                unchanged.append((dir_entry.path, entry.result))
+            else:
+                yield dir_entry.path, manifest.known_hash(dir_entry.path)
+
+    try:
+        for results in utils.map_batches_with_state(_count_file_words, changed_files(), EXTRACT_BATCH_SIZE, workers,
+                                                    initializer=word_search, initargs=(words_regex, mmap_files)):
+            for filepath, size, mtime_ns, file_hash, counts in results:
+                if counts is None:
+                    counts = manifest.entries[filepath].result
+                manifest.record(filepath, size, mtime_ns, file_hash, counts)
+                yield filepath, counts
+        yield from unchanged
+        manifest.finish()
+    finally:
+        manifest.close()
+
+
+def extract_words(words_regex: str, search_directory: Path, respect_gitignore: bool = False,
+                  mmap_files: bool = False, workers: int = 1, manifest_path: Optional[Path] = None) -> set[str]:
+    """
+    The words containing words_regex in the files of search_directory, searched on a pool of workers processes
+    when workers > 1. With mmap_files, files are memory mapped and searched as bytes instead of being decoded: word
+    characters are then ASCII only, and binary files are recognized by a NUL byte rather than a decoding error.
+    With manifest_path, only the files changed since the last run with the same manifest are searched.
+    """
     words = set()
-    pattern = utils.word_pattern(words_regex)
-
-    def extract_pattern(filepath: str):
-        with open(filepath, 'r') as file:
-            try:
-                content = file.read()
-                matches = pattern.findall(content)
-                words.update(matches)
-            except UnicodeDecodeError:
-                # skip
-                return
-
-    (FileIteratorBuilder()
-     .with_directory(search_directory)
-     .with_fn(extract_pattern)
-     .build()).iterate_files()
+    if manifest_path is not None:
+        for _, counts in _file_word_counts(words_regex, search_directory, respect_gitignore, mmap_files, workers,
+                                           manifest_path):
+            words.update(counts)
+        return words
 
+    for batch_words in utils.map_batches_with_state(_find_words, _file_paths(search_directory, respect_gitignore),
+                                                    EXTRACT_BATCH_SIZE, workers,
+                                                    initializer=word_search, initargs=(words_regex, mmap_files)):
+        words.update(batch_words)
     return words
 
 
+class WordStats(BaseModel):
+    # word -> number of occurrences
+    counts: Dict[str, int] = {}
+    # word -> files it occurs in
+    files: Dict[str, List[str]] = {}
+
+
+def extract_word_stats(words_regex: str, search_directory: Path, respect_gitignore: bool = False,
+                       mmap_files: bool = False, workers: int = 1, manifest_path: Optional[Path] = None) -> WordStats:
+    """
+    extract_words, counting the occurrences of every word and listing the files it occurs in.
+    """
+    counts = Counter()
+    files = {}
+    if manifest_path is not None:
+        for filepath, file_counts in _file_word_counts(words_regex, search_directory, respect_gitignore,
+                                                       mmap_files, workers, manifest_path):
+            counts.update(file_counts)
+            for word in file_counts:
+                files.setdefault(word, []).append(filepath)
+        return WordStats(counts=dict(counts), files={word: sorted(word_files) for word, word_files in files.items()})
+
+    for batch_counts, batch_files in utils.map_batches_with_state(_count_words,
+                                                                  _file_paths(search_directory, respect_gitignore),
+                                                                  EXTRACT_BATCH_SIZE, workers, initializer=word_search,
+                                                                  initargs=(words_regex, mmap_files)):
+        counts.update(batch_counts)
+        for word, word_files in batch_files.items():
+            files.setdefault(word, []).extend(word_files)
+    return WordStats(counts=dict(counts), files={word: sorted(word_files) for word, word_files in files.items()})
+
+
 class InputModel(BaseModel):
     words_regex: str
     search_directory: Path
+    respect_gitignore: bool = False
+    mmap_files: bool = False
+    workers: int = 1
+    # when set, only the files changed since the last run with this manifest are searched
+    manifest_path: Optional[Path] = None
 
 
 class ExtractWords(Task):
     name: str = "extract-words"
 
     def fn(self, data: InputModel) -> set:
-        return extract_words(data.words_regex, data.search_directory)
+        return extract_words(data.words_regex, data.search_directory, data.respect_gitignore, data.mmap_files,
+                             data.workers, data.manifest_path)
+
+
+class ExtractWordStats(Task):
+    name: str = "extract-word-stats"
+
+    def fn(self, data: InputModel) -> WordStats:
+        return extract_word_stats(data.words_regex, data.search_directory, data.respect_gitignore,
+                                  data.mmap_files, data.workers, data.manifest_path)
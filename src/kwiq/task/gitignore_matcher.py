@@ -1,67 +1,274 @@
 import configparser
 
 import collections
+import itertools
 import os
 import re
 
 from os.path import abspath
 from pathlib import Path
-from typing import Reversible, Union, Optional, Callable
+from typing import Dict, List, Reversible, Tuple, Union, Optional, Callable
 
 from kwiq.core.task import Task
 
 
 class GitIgnoreMatcher(Task):
+    """
+    Matches paths against the ignore rules of the git working tree at base_dir, see IgnoreTree.
+    """
     name: str = "git-ignore-matcher"
     base_dir: Path
     include_gitmodules: bool = True
+    nested: bool = True
     __matcher: Optional[Callable[[Path], bool]] = None
+    __tree: Optional['IgnoreTree'] = None
 
     @property
-    def matcher(self):
+    def matcher(self) -> Callable[[Path], bool]:
         if self.__matcher is None:
-            gitignore_path = self.base_dir / '.gitignore'
-            self.__matcher = lambda p: False
-            if gitignore_path.exists():
-                self.__matcher = self.build_matcher()
-
+            self.__matcher = self.build_matcher()
         return self.__matcher
 
+    @property
+    def tree(self) -> 'IgnoreTree':
+        if self.__tree is None:
+            self.__tree = IgnoreTree(self.base_dir, self.include_gitmodules, self.nested)
+        return self.__tree
+
     def build_matcher(self) -> Callable[[Path], bool]:
-        gitignore_path = self.base_dir / '.gitignore'
+        return self.tree.is_ignored
+
+    def is_ignored(self, path: Union[str, Path], is_dir: Optional[bool] = None) -> bool:
+        return self.tree.is_ignored(path, is_dir)
+
+    def fn(self, file_path: Path) -> bool:
+        return self.matcher(file_path)
+
+
+class IgnoreTree:
+    """
+    The ignore rules of a git working tree, applied as git does: the .gitignore file of every directory (when
+    nested), .git/info/exclude and optionally the submodule paths of .gitmodules. A path is ignored when one of its
+    parent directories is ignored, or when the last rule matching it in the deepest ignore file with a matching
+    rule is not a negation.
+
+    Ignore files are read and compiled the first time a path below their directory is matched, the decisions for
+    directories are cached.
+    """
+
+    def __init__(self, base_dir: Path, include_gitmodules: bool = True, nested: bool = True):
+        self.base_dir = base_dir
+        self.include_gitmodules = include_gitmodules
+        self.nested = nested
+        self.__base_prefix = os.path.join(abspath(base_dir), '')
+        # relative directory -> its compiled ignore files (None without any)
+        self.__rules: Dict[str, Optional[CompiledIgnoreRules]] = {}
+        # relative directory -> (relative path prefix length, rules) of it and its parents, deepest first
+        self.__chains: Dict[str, List[Tuple[int, CompiledIgnoreRules]]] = {}
+        self.__ignored_dirs: Dict[str, bool] = {}
+
+    def is_ignored(self, path: Union[str, Path], is_dir: Optional[bool] = None) -> bool:
+        """
+        Whether path (absolute or relative to the current directory) is ignored. is_dir is looked up on disk when
+        not given.
+        """
+        path = os.fspath(path)
+        if is_dir is None:
+            is_dir = path.endswith(os.sep) or os.path.isdir(path)
+        rel_path = self.relative_path(path)
+        if not rel_path:
+            return False
+        return self.match_relative(rel_path, is_dir)
+
+    def relative_path(self, path: str) -> Optional[str]:
+        """
+        path relative to base_dir, None when it is not below it.
+        """
+        base_prefix = self.__base_prefix
+        if not path.startswith(base_prefix) or _needs_normalizing(path[len(base_prefix) - 1:]):
+            path = os.path.join(abspath(path), '')
+            if not path.startswith(base_prefix):
+                return None
+        return path[len(base_prefix):].rstrip(os.sep)
+
+    def match_relative(self, rel_path: str, is_dir: bool) -> bool:
+        """
+        Whether rel_path, relative to base_dir and using os.sep, is ignored.
+        """
+        parent = rel_path.rpartition(os.sep)[0]
+        if parent and self.__dir_ignored(parent):
+            return True
+        return self.__decide(parent, rel_path, is_dir)
+
+    def __dir_ignored(self, rel_dir: str) -> bool:
+        ignored = self.__ignored_dirs.get(rel_dir)
+        if ignored is None:
+            parent = rel_dir.rpartition(os.sep)[0]
+            ignored = (bool(parent) and self.__dir_ignored(parent)) or self.__decide(parent, rel_dir, True)
+            self.__ignored_dirs[rel_dir] = ignored
+        return ignored
+
+    def __decide(self, parent: str, rel_path: str, is_dir: bool) -> bool:
+        chain = self.__chains.get(parent)
+        if chain is None:
+            chain = self.__chain(parent)
+        for prefix_length, rules in chain:
+            decision = rules.decide(rel_path[prefix_length:], is_dir)
+            if decision is not None:
+                return decision
+        return False
+
+    def __chain(self, rel_dir: str) -> List[Tuple[int, 'CompiledIgnoreRules']]:
+        chain = self.__chains.get(rel_dir)
+        if chain is None:
+            chain = self.__chain(rel_dir.rpartition(os.sep)[0]) if rel_dir else []
+            rules = self.load_rules(rel_dir)
+            if rules is not None:
+                chain = [(len(rel_dir) + 1 if rel_dir else 0, rules)] + chain
+            self.__chains[rel_dir] = chain
+        return chain
+
+    def load_rules(self, rel_dir: str) -> Optional['CompiledIgnoreRules']:
+        if rel_dir in self.__rules:
+            return self.__rules[rel_dir]
+        if rel_dir and not self.nested:
+            return None
+
+        directory = self.base_dir / rel_dir
+        base_path = _normalize_path(directory)
         rules = []
-        if gitignore_path.exists():
-            with open(gitignore_path) as ignore_file:
-                counter = 0
-                for line in ignore_file:
-                    counter += 1
-                    line = line.rstrip('\n')
-                    rule = rule_from_pattern(line, base_path=_normalize_path(self.base_dir),
-                                             source=(gitignore_path, counter))
-                    if rule:
-                        rules.append(rule)
+        sources = [directory / '.gitignore']
+        if not rel_dir:
+            # lowest precedence: listed first, the last matching rule wins
+            sources.insert(0, directory / '.git' / 'info' / 'exclude')
+        for source_path in sources:
+            try:
+                with open(source_path) as ignore_file:
+                    for counter, line in enumerate(ignore_file, start=1):
+                        rule = rule_from_pattern(line.rstrip('\n'), base_path=base_path,
+                                                 source=(source_path, counter))
+                        if rule:
+                            rules.append(rule)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
 
         # add gitmodules rule
-        gitmodules_path = self.base_dir / '.gitmodules'
-        if self.include_gitmodules and gitmodules_path.exists():
+        gitmodules_path = directory / '.gitmodules'
+        if not rel_dir and self.include_gitmodules and gitmodules_path.exists():
             config = configparser.ConfigParser()
             config.read(gitmodules_path)
             paths = [config.get(section, 'path') for section in config.sections()]
-            for path in paths:
-                rule = rule_from_pattern(path, base_path=_normalize_path(self.base_dir),
-                                         source=(gitignore_path, counter))
+            for counter, path in enumerate(paths, start=1):
+                rule = rule_from_pattern(path, base_path=base_path, source=(gitmodules_path, counter))
                 if rule:
                     rules.append(rule)
 
-        if not any(r.negation for r in rules):
-            return lambda file_path: any(r.match(file_path) for r in rules)
-        else:
-            # We have negation rules. We can't use a simple "any" to evaluate them.
-            # Later rules override earlier rules.
-            return lambda file_path: handle_negation(file_path, rules)
+        compiled = CompiledIgnoreRules(rules) if rules else None
+        self.__rules[rel_dir] = compiled
+        return compiled
 
-    def fn(self, file_path: Path) -> bool:
-        return self.matcher(file_path)
+
+class CompiledIgnoreRules:
+    """
+    The rules of one ignore file, compiled to match paths relative to its directory. Runs of consecutive ignore
+    (or negation) rules are matched together, last run first since the last matching rule decides.
+    """
+
+    def __init__(self, rules: List['IgnoreRule']):
+        self.rules = rules
+        # directory only rules never match files
+        self.__file_runs = [(negation, RuleRun(list(run)))
+                            for negation, run in itertools.groupby(
+                                [rule for rule in rules if not rule.directory_only], key=lambda rule: rule.negation)]
+        self.__file_runs.reverse()
+        self.__dir_runs = [(negation, RuleRun(list(run)))
+                           for negation, run in itertools.groupby(rules, key=lambda rule: rule.negation)]
+        self.__dir_runs.reverse()
+
+    def decide(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        True when ignored, False when re-included by a negation, None when no rule matches rel_path.
+        """
+        name = rel_path.rpartition(os.sep)[2]
+        for negation, run in (self.__dir_runs if is_dir else self.__file_runs):
+            if run.matches(rel_path, name):
+                return not negation
+        return None
+
+
+class RuleRun:
+    """
+    Rules matched together. Most rules only look at the name of a path ('*.log', 'node_modules/'): those are
+    matched by set lookup, suffix or prefix, or else one combined regex, against the name alone. Anchored rules are
+    combined into a regex matched at the start of the path, only the others search the whole path.
+    """
+
+    def __init__(self, rules: List['IgnoreRule']):
+        names = set()
+        suffixes = []
+        prefixes = []
+        name_regexes = []
+        anchored_regexes = []
+        search_regexes = []
+        for rule in rules:
+            regex = _path_regex(rule)
+            body = regex[len(_UNANCHORED_PREFIX):-1] if regex.startswith(_UNANCHORED_PREFIX) else None
+            if body is None or _SEPS_GROUP in body or '.*' in body:
+                if regex.startswith('^'):
+                    anchored_regexes.append(regex)
+                else:
+                    search_regexes.append(regex)
+            elif _is_literal(body):
+                names.add(_unescape(body))
+            elif body.startswith(_NONSEP_ANY) and _is_literal(body[len(_NONSEP_ANY):]):
+                suffixes.append(_unescape(body[len(_NONSEP_ANY):]))
+            elif body.endswith(_NONSEP_ANY) and _is_literal(body[:-len(_NONSEP_ANY)]):
+                prefixes.append(_unescape(body[:-len(_NONSEP_ANY)]))
+            else:
+                name_regexes.append(body + '$')
+
+        self.names = frozenset(names)
+        self.suffixes = tuple(suffixes)
+        self.prefixes = tuple(prefixes)
+        self.name_match = _combine(name_regexes, 'match')
+        self.anchored_match = _combine(anchored_regexes, 'match')
+        self.search = _combine(search_regexes, 'search')
+
+    def matches(self, rel_path: str, name: str) -> bool:
+        return (name in self.names
+                or (self.suffixes and name.endswith(self.suffixes))
+                or (self.prefixes and name.startswith(self.prefixes))
+                or (self.name_match is not None and self.name_match(name) is not None)
+                or (self.anchored_match is not None and self.anchored_match(rel_path) is not None)
+                or (self.search is not None and self.search(rel_path) is not None))
+
+
+def _combine(regexes: List[str], method: str) -> Optional[Callable]:
+    if not regexes:
+        return None
+    return getattr(re.compile('|'.join(f"(?:{regex})" for regex in regexes)), method)
+
+
+def _is_literal(body: str) -> bool:
+    return _LITERAL.fullmatch(body) is not None
+
+
+def _unescape(body: str) -> str:
+    return re.sub(r'\\(.)', r'\1', body)
+
+
+def _needs_normalizing(path: str) -> bool:
+    path = path + os.sep
+    return f"{os.sep}.{os.sep}" in path or f"{os.sep}..{os.sep}" in path or os.sep * 2 in path
+
+
+def _path_regex(rule: 'IgnoreRule') -> str:
+    # rule.regex also matches what is below a directory and requires a trailing slash for negated directories,
+    # parents are handled by IgnoreTree: match the path itself only
+    if rule.directory_only:
+        suffix = '/$' if rule.negation else '($|\\/)'
+        return rule.regex[:-len(suffix)] + '$'
+    return rule.regex
 
 
 def handle_negation(file_path, rules: Reversible["IgnoreRule"]):
@@ -255,3 +462,10 @@ def _normalize_path(path: Union[str, Path]) -> Path:
     `Path.resolve()` does.
     """
     return Path(abspath(path))
+
+
+# the pieces fnmatch_pathname_to_regex builds regexes from, to recognize the rules matching names only
+_SEPS_GROUP = '[' + '|'.join([re.escape(os.sep)] + ([re.escape(os.altsep)] if os.altsep else [])) + ']'
+_NONSEP_ANY = r'[^{}]*'.format('|'.join([re.escape(os.sep)] + ([re.escape(os.altsep)] if os.altsep else [])))
+_UNANCHORED_PREFIX = f"(^|{_SEPS_GROUP})"
+_LITERAL = re.compile(r'(?:[^\\.^$*+?{}\[\]|()]|\\.)*')
@@ -6,13 +6,16 @@ import html
 from os import environ
 
 from pydantic import ConfigDict
-from typing import Optional
+from typing import Optional, TYPE_CHECKING
 
 from kwiq.core.task import Task
 from kwiq.core.errors import ValidationError
-from google.cloud import translate
 from kwiq.db.sqlite import DB as SqliteDb
 
+if TYPE_CHECKING:
+    # the google client library is slow to import, it is only loaded when a translation is requested
+    from google.cloud import translate
+
 
 class GoogleTranslate(Task):
     name: str = "google-translate"
@@ -22,7 +25,7 @@ class GoogleTranslate(Task):
     __translation_cache: Optional[dict[str, str]] = None
     __translation_cache_db: Optional[SqliteDb] = None
     __google_project_id: Optional[str] = None
-    __client: Optional[translate.TranslationServiceClient] = None
+    __client: Optional['translate.TranslationServiceClient'] = None
 
     @property
     def translation_cache(self):
@@ -47,8 +50,9 @@ class GoogleTranslate(Task):
         return self.__google_project_id
 
     @property
-    def client(self) -> translate.TranslationServiceClient:
+    def client(self) -> 'translate.TranslationServiceClient':
         if self.__client is None:
+            from google.cloud import translate
             self.__client = translate.TranslationServiceClient()
         return self.__client
 
@@ -88,7 +92,7 @@ class GoogleTranslate(Task):
     def close(self):
         pass
 
-    def translate_text(self, text: str, target_language_code: str) -> translate.Translation:
+    def translate_text(self, text: str, target_language_code: str) -> 'translate.Translation':
         max_retries = 3  # Maximum number of retries for API calls
         for attempt in range(max_retries):
             try:
@@ -8,6 +8,8 @@ from pydantic import BaseModel
 from .clean_directory import CleanDirectory
 from .copy_directory import CopyDirectory
 from .run_command import RunCommand
+from kwiq.core.scheduler import Scheduler
+from kwiq.core.step import Step
 from kwiq.core.task import Task
 
 
@@ -23,12 +25,20 @@ class MergeRepoInfos(BaseModel):
     remote: RepoInfo
 
 
-def setup_git_rep(merge_dir: Path, temp_dir: Path, repo_info: RepoInfo, repo_key: str):
-    # Clone specific branch to a temp folder
-    temp_clone_dir = (temp_dir / f"temp_{repo_key}").resolve()
-    RunCommand().execute(command=f'git clone {repo_info.repo_path} {temp_clone_dir}')
-    os.chdir(temp_clone_dir)
-    RunCommand().execute(command=f'git checkout {repo_info.branch}')
+class CloneRepoStep(Step):
+    temp_dir: Path
+    repo_info: RepoInfo
+    repo_key: str
+
+    def run(self) -> Path:
+        # Clone specific branch to a temp folder, without changing the working directory shared by other steps
+        temp_clone_dir = (self.temp_dir / f"temp_{self.repo_key}").resolve()
+        RunCommand().execute(command=f'git clone {self.repo_info.repo_path} {temp_clone_dir}')
+        RunCommand().execute(command=f'git -C {temp_clone_dir} checkout {self.repo_info.branch}')
+        return temp_clone_dir
+
+
+def setup_git_rep(merge_dir: Path, temp_clone_dir: Path, repo_info: RepoInfo, repo_key: str):
     os.chdir(merge_dir)
 
     # If not base branch, create a new branch
@@ -36,7 +46,8 @@ def setup_git_rep(merge_dir: Path, temp_dir: Path, repo_info: RepoInfo, repo_key
         RunCommand().execute(command='git checkout base')
         RunCommand().execute(command=f'git checkout -b {repo_key}')
 
-    CleanDirectory().execute(directory=merge_dir, filter=lambda i: i == ".git")
+    # the previous version is deleted in the background, outside merge_dir, while the next one is copied in
+    CleanDirectory().execute(directory=merge_dir, filter=lambda i: i == ".git", deferred=True)
 
     # Copy the specific folder to the main repo directory
     src_dir = (temp_clone_dir / repo_info.sub_path).resolve()
@@ -59,9 +70,16 @@ def setup_git_repos(merge_dir: Path, temp_dir: Path, repo_infos: MergeRepoInfos)
 
     os.makedirs(temp_dir, exist_ok=True)
 
-    setup_git_rep(merge_dir, temp_dir, repo_infos.base, 'base')
-    setup_git_rep(merge_dir, temp_dir, repo_infos.local, 'local')
-    setup_git_rep(merge_dir, temp_dir, repo_infos.remote, 'remote')
+    # The clones are independent of each other, run them together
+    repo_infos_by_key = {'base': repo_infos.base, 'local': repo_infos.local, 'remote': repo_infos.remote}
+    clone_steps = [CloneRepoStep(name=f"clone-{repo_key}", temp_dir=temp_dir, repo_info=repo_info,
+                                 repo_key=repo_key, outputs=[repo_key])
+                   for repo_key, repo_info in repo_infos_by_key.items()]
+    clone_dirs = Scheduler(max_workers=len(clone_steps)).run(clone_steps).artifacts
+
+    # Each branch builds on the previous one in the merge dir, so these stay sequential
+    for repo_key, repo_info in repo_infos_by_key.items():
+        setup_git_rep(merge_dir, clone_dirs[repo_key], repo_info, repo_key)
 
 
 class InputDataModel(BaseModel):
@@ -0,0 +1,94 @@
+import csv
+import os
+import random
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from kwiq.task.apply_renames import MappingData, RenameEngine, apply_renames
+
+MAPPING_COUNT = int(os.environ.get("KWIQ_BENCH_MAPPINGS", "10000"))
+FILE_COUNT = int(os.environ.get("KWIQ_BENCH_FILES", "200"))
+FILE_SIZE = 100 * 1024
+LEGACY_SAMPLE = 1
+
+PREFIXES = ["get", "set", "handle", "parse", "build", "Http", "Json", "user", "order", "payment"]
+FILLER = ["the", "return", "if", "else", "for", "self", "value", "import", "def", "class", "None", "data",
+          "index", "result", "=", "(", ")", ":", "\n", "    "]
+
+
+def random_mappings(count: int) -> list[MappingData]:
+    random.seed(7)
+    originals = set()
+    while len(originals) < count:
+        originals.add(f"{random.choice(PREFIXES)}_{random.choice(PREFIXES).lower()}_{random.randint(0, 99999)}")
+    return [MappingData(original_word=original, renamed_word=f"renamed_{i}")
+            for i, original in enumerate(sorted(originals))]
+
+
+def random_content(mappings: list[MappingData], size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        # about one identifier in ten is renamed, as in a real refactoring
+        word = random.choice(mappings).original_word if random.random() < 0.1 else random.choice(FILLER)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def legacy_apply(content: str, mappings: list[MappingData]) -> str:
+    """
+    One regex compiled and one pass over the content per mapping, as apply_renames used to do.
+    """
+    for mapping in mappings:
+        pattern = re.compile(r'\b' + re.escape(mapping.original_word) + r'\b')
+        content = pattern.sub(mapping.renamed_word, content)
+    return content
+
+
+def main():
+    mappings = random_mappings(MAPPING_COUNT)
+    contents = [random_content(mappings, FILE_SIZE) for _ in range(FILE_COUNT)]
+
+    start = time.perf_counter()
+    engine = RenameEngine(mappings)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    renamed = [engine.apply(content)[0] for content in contents]
+    engine_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = [legacy_apply(content, mappings) for content in contents[:LEGACY_SAMPLE]]
+    legacy_per_file = (time.perf_counter() - start) / LEGACY_SAMPLE
+    assert legacy == renamed[:LEGACY_SAMPLE], "single pass renames differ from the per mapping passes"
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        mapping_csv_path = temp_dir / 'mapping.csv'
+        with open(mapping_csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['original_word', 'renamed_word'])
+            writer.writerows((mapping.original_word, mapping.renamed_word) for mapping in mappings)
+        search_directory = temp_dir / 'tree'
+        for i, content in enumerate(contents):
+            file_path = search_directory / f"pkg{i % 10}" / f"module_{i}.py"
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(content)
+
+        start = time.perf_counter()
+        apply_renames(search_directory, mapping_csv_path)
+        end_to_end_seconds = time.perf_counter() - start
+
+    print(f"{len(mappings)} mappings, {len(contents)} files of {FILE_SIZE // 1024} KB")
+    print(f"legacy, pass per mapping:  {legacy_per_file:8.3f} s/file "
+          f"(~{legacy_per_file * len(contents):.0f} s for all files, measured on {LEGACY_SAMPLE})")
+    print(f"single pass:               {engine_seconds / len(contents):8.3f} s/file "
+          f"({engine_seconds:.2f} s, engine built in {build_seconds:.2f} s)")
+    print(f"apply_renames end to end:  {end_to_end_seconds:8.2f} s")
+
+
+if __name__ == '__main__':
+    main()
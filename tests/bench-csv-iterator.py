@@ -0,0 +1,74 @@
+import csv
+import gc
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from kwiq.iterator.csv_iterator import CSVIteratorBuilder
+
+ROW_COUNT = int(os.environ.get("KWIQ_BENCH_ROWS", "500000"))
+BATCH_SIZE = 10000
+WORKERS = int(os.environ.get("KWIQ_BENCH_WORKERS", str(max(2, os.cpu_count() or 1))))
+# models compared between the modes
+SAMPLE_SIZE = 10000
+
+
+class Mapping(BaseModel):
+    original_word: str
+    renamed_word: str
+    weight: int
+    score: float
+
+
+def write_mappings(path: Path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['original_word', 'renamed_word', 'weight', 'score'])
+        writer.writerows((f"word_{i}", f"renamed_{i}", i % 100, i / 7) for i in range(ROW_COUNT))
+
+
+def timed(fn):
+    """
+    Runs fn alone, with the results of earlier runs freed: they would slow its garbage collections down.
+    Returns the time it took and a sample of its result.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    return (result[:SAMPLE_SIZE] if isinstance(result, list) else result), seconds
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / 'mappings.csv'
+        write_mappings(path)
+
+        def builder():
+            return CSVIteratorBuilder().with_data_model(Mapping).with_file_path(path)
+
+        per_row, per_row_seconds = timed(lambda: list(builder().build()))
+        batched, batched_seconds = timed(lambda: list(builder().with_batch_size(BATCH_SIZE).build()))
+        trusted, trusted_seconds = timed(lambda: list(builder().with_batch_size(BATCH_SIZE).with_trusted().build()))
+        columns, columns_seconds = timed(lambda: builder().with_batch_size(BATCH_SIZE).build().columns())
+        parallel, parallel_seconds = timed(lambda: list(builder().with_workers(WORKERS).build()))
+
+    assert batched == per_row, "batched models differ"
+    assert [m.model_dump() for m in trusted] == [m.model_dump() for m in per_row], "trusted models differ"
+    assert parallel == per_row, "parallel models differ"
+    assert len(columns['weight']) == ROW_COUNT, "columns miss rows"
+    assert list(columns['weight'][:SAMPLE_SIZE]) == [m.weight for m in per_row], "columns differ"
+
+    print(f"{ROW_COUNT} rows")
+    print(f"model per row:  {per_row_seconds:6.2f} s")
+    print(f"batched:        {batched_seconds:6.2f} s")
+    print(f"trusted:        {trusted_seconds:6.2f} s")
+    print(f"columns:        {columns_seconds:6.2f} s")
+    print(f"{WORKERS:2} workers:     {parallel_seconds:6.2f} s")
+
+
+if __name__ == '__main__':
+    main()
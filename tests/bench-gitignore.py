@@ -0,0 +1,149 @@
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from kwiq.task.gitignore_matcher import GitIgnoreMatcher, handle_negation, rule_from_pattern
+
+PATH_COUNT = int(os.environ.get("KWIQ_BENCH_PATHS", "1000000"))
+LEGACY_SAMPLE = 20000
+
+# Condensed from the Python, Node and JetBrains templates of github/gitignore
+GITIGNORE = """
+# Byte-compiled / optimized / DLL files
+__pycache__/
+*.py[cod]
+*$py.class
+*.so
+.Python
+build/
+develop-eggs/
+dist/
+downloads/
+eggs/
+.eggs/
+lib64/
+parts/
+sdist/
+var/
+wheels/
+*.egg-info/
+.installed.cfg
+*.egg
+MANIFEST
+*.manifest
+*.spec
+pip-log.txt
+pip-delete-this-directory.txt
+htmlcov/
+.tox/
+.nox/
+.coverage
+.coverage.*
+.cache
+nosetests.xml
+coverage.xml
+*.cover
+*.py,cover
+.hypothesis/
+.pytest_cache/
+*.mo
+*.pot
+*.log
+local_settings.py
+db.sqlite3
+instance/
+.webassets-cache
+.scrapy
+docs/_build/
+target/
+.ipynb_checkpoints
+.env
+.venv
+env/
+venv/
+ENV/
+.mypy_cache/
+.dmypy.json
+dmypy.json
+node_modules/
+jspm_packages/
+.npm
+.eslintcache
+*.tgz
+.yarn-integrity
+.next
+out/
+.nuxt
+.cache/
+.idea/
+*.iml
+*.swp
+*~
+.DS_Store
+/config/local/**
+!/config/local/README.md
+!important.log
+"""
+
+DIRS = ["src", "lib", "app", "core", "utils", "tests", "docs", "api", "models", "views", "build", "dist",
+        "node_modules", "__pycache__", "components", "services", "config", "local", "scripts", "vendor"]
+NAMES = ["main", "index", "util", "helpers", "models", "views", "test_core", "README", "setup", "server",
+         "important", "client", "schema", "types", "config"]
+EXTENSIONS = [".py", ".pyc", ".js", ".ts", ".md", ".log", ".json", ".so", ".txt", ".iml", ".swp", ".tgz"]
+
+
+def random_paths(count: int, dir_count: int = 20000) -> list[str]:
+    """
+    count file paths spread over a tree of dir_count directories up to 6 levels deep, like a large monorepo.
+    """
+    random.seed(42)
+    dirs = ['']
+    while len(dirs) < dir_count:
+        parent = random.choice(dirs)
+        if parent.count(os.sep) < 5:
+            dirs.append(os.path.join(parent, random.choice(DIRS)))
+    dirs = sorted(set(dirs))
+    return [os.path.join(random.choice(dirs), random.choice(NAMES) + random.choice(EXTENSIONS))
+            for _ in range(count)]
+
+
+def main():
+    paths = random_paths(PATH_COUNT)
+    with tempfile.TemporaryDirectory() as base_dir:
+        base_dir = Path(base_dir)
+        (base_dir / '.gitignore').write_text(GITIGNORE)
+
+        # the rule by rule matching GitIgnoreMatcher used to do, kept here as the 'before' baseline
+        rules = [rule for rule in (rule_from_pattern(line, base_path=base_dir) for line in GITIGNORE.splitlines())
+                 if rule]
+        sample = [str(base_dir / path) for path in paths[:LEGACY_SAMPLE]]
+        start = time.perf_counter()
+        for path in sample:
+            handle_negation(path, rules)
+        legacy_us = (time.perf_counter() - start) / len(sample) * 1e6
+
+        tree = GitIgnoreMatcher(base_dir=base_dir).tree
+        match_relative = tree.match_relative
+        start = time.perf_counter()
+        ignored = sum(1 for path in paths if match_relative(path, False))
+        compiled_seconds = time.perf_counter() - start
+
+        absolute = [str(base_dir / path) for path in paths[:LEGACY_SAMPLE * 5]]
+        is_ignored = tree.is_ignored
+        start = time.perf_counter()
+        for path in absolute:
+            is_ignored(path, False)
+        absolute_us = (time.perf_counter() - start) / len(absolute) * 1e6
+
+    print(f"{len(rules)} rules, {len(paths)} paths, {ignored} ignored")
+    print(f"legacy rule by rule:      {legacy_us:8.2f} us/path "
+          f"(~{legacy_us * len(paths) / 1e6:.1f} s for all paths, measured on {len(sample)})")
+    print(f"compiled, relative paths: {compiled_seconds / len(paths) * 1e6:8.2f} us/path "
+          f"({compiled_seconds:.2f} s)")
+    print(f"compiled, absolute paths: {absolute_us:8.2f} us/path")
+
+
+if __name__ == '__main__':
+    main()
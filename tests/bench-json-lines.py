@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import jmespath
+from pydantic import BaseModel
+
+from kwiq.iterator.json_iterator import JsonIterator
+
+EVENT_COUNT = int(os.environ.get("KWIQ_BENCH_EVENTS", "300000"))
+WORKERS = int(os.environ.get("KWIQ_BENCH_WORKERS", str(os.cpu_count() or 1)))
+
+
+class Payload(BaseModel):
+    user_id: int
+    action: str
+    amount: float
+
+
+def write_events(path: Path):
+    with open(path, 'w') as f:
+        for i in range(EVENT_COUNT):
+            event = {"id": i, "ts": 1700000000 + i, "type": "event",
+                     "payload": {"user_id": i % 1000, "action": "buy" if i % 3 else "view", "amount": i * 0.5}}
+            f.write(json.dumps(event))
+            f.write('\n')
+
+
+def naive(path: Path):
+    """
+    One line at a time: the expression looked up by jmespath.search and one model validated per event.
+    """
+    with open(path) as f:
+        return [Payload(**jmespath.search('payload', json.loads(line))) for line in f]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / 'events.jsonl'
+        write_events(path)
+        size_mb = path.stat().st_size / 1e6
+
+        start = time.perf_counter()
+        expected = naive(path)
+        naive_seconds = time.perf_counter() - start
+
+        timings = {}
+        for workers in sorted({1, WORKERS}):
+            start = time.perf_counter()
+            payloads = list(JsonIterator(file_path=path, json_path='payload', data_model=Payload, json_lines=True,
+                                         workers=workers))
+            timings[workers] = time.perf_counter() - start
+            assert payloads == expected, f"{workers} workers parsed different payloads"
+
+    print(f"{EVENT_COUNT} events, {size_mb:.0f} MB")
+    print(f"line by line:          {naive_seconds:6.2f} s")
+    for workers, seconds in timings.items():
+        print(f"json_lines, {workers:2} workers: {seconds:6.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from kwiq.iterator.json_iterator import JsonIterator
+
+ITEM_COUNT = int(os.environ.get("KWIQ_BENCH_ITEMS", "200000"))
+
+
+def write_export(path: Path):
+    with open(path, 'w') as f:
+        f.write('{"meta": {"exported": "2024-01-01", "tags": ["a", "b"]}, "data": {"items": [')
+        for i in range(ITEM_COUNT):
+            if i:
+                f.write(', ')
+            json.dump({"id": i, "name": f"item {i}", "price": i * 0.25, "tags": ["x", "y"], "active": i % 2 == 0}, f)
+        f.write(']}}')
+
+
+def measure(iterator: JsonIterator):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in iterator:
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, first, seconds, peak
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / 'export.json'
+        write_export(path)
+        size_mb = path.stat().st_size / 1e6
+
+        results = {
+            "json.load + jmespath": measure(JsonIterator(file_path=path, json_path='data.items')),
+            "streaming": measure(JsonIterator(file_path=path, json_path='data.items', stream=True)),
+        }
+
+    print(f"{ITEM_COUNT} items, {size_mb:.0f} MB")
+    for name, (count, first, seconds, peak) in results.items():
+        assert count == ITEM_COUNT, f"{name} yielded {count} items"
+        print(f"{name:22} first item {first * 1000:8.1f} ms, all in {seconds:6.2f} s, peak {peak / 1e6:7.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# Cumulative import time allowed for what a CLI built on kwiq imports before running a flow
+BUDGET_MS = float(os.environ.get("KWIQ_STARTUP_BUDGET_MS", "250"))
+
+# Modules that must only be loaded once a flow actually needs them
+LAZY_MODULES = ["yaml", "jmespath", "google.cloud", "sqlite3", "kwiq.task.google_translate"]
+
+# The module of the flow the CLI registers, imported only when the flow is run
+FLOW_MODULE = """
+from kwiq.core.flow import Flow
+
+
+class TranslateFlow(Flow):
+    def fn(self, text: str, target_language_code: str = 'en') -> str:
+        from kwiq.task.google_translate import GoogleTranslate
+        return GoogleTranslate().execute(text=text, target_language_code=target_language_code)
+"""
+
+CLI_IMPORTS = """
+from kwiq.core.app import App
+app = App(name='bench')
+app.register_flow_entry_point('translate', 'bench_flows:TranslateFlow')
+"""
+
+# Loading the registered flow, as running it does
+FLOW_LOAD = CLI_IMPORTS + """
+from kwiq.core.flow import Flow
+assert isinstance(app.get_flow('translate'), Flow)
+"""
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def import_times(code: str, flows_dir: str) -> dict[str, int]:
+    """
+    Runs code in a fresh interpreter with -X importtime, returns the cumulative import time (us) per module.
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(SRC_DIR), flows_dir]))
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                               env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # top level modules are not indented, their cumulative times add up to the whole import cost
+        if not name.startswith("  "):
+            times[name.strip()] = int(cumulative)
+        else:
+            times.setdefault(name.strip(), 0)
+    return times
+
+
+def main() -> int:
+    with tempfile.TemporaryDirectory() as flows_dir:
+        Path(flows_dir, 'bench_flows.py').write_text(FLOW_MODULE)
+        runs = [import_times(CLI_IMPORTS, flows_dir) for _ in range(5)]
+        # fails (check=True) unless the entry point resolves to a Flow
+        import_times(FLOW_LOAD, flows_dir)
+    # the fastest run is the least disturbed by the machine
+    best = min(runs, key=lambda times: sum(times.values()))
+    total_ms = sum(best.values()) / 1000
+
+    print(f"Startup imports: {total_ms:.1f} ms (budget {BUDGET_MS:.0f} ms)")
+    for name, cumulative in sorted(best.items(), key=lambda item: -item[1])[:10]:
+        if cumulative > 0:
+            print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    eagerly_loaded = [name for name in LAZY_MODULES if name in best]
+    if eagerly_loaded:
+        print(f"FAIL: modules loaded at startup that should be lazy: {eagerly_loaded}")
+        failed = True
+    if total_ms > BUDGET_MS:
+        print(f"FAIL: startup import time over budget by {total_ms - BUDGET_MS:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
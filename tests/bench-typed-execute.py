@@ -0,0 +1,118 @@
+import inspect
+import time
+import timeit
+from pathlib import Path
+from typing import Union, get_args, get_origin
+
+from pydantic import BaseModel, parse_obj_as
+
+from kwiq.core.task import Task
+
+
+class InputModel(BaseModel):
+    words_regex: str
+    search_directory: Path
+
+
+class NoopTask(Task):
+    name: str = "noop"
+
+    def fn(self, text: str, target_language_code: str = "en") -> str:
+        return text
+
+
+class NoopModelTask(Task):
+    name: str = "noop-model"
+
+    def fn(self, data: InputModel) -> None:
+        pass
+
+
+def legacy_bind(fn, kwargs):
+    """
+    The argument binding Typed.execute used to do on every call, kept here as the 'before' baseline.
+    """
+    fn_args = {}
+    for name, param in inspect.signature(fn).parameters.items():
+        if name == 'self':
+            continue
+
+        param_type = param.annotation
+        is_optional = False
+        if param_type is inspect.Parameter.empty:
+            param_type = None
+        else:
+            args = get_args(param_type)
+            if get_origin(param_type) is Union and type(None) in args:
+                param_type = next((arg for arg in args if arg is not type(None)), None)
+                is_optional = True
+
+        if name in kwargs:
+            arg = kwargs[name]
+            if param_type is None or isinstance(arg, param_type):
+                fn_args[name] = arg
+            elif issubclass(param_type, (int, float, str, bool, list, dict, tuple, set, Path)):
+                fn_args[name] = param_type(arg)
+            elif issubclass(param_type, BaseModel):
+                fn_args[name] = param_type(**arg)
+            else:
+                fn_args[name] = parse_obj_as(param_type, arg)
+        elif param_type is not None:
+            if issubclass(param_type, (int, float, str, bool, list, dict, tuple, set, Path)):
+                if param.default is not inspect.Parameter.empty:
+                    fn_args[name] = param.default
+                elif is_optional:
+                    fn_args[name] = None
+                else:
+                    raise ValueError(f"Missing required parameter: '{name}'")
+            elif issubclass(param_type, BaseModel):
+                fn_args[name] = param_type(**kwargs)
+        elif param.default is not inspect.Parameter.empty:
+            fn_args[name] = param.default
+    return fn_args
+
+
+def per_call_us(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def bench(task: Task, kwargs: dict, direct_call, number: int = 20000):
+    direct = per_call_us(direct_call, number)
+    before = per_call_us(lambda: task.fn(**legacy_bind(task.fn, kwargs)), number)
+    after = per_call_us(lambda: task.execute(**kwargs), number)
+
+    print(f"{task.name}:")
+    print(f"  fn called directly      : {direct:8.2f} us/call")
+    print(f"  legacy binding + fn     : {before:8.2f} us/call (overhead {before - direct:8.2f} us)")
+    print(f"  execute (binding plan)  : {after:8.2f} us/call (overhead {after - direct:8.2f} us)")
+
+
+def bench_batch(task: Task, kwargs_list: list[dict]):
+    start = time.perf_counter()
+    for kwargs in kwargs_list:
+        task.execute(**kwargs)
+    one_by_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    task.execute_many(kwargs_list, batch_size=10000)
+    batched = time.perf_counter() - start
+
+    count = len(kwargs_list)
+    print(f"{task.name} x {count}:")
+    print(f"  execute per item        : {one_by_one / count * 1e6:8.2f} us/item")
+    print(f"  execute_many            : {batched / count * 1e6:8.2f} us/item")
+
+
+def main():
+    task = NoopTask()
+    bench(task, {"text": "hello"}, lambda: task.fn(text="hello"))
+
+    model_task = NoopModelTask()
+    model_kwargs = {"words_regex": "foo", "search_directory": Path("/tmp")}
+    bench(model_task, model_kwargs, lambda: model_task.fn(InputModel(**model_kwargs)))
+
+    bench_batch(model_task, [{"words_regex": f"w{i}", "search_directory": "/tmp"} for i in range(200000)])
+
+
+if __name__ == '__main__':
+    main()
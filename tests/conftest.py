@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# the package is not installed by the test run: import it from the source tree
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,31 @@
+import json
+
+from kwiq.core.app import App
+from kwiq.core.flow import Flow
+from kwiq.core.task import Task
+
+
+class IncrementTask(Task):
+    name: str = "increment"
+
+    def fn(self, value: int) -> int:
+        return value + 1
+
+
+class CountFlow(Flow):
+    def fn(self, count: int) -> int:
+        value = 0
+        for _ in range(count):
+            value = IncrementTask().execute(value=value)
+        return value
+
+
+def test_metrics_cover_one_run(tmp_path):
+    app = App(name='test', metrics_json_path=tmp_path / 'metrics.json')
+    app.register_flow(CountFlow(name='count'))
+
+    for _ in range(2):
+        assert app.run('count', count=3) == 0
+        summary = json.loads((tmp_path / 'metrics.json').read_text())
+        assert summary['increment']['calls'] == 3
+        assert summary['count']['calls'] == 1
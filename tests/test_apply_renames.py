@@ -0,0 +1,99 @@
+import csv
+import threading
+from collections import Counter
+from pathlib import Path
+
+from kwiq.iterator.text_file import TextFileReader
+from kwiq.task.apply_renames import MappingData, RenameEngine, apply_renames, rename_large_file
+
+FILE_COUNT = 200
+
+
+def write_mappings(path: Path, mappings: dict):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['original_word', 'renamed_word'])
+        writer.writerows(mappings.items())
+
+
+def write_tree(directory: Path, content: str):
+    for i in range(FILE_COUNT):
+        file_path = directory / f"pkg{i % 5}" / f"module_{i}.py"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
+
+
+def test_engine_renames_whole_words_once():
+    engine = RenameEngine([MappingData(original_word='foo', renamed_word='bar'),
+                           MappingData(original_word='bar', renamed_word='baz'),
+                           MappingData(original_word='foo', renamed_word='ignored')])
+    assert engine.apply('foo bar food foo_bar')[0] == 'bar baz food foo_bar'
+
+
+def test_engine_renames_all_mappings_in_a_single_pass():
+    words = [f"word{i}" for i in range(1000)]
+    engine = RenameEngine([MappingData(original_word=word, renamed_word=word.upper()) for word in words] +
+                          [MappingData(original_word='word1_suffix', renamed_word='longest')])
+    content = ' '.join(words) + ' word1_suffix word1000'
+    hits = Counter()
+    renamed, count = engine.apply(content, hits)
+    # the longest original word wins over its prefixes, words only prefixed by an original word are kept
+    assert renamed == ' '.join(word.upper() for word in words) + ' longest word1000'
+    assert count == 1001
+    assert hits['word1'] == 1 and hits['word1_suffix'] == 1
+
+
+def test_concurrent_calls_keep_their_own_mappings(tmp_path):
+    write_mappings(tmp_path / 'a.csv', {'alpha': 'renamed_alpha'})
+    write_mappings(tmp_path / 'b.csv', {'beta': 'renamed_beta'})
+    write_tree(tmp_path / 'a', 'alpha beta\n')
+    write_tree(tmp_path / 'b', 'alpha beta\n')
+
+    results = {}
+    barrier = threading.Barrier(2)
+
+    def run(name, dry_run):
+        barrier.wait()
+        results[name] = apply_renames(tmp_path / name, tmp_path / f"{name}.csv", dry_run=dry_run, workers=1)
+
+    threads = [threading.Thread(target=run, args=('a', True)), threading.Thread(target=run, args=('b', False))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results['a'].hits == {'alpha': FILE_COUNT}
+    assert results['b'].hits == {'beta': FILE_COUNT}
+    # the dry run wrote nothing, the other run only renamed its own words
+    assert {p.read_text() for p in (tmp_path / 'a').rglob('*.py')} == {'alpha beta\n'}
+    assert {p.read_text() for p in (tmp_path / 'b').rglob('*.py')} == {'alpha renamed_beta\n'}
+
+
+def test_symbolic_links_stay_links(tmp_path):
+    write_mappings(tmp_path / 'mappings.csv', {'alpha': 'renamed_alpha'})
+    target = tmp_path / 'target.py'
+    target.write_text('alpha beta\n')
+    tree = tmp_path / 'tree'
+    tree.mkdir()
+    (tree / 'link.py').symlink_to(target)
+
+    result = apply_renames(tree, tmp_path / 'mappings.csv')
+
+    assert result.hits == {'alpha': 1}
+    assert (tree / 'link.py').is_symlink()
+    assert target.read_text() == 'renamed_alpha beta\n'
+
+
+def test_large_symbolic_links_stay_links(tmp_path):
+    engine = RenameEngine([MappingData(original_word='alpha', renamed_word='renamed_alpha')])
+    target = tmp_path / 'target.py'
+    target.write_text('alpha beta\n' * 1000)
+    link = tmp_path / 'link.py'
+    link.symlink_to(target)
+
+    reader = TextFileReader(link, chunk_size=1024, overlap=64)
+    assert reader.is_large()
+    rename_large_file(engine, reader, tmp_path, dry_run=False)
+
+    assert link.is_symlink()
+    assert target.read_text() == 'renamed_alpha beta\n' * 1000
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+
+from kwiq.core.flow import Flow
+from kwiq.core.task import Task
+from kwiq.db.sqlite import DB
+
+SLEEP_SECONDS = 0.1
+
+
+class BlockingTask(Task):
+    name: str = "blocking"
+
+    def fn(self, value: int) -> int:
+        time.sleep(SLEEP_SECONDS)
+        return value * 2
+
+
+class AsyncTask(Task):
+    name: str = "async"
+
+    async def fn(self, value: int) -> int:
+        await asyncio.sleep(SLEEP_SECONDS)
+        return value + 1
+
+
+class AsyncFlow(Flow):
+    name: str = "async-flow"
+
+    async def fn(self, count: int) -> list:
+        doubled = await asyncio.gather(*(BlockingTask().aexecute(value=i) for i in range(count)))
+        return list(await asyncio.gather(*(AsyncTask().aexecute(value=value) for value in doubled)))
+
+
+def test_aexecute_runs_blocking_and_async_tasks_concurrently():
+    start = time.perf_counter()
+    assert asyncio.run(AsyncFlow().aexecute(count=5)) == [i * 2 + 1 for i in range(5)]
+    # two rounds of five concurrent sleeps
+    assert time.perf_counter() - start < SLEEP_SECONDS * 2 + 0.3
+
+
+def test_execute_runs_async_fn_outside_event_loop():
+    assert AsyncTask().execute(value='1') == 2
+    assert AsyncTask().execute_many([{'value': i} for i in range(3)]) == [1, 2, 3]
+
+
+def test_execute_rejects_async_fn_inside_event_loop():
+    async def run():
+        AsyncTask().execute(value=1)
+
+    with pytest.raises(RuntimeError, match="aexecute"):
+        asyncio.run(run())
+
+
+def test_db_from_executor_threads(tmp_path):
+    db = DB(db_path=tmp_path / 'test.db')
+    db.command(sql='CREATE TABLE items (value INTEGER)')
+
+    async def run():
+        await asyncio.gather(*(db.acommand(sql='INSERT INTO items VALUES (?)', parameters=(i,)) for i in range(20)))
+        return await db.aselect(sql='SELECT SUM(value) FROM items')
+
+    assert asyncio.run(run()) == [(sum(range(20)),)]
+    db.close()
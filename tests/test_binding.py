@@ -0,0 +1,54 @@
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from kwiq.core.binding import BindingPlan
+from kwiq.core.task import Task
+
+
+class Config(BaseModel):
+    name: str
+    size: int = 1
+
+
+class BindTask(Task):
+    name: str = "bind"
+
+    def fn(self, path: Path, count: int, config: Config, scores: List[int], label: Optional[str] = None,
+           extra=None) -> dict:
+        return {'path': path, 'count': count, 'config': config, 'scores': scores, 'label': label, 'extra': extra}
+
+
+class ModelFromKwargsTask(Task):
+    name: str = "model-from-kwargs"
+
+    def fn(self, config: Config) -> Config:
+        return config
+
+
+def test_bind_converts_arguments():
+    fn_args = BindingPlan(BindTask.fn).bind({'path': '/tmp/x', 'count': '3', 'config': {'name': 'a'},
+                                             'scores': ['1', 2]})
+    assert fn_args == {'path': Path('/tmp/x'), 'count': 3, 'config': Config(name='a'), 'scores': [1, 2],
+                       'label': None, 'extra': None}
+
+
+def test_bind_builds_models_from_all_kwargs():
+    assert ModelFromKwargsTask().execute(name='b', size=2) == Config(name='b', size=2)
+
+
+def test_bind_rejects_missing_required_parameters():
+    with pytest.raises(ValueError, match="'count'"):
+        BindingPlan(BindTask.fn).bind({'path': '/tmp/x', 'config': {'name': 'a'}, 'scores': []})
+
+
+def test_bind_many_matches_bind():
+    plan = BindingPlan(BindTask.fn)
+    kwargs_list: List[Dict] = [
+        {'path': f'/tmp/{i}', 'count': str(i), 'config': {'name': f'c{i}', 'size': i}, 'scores': [str(i)],
+         **({'label': 'odd'} if i % 2 else {})}
+        for i in range(10)
+    ]
+    assert plan.bind_many(kwargs_list) == [plan.bind(kwargs) for kwargs in kwargs_list]
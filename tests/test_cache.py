@@ -0,0 +1,66 @@
+import os
+import threading
+from pathlib import Path
+from typing import ClassVar
+
+from kwiq.core.cache import ResultCache
+from kwiq.core.task import Task
+
+
+class LineCountTask(Task):
+    name: str = "line-count"
+    # not a field: fields are part of the cache key
+    calls: ClassVar[int] = 0
+
+    def fn(self, file_path: Path) -> int:
+        LineCountTask.calls += 1
+        return len(file_path.read_text().splitlines())
+
+
+def stored_size(cache: ResultCache) -> int:
+    return cache.db.select(sql='SELECT COALESCE(SUM(size), 0) FROM results')[0][0]
+
+
+def test_cached_results_follow_their_input_files(tmp_path):
+    file_path = tmp_path / 'lines.txt'
+    file_path.write_text('a\nb\n')
+    task = LineCountTask().use_cache(ResultCache(db_path=tmp_path / 'cache.db'))
+
+    assert task.execute(file_path=file_path) == 2
+    assert task.execute(file_path=file_path) == 2
+    assert LineCountTask.calls == 1
+
+    file_path.write_text('a\nb\nc\n')
+    os.utime(file_path, ns=(1, 1))
+    assert task.execute(file_path=file_path) == 3
+    assert LineCountTask.calls == 2
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = ResultCache(db_path=tmp_path / 'cache.db', max_size_bytes=3000)
+    for i in range(10):
+        cache.put(f'key{i}', 'x' * 1000)
+    assert stored_size(cache) <= 3000
+    assert cache.get('key9')[0]
+    assert not cache.get('key0')[0]
+
+
+def test_concurrent_use_keeps_counters_and_size(tmp_path):
+    cache = ResultCache(db_path=tmp_path / 'cache.db', max_size_bytes=50000)
+    barrier = threading.Barrier(8)
+
+    def run(worker):
+        barrier.wait()
+        for i in range(200):
+            key = f'key{(worker * 7 + i) % 60}'
+            if not cache.get(key)[0]:
+                cache.put(key, 'x' * (100 + i))
+
+    threads = [threading.Thread(target=run, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.hits + cache.misses == 8 * 200
+    assert cache._ResultCache__total_size == stored_size(cache)
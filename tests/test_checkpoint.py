@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, ClassVar, List
+
+import pytest
+
+from kwiq.core import checkpoint
+from kwiq.core.app import App
+from kwiq.core.checkpoint import CheckpointStore
+from kwiq.core.flow import Flow
+from kwiq.core.scheduler import Scheduler
+from kwiq.core.step import Step
+from kwiq.core.task import Task
+
+# names of the tasks whose fn ran, in order
+calls: List[str] = []
+
+
+class InnerTask(Task):
+    name: str = "inner"
+
+    def fn(self, value: int) -> int:
+        calls.append(f"inner-{value}")
+        return value * 10
+
+
+class InnerStep(Step):
+    value: int
+
+    def run(self, **inputs) -> Any:
+        return InnerTask().execute(value=self.value)
+
+
+class OuterTask(Task):
+    name: str = "outer"
+    fail: ClassVar[bool] = False
+
+    def fn(self, count: int) -> int:
+        calls.append("outer")
+        steps = [InnerStep(name=f"inner-{i}", value=i, outputs=[f"out-{i}"]) for i in range(count)]
+        total = sum(Scheduler(max_workers=count).run(steps).artifacts.values())
+        if OuterTask.fail:
+            raise ValueError("failed")
+        return total
+
+
+class AsyncOuterTask(Task):
+    name: str = "async-outer"
+
+    async def fn(self, count: int) -> int:
+        calls.append("async-outer")
+        return sum(await asyncio.gather(*(InnerTask().aexecute(value=i) for i in range(count))))
+
+
+class FailingTask(Task):
+    name: str = "failing"
+    fail: ClassVar[bool] = True
+
+    def fn(self, value: int) -> int:
+        calls.append("failing")
+        if FailingTask.fail:
+            raise ValueError("failed")
+        return value
+
+
+class ResumableFlow(Flow):
+    def fn(self, count: int) -> int:
+        return FailingTask().execute(value=OuterTask().execute(count=count))
+
+
+@pytest.fixture(autouse=True)
+def clear_calls():
+    calls.clear()
+    yield
+    checkpoint.activate(None)
+    OuterTask.fail = False
+
+
+def test_tasks_run_by_scheduler_steps_are_nested(tmp_path):
+    store = CheckpointStore(db_path=tmp_path / 'checkpoints.db')
+    store.start('test', {}, resume=False)
+    checkpoint.activate(store)
+
+    assert OuterTask().execute(count=3) == 30
+    assert store.saved == 1
+
+
+def test_tasks_awaited_by_an_async_task_are_nested(tmp_path):
+    store = CheckpointStore(db_path=tmp_path / 'checkpoints.db')
+    store.start('test', {}, resume=False)
+    checkpoint.activate(store)
+
+    assert asyncio.run(AsyncOuterTask().aexecute(count=3)) == 30
+    assert store.saved == 1
+
+
+def test_resume_skips_the_outer_task_with_its_nested_ones(tmp_path):
+    app = App(name='test', checkpoint_path=tmp_path / 'checkpoints.db')
+    app.register_flow(ResumableFlow(name='resumable'))
+
+    FailingTask.fail = True
+    assert app.run('resumable', count=2) == 1
+    assert sorted(calls) == ['failing', 'inner-0', 'inner-1', 'outer']
+
+    calls.clear()
+    FailingTask.fail = False
+    app.resume = True
+    assert app.run('resumable', count=2) == 0
+    assert calls == ['failing']
+
+
+def test_resume_runs_the_nested_tasks_of_a_failed_task_again(tmp_path):
+    app = App(name='test', checkpoint_path=tmp_path / 'checkpoints.db')
+    app.register_flow(ResumableFlow(name='resumable'))
+
+    OuterTask.fail = True
+    assert app.run('resumable', count=2) == 1
+
+    calls.clear()
+    OuterTask.fail = False
+    FailingTask.fail = False
+    app.resume = True
+    assert app.run('resumable', count=2) == 0
+    assert sorted(calls) == ['failing', 'inner-0', 'inner-1', 'outer']
@@ -0,0 +1,68 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from kwiq.task import clean_directory
+from kwiq.task.clean_directory import (TRASH_SUFFIX, CleanDirectory, InputModel, defer_removal,
+                                       remove_entries_parallel, wait_for_deferred_deletions)
+
+
+def write_tree(directory: Path, count: int):
+    for i in range(count):
+        file_path = directory / f"pkg{i % 10}" / f"sub{i % 3}" / f"module_{i}.txt"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text('content\n')
+
+
+@pytest.fixture
+def thread_errors(monkeypatch):
+    errors = []
+    monkeypatch.setattr(threading, 'excepthook', errors.append)
+    yield errors
+    wait_for_deferred_deletions()
+
+
+def test_deferred_cleans_share_the_trash_sweep(tmp_path, thread_errors):
+    directory = tmp_path / 'build'
+    for _ in range(10):
+        write_tree(directory, 300)
+        CleanDirectory().fn(InputModel(directory=directory, filter=None, workers=4, deferred=True))
+    wait_for_deferred_deletions()
+
+    assert not thread_errors
+    assert os.listdir(tmp_path) == ['build']
+    assert os.listdir(directory) == []
+
+
+def test_sweep_skips_trash_in_progress(tmp_path, thread_errors):
+    directory = tmp_path / 'build'
+    directory.mkdir()
+    trash = tmp_path / f".build{TRASH_SUFFIX}in-progress"
+    write_tree(trash, 10)
+
+    with clean_directory._deletions_lock:
+        clean_directory._trash_in_progress.add(str(trash))
+    try:
+        defer_removal(directory, [])
+        wait_for_deferred_deletions()
+        assert trash.is_dir()
+    finally:
+        with clean_directory._deletions_lock:
+            clean_directory._trash_in_progress.discard(str(trash))
+
+    defer_removal(directory, [])
+    wait_for_deferred_deletions()
+    assert not thread_errors
+    assert os.listdir(tmp_path) == ['build']
+
+
+def test_remove_entries_parallel_missing_entries(tmp_path):
+    write_tree(tmp_path / 'tree', 20)
+    missing = str(tmp_path / 'missing')
+
+    remove_entries_parallel([str(tmp_path / 'tree'), missing], 4, missing_ok=True)
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(FileNotFoundError):
+        remove_entries_parallel([missing], 4)
@@ -0,0 +1,60 @@
+import os
+from pathlib import Path
+
+from kwiq.task.copy_directory import copy_directory
+
+
+def write_tree(directory: Path):
+    for i in range(20):
+        file_path = directory / f"pkg{i % 3}" / f"module_{i}.py"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(f"module {i}\n")
+
+
+def contents(directory: Path) -> dict:
+    return {os.fspath(p.relative_to(directory)): p.read_text() for p in directory.rglob('*.py')}
+
+
+def test_copy_over_hardlinks_keeps_the_sources(tmp_path):
+    src = tmp_path / 'src'
+    write_tree(src)
+    expected = contents(src)
+
+    copy_directory(src, tmp_path / 'dst', mode='hardlink')
+    result = copy_directory(src, tmp_path / 'dst', mode='copy')
+
+    assert result.copied == 20
+    assert contents(src) == expected
+    assert contents(tmp_path / 'dst') == expected
+    # the destination files are copies now, no longer links to the sources
+    assert not os.path.samefile(src / 'pkg0' / 'module_0.py', tmp_path / 'dst' / 'pkg0' / 'module_0.py')
+
+
+def test_copy_over_symbolic_links_to_the_sources(tmp_path):
+    src = tmp_path / 'src'
+    write_tree(src)
+    expected = contents(src)
+    dst = tmp_path / 'dst'
+    for path in src.rglob('*.py'):
+        link = dst / path.relative_to(src)
+        link.parent.mkdir(parents=True, exist_ok=True)
+        link.symlink_to(path)
+
+    copy_directory(src, dst)
+
+    assert contents(src) == expected
+    assert contents(dst) == expected
+    assert not any(path.is_symlink() for path in dst.rglob('*.py'))
+
+
+def test_dangling_symbolic_links_are_copied_as_links(tmp_path):
+    src = tmp_path / 'src'
+    write_tree(src)
+    (src / 'pkg0' / 'dangling.py').symlink_to(tmp_path / 'missing.py')
+
+    result = copy_directory(src, tmp_path / 'dst')
+
+    assert result.copied == 21
+    dangling = tmp_path / 'dst' / 'pkg0' / 'dangling.py'
+    assert dangling.is_symlink()
+    assert os.readlink(dangling) == os.fspath(tmp_path / 'missing.py')
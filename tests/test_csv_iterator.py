@@ -0,0 +1,103 @@
+import csv
+import random
+
+import pytest
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from kwiq.iterator import csv_iterator
+from kwiq.iterator.csv_iterator import CSVIterator
+
+
+class Record(BaseModel):
+    id: int
+    score: float
+    name: str
+
+
+class ExtraRecord(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    id: int
+    name: str
+
+
+def write_records(path, count, header=True, line_terminator='\n'):
+    random.seed(count)
+    names = ['plain', 'with "quotes"', 'comma, inside', 'new\nline', 'crlf\r\ninside', 'ünïcode', '']
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator=line_terminator)
+        if header:
+            writer.writerow(['id', 'score', 'name'])
+        for i in range(count):
+            writer.writerow([i, random.random() * 100, random.choice(names)])
+            if i % 97 == 0:
+                f.write(line_terminator)
+
+
+@pytest.fixture(autouse=True)
+def small_ranges(monkeypatch):
+    monkeypatch.setattr(csv_iterator, 'CSV_RANGE_SIZE', 512)
+
+
+@pytest.mark.parametrize('line_terminator', ['\n', '\r\n'])
+@pytest.mark.parametrize('trusted', [False, True])
+def test_parallel_matches_sequential(tmp_path, line_terminator, trusted):
+    path = tmp_path / 'records.csv'
+    write_records(path, 1000, line_terminator=line_terminator)
+
+    expected = list(CSVIterator(Record, path))
+    assert len(expected) == 1000
+    assert list(CSVIterator(Record, path, trusted=trusted, workers=2)) == expected
+    unordered = list(CSVIterator(Record, path, trusted=trusted, workers=2, ordered=False))
+    assert sorted(unordered, key=lambda record: record.id) == expected
+
+
+def test_parallel_without_header(tmp_path):
+    path = tmp_path / 'records.csv'
+    write_records(path, 300, header=False)
+    fieldnames = ['id', 'score', 'name']
+
+    expected = list(CSVIterator(Record, path, fieldnames=fieldnames, has_header=False))
+    assert list(CSVIterator(Record, path, fieldnames=fieldnames, has_header=False, workers=2)) == expected
+
+
+def test_parallel_models_with_extra_fields(tmp_path):
+    path = tmp_path / 'records.csv'
+    write_records(path, 300)
+
+    expected = list(CSVIterator(ExtraRecord, path))
+    assert list(CSVIterator(ExtraRecord, path, workers=2)) == expected
+
+
+def test_columns_match_rows(tmp_path):
+    path = tmp_path / 'records.csv'
+    write_records(path, 300)
+
+    records = list(CSVIterator(Record, path))
+    columns = CSVIterator(Record, path, batch_size=64).columns()
+    assert list(columns['id']) == [record.id for record in records]
+    assert list(columns['score']) == [record.score for record in records]
+    assert columns['name'] == [record.name for record in records]
+
+
+@pytest.mark.parametrize('row', ['7,1.5', '7,1.5,name,extra'])
+def test_columns_reject_ragged_rows(tmp_path, row):
+    path = tmp_path / 'records.csv'
+    path.write_text('id,score,name\n1,2.5,a\n2,3.5,b\n' + row + '\n3,4.5,c\n')
+
+    with pytest.raises(ValidationError) as error:
+        CSVIterator(Record, path, batch_size=2).columns()
+    assert error.value.errors()[0]['loc'][0] == 2
+
+
+@pytest.mark.parametrize('row', ['7,1.5', '7,1.5,name,extra'])
+@pytest.mark.parametrize('trusted', [False, True])
+def test_batches_reject_ragged_rows(tmp_path, row, trusted):
+    path = tmp_path / 'records.csv'
+    path.write_text('id,score,name\n1,2.5,a\n2,3.5,b\n' + row + '\n3,4.5,c\n')
+
+    with pytest.raises(ValidationError) as error:
+        list(CSVIterator(Record, path, batch_size=2, trusted=trusted))
+    assert error.value.errors()[0]['loc'][0] == 2
+    with pytest.raises(ValidationError):
+        list(CSVIterator(Record, path, trusted=trusted, workers=2))
@@ -0,0 +1,79 @@
+import bz2
+import csv
+import gzip
+import io
+import lzma
+
+import pytest
+from pydantic import BaseModel
+
+from kwiq.task.csv_writer import CSVWriter, write_data_to_csv
+
+
+class Base(BaseModel):
+    id: int
+
+
+class Record(Base):
+    name: str
+    score: float
+
+
+def records(count: int) -> list:
+    return [Record(id=i, name=f"name, {i}" if i % 2 else f'"{i}"', score=i / 4) for i in range(count)]
+
+
+def read_rows(text: str) -> list:
+    return list(csv.reader(io.StringIO(text, newline='')))
+
+
+def expected_rows(models: list) -> list:
+    return [['id', 'name', 'score']] + [[str(m.id), m.name, str(m.score)] for m in models]
+
+
+def test_write_buffers_batches(tmp_path):
+    path = tmp_path / 'records.csv'
+    models = records(25)
+
+    with CSVWriter(Record, path, batch_size=10) as writer:
+        # two whole batches, the last five models are written by close
+        for model in models:
+            writer.write(model)
+
+    # the inherited fields come first
+    assert read_rows(path.read_text()) == expected_rows(models)
+
+
+def test_write_all_skips_none(tmp_path):
+    path = tmp_path / 'records.csv'
+    models = records(10)
+
+    with CSVWriter(Record, path) as writer:
+        writer.write(models[0])
+        writer.write_all([None, *models[1:5], None, *models[5:]])
+
+    assert read_rows(path.read_text()) == expected_rows(models)
+
+
+@pytest.mark.parametrize('suffix, module', [('.gz', gzip), ('.bz2', bz2), ('.xz', lzma)])
+def test_compressed_output(tmp_path, suffix, module):
+    path = tmp_path / f"records.csv{suffix}"
+    models = records(100)
+
+    write_data_to_csv(iter(models), path)
+
+    with module.open(path, mode='rt', newline='') as file:
+        assert read_rows(file.read()) == expected_rows(models)
+
+
+def test_write_data_to_csv_without_data(tmp_path):
+    path = tmp_path / 'records.csv'
+
+    write_data_to_csv(iter([]), path)
+
+    assert not path.exists()
+
+
+def test_write_data_to_csv_rejects_other_types(tmp_path):
+    with pytest.raises(ValueError):
+        write_data_to_csv([{'id': 1}], tmp_path / 'records.csv')
@@ -0,0 +1,54 @@
+import threading
+from pathlib import Path
+
+from kwiq.task.extract_words import extract_word_stats, extract_words
+
+FILE_COUNT = 200
+
+
+def write_tree(directory: Path, content: str):
+    for i in range(FILE_COUNT):
+        file_path = directory / f"pkg{i % 5}" / f"module_{i}.txt"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
+
+
+def test_text_and_mmap_modes_agree(tmp_path):
+    write_tree(tmp_path, 'alpha_one beta alpha-two\ngamma ALPHA\n')
+    (tmp_path / 'binary.bin').write_bytes(b'alpha_binary\0\1\2')
+
+    expected = {'alpha_one', 'alpha-two', 'ALPHA'}
+    assert extract_words('alpha', tmp_path) == expected
+    assert extract_words('alpha', tmp_path, mmap_files=True) == expected
+
+
+def test_manifest_runs_match_full_runs(tmp_path):
+    write_tree(tmp_path / 'tree', 'alpha beta\n')
+    manifest_path = tmp_path / 'manifest.db'
+
+    expected = extract_word_stats('alpha', tmp_path / 'tree')
+    assert extract_word_stats('alpha', tmp_path / 'tree', manifest_path=manifest_path) == expected
+    (tmp_path / 'tree' / 'pkg0' / 'module_0.txt').write_text('alphabet\n')
+    expected = extract_word_stats('alpha', tmp_path / 'tree')
+    assert extract_word_stats('alpha', tmp_path / 'tree', manifest_path=manifest_path) == expected
+
+
+def test_concurrent_calls_keep_their_own_pattern(tmp_path):
+    write_tree(tmp_path / 'a', 'alpha gamma\n')
+    write_tree(tmp_path / 'b', 'alpha gamma\n')
+
+    results = {}
+    barrier = threading.Barrier(2)
+
+    def run(name, words_regex, mmap_files):
+        barrier.wait()
+        results[name] = extract_words(words_regex, tmp_path / name, mmap_files=mmap_files)
+
+    threads = [threading.Thread(target=run, args=('a', 'alpha', False)),
+               threading.Thread(target=run, args=('b', 'gamma', True))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {'a': {'alpha'}, 'b': {'gamma'}}
@@ -0,0 +1,80 @@
+import os
+import threading
+from pathlib import Path
+
+from kwiq.iterator.file_iterator import FileIteratorBuilder
+
+
+def write_tree(directory: Path):
+    for i in range(60):
+        file_path = directory / f"pkg{i % 4}" / f"sub{i % 3}" / f"module_{i}.{'py' if i % 2 else 'txt'}"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text('')
+    (directory / 'top.py').write_text('')
+
+
+def walked(directory: Path, suffix: str = '') -> list:
+    return sorted(os.path.join(dir_path, name) for dir_path, _, names in os.walk(directory)
+                  for name in names if name.endswith(suffix))
+
+
+def test_iteration_matches_os_walk(tmp_path):
+    write_tree(tmp_path)
+    assert sorted(FileIteratorBuilder().with_directory(tmp_path).build()) == walked(tmp_path)
+    assert sorted(FileIteratorBuilder().with_directory(tmp_path).with_filters(['*.py']).build()) == \
+        walked(tmp_path, '.py')
+
+
+def test_files_come_before_sub_directories(tmp_path):
+    write_tree(tmp_path)
+    paths = list(FileIteratorBuilder().with_directory(tmp_path).build())
+    assert paths[0] == str(tmp_path / 'top.py')
+
+
+def test_directory_links_are_not_followed(tmp_path):
+    write_tree(tmp_path / 'tree')
+    os.symlink(tmp_path / 'tree' / 'pkg0', tmp_path / 'tree' / 'link')
+    assert sorted(FileIteratorBuilder().with_directory(tmp_path / 'tree').build()) == walked(tmp_path / 'tree')
+
+
+def test_workers_process_every_file_once(tmp_path):
+    write_tree(tmp_path)
+    seen = []
+    lock = threading.Lock()
+
+    def process(filepath):
+        with lock:
+            seen.append(filepath)
+
+    FileIteratorBuilder().with_directory(tmp_path).with_fn(process).with_workers(4).build().iterate_files()
+    assert sorted(seen) == walked(tmp_path)
+
+
+def test_ignored_directories_are_pruned(tmp_path):
+    write_tree(tmp_path)
+    checked = []
+
+    def ignore(path):
+        checked.append(path)
+        return os.path.basename(path) in ('pkg1', 'module_0.txt')
+
+    paths = sorted(FileIteratorBuilder().with_directory(tmp_path).with_ignore(ignore).build())
+    assert paths == [path for path in walked(tmp_path)
+                     if os.sep + 'pkg1' + os.sep not in path and not path.endswith('module_0.txt')]
+    # nothing below an ignored directory is listed
+    assert not [path for path in checked if str(tmp_path / 'pkg1') + os.sep in path]
+
+
+def test_gitignore_matcher_prunes_ignored_and_git_directories(tmp_path):
+    from kwiq.task.gitignore_matcher import GitIgnoreMatcher
+
+    write_tree(tmp_path)
+    (tmp_path / '.git' / 'objects').mkdir(parents=True)
+    (tmp_path / '.git' / 'objects' / 'object').write_text('')
+    (tmp_path / '.gitignore').write_text('pkg2/\n*.txt\n!pkg0/**/*.txt\n')
+
+    paths = sorted(FileIteratorBuilder().with_directory(tmp_path)
+                   .with_ignore(GitIgnoreMatcher(base_dir=tmp_path)).build())
+    assert paths == [path for path in walked(tmp_path)
+                     if os.sep + '.git' + os.sep not in path and os.sep + 'pkg2' + os.sep not in path
+                     and (not path.endswith('.txt') or os.sep + 'pkg0' + os.sep in path)]
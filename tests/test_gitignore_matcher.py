@@ -0,0 +1,99 @@
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from kwiq.task.gitignore_matcher import GitIgnoreMatcher
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="git is not installed")
+
+ROOT_GITIGNORE = """
+# comment
+*.log
+!keep.log
+/anchored.txt
+build/
+docs/_build/
+**/cache
+logs/**/*.tmp
+*.py[cod]
+\\#hash.txt
+\\!bang.txt
+trailing.txt\\ 
+a?c.md
+[!x]y.ini
+nested/**
+!nested/kept/
+secret/
+!secret/public.txt
+"""
+
+NESTED_GITIGNORE = {
+    'src': "*.gen\n!important.gen\n/local.txt\n",
+    'src/pkg': "!*.log\nvendor\n",
+    'lib': "*\n!*/\n!*.py\n",
+}
+
+EXCLUDE = "excluded-by-info.txt\n"
+
+FILES = [
+    'app.log', 'keep.log', 'sub/keep.log', 'sub/app.log', 'anchored.txt', 'sub/anchored.txt', 'build/out.o',
+    'sub/build/out.o', 'build.txt', 'docs/_build/index.html', 'sub/docs/_build/index.html', 'cache/x',
+    'deep/er/cache/y', 'logs/a.tmp', 'logs/x/y/b.tmp', 'logs/keep.txt', 'm.pyc', 'm.py', 'm.pyx', '#hash.txt',
+    '!bang.txt', 'trailing.txt', 'abc.md', 'abbc.md', 'ay.ini', 'xy.ini', 'nested/file.txt', 'nested/kept/file.txt',
+    'secret/key.pem', 'secret/public.txt', 'src/a.gen', 'src/important.gen', 'src/local.txt', 'src/pkg/local.txt',
+    'src/pkg/debug.log', 'src/pkg/b.gen', 'src/pkg/vendor/dep.py', 'src/vendor/dep.py', 'lib/mod.py',
+    'lib/data.csv', 'lib/sub/mod.py', 'lib/sub/data.csv', 'excluded-by-info.txt', 'sub/excluded-by-info.txt',
+    'README.md',
+]
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    # keep the user's and the system's ignore settings out of git's decisions
+    monkeypatch.setenv('GIT_CONFIG_GLOBAL', os.devnull)
+    monkeypatch.setenv('GIT_CONFIG_NOSYSTEM', '1')
+    monkeypatch.setenv('XDG_CONFIG_HOME', str(tmp_path / 'xdg'))
+
+    root = tmp_path / 'repo'
+    root.mkdir()
+    subprocess.run(['git', 'init', '-q', str(root)], check=True)
+    (root / '.gitignore').write_text(ROOT_GITIGNORE)
+    (root / '.git' / 'info' / 'exclude').write_text(EXCLUDE)
+    for directory, content in NESTED_GITIGNORE.items():
+        (root / directory).mkdir(parents=True, exist_ok=True)
+        (root / directory / '.gitignore').write_text(content)
+    for file in FILES:
+        (root / file).parent.mkdir(parents=True, exist_ok=True)
+        (root / file).write_text('')
+    return root
+
+
+def all_paths(root: Path) -> list:
+    paths = []
+    for directory, dir_names, file_names in os.walk(root):
+        dir_names[:] = [name for name in dir_names if name != '.git']
+        rel_dir = os.path.relpath(directory, root)
+        for name in dir_names + file_names:
+            paths.append(name if rel_dir == '.' else os.path.join(rel_dir, name))
+    return sorted(paths)
+
+
+def git_ignored(root: Path, paths: list) -> set:
+    result = subprocess.run(['git', 'check-ignore', '--no-index', '--stdin', '-z'], cwd=root,
+                            input='\0'.join(paths) + '\0', capture_output=True, text=True)
+    # 1 when no path is ignored
+    assert result.returncode in (0, 1), result.stderr
+    return set(filter(None, result.stdout.split('\0')))
+
+
+def test_ignore_tree_matches_git_check_ignore(repo):
+    paths = all_paths(repo)
+    expected = git_ignored(repo, paths)
+    assert expected
+
+    tree = GitIgnoreMatcher(base_dir=repo, include_gitmodules=False).tree
+    ignored = {path for path in paths if tree.is_ignored(repo / path)}
+    assert sorted(ignored - expected) == [] and sorted(expected - ignored) == []
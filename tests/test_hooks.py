@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from kwiq.core import hooks
+from kwiq.core.metrics import Metrics
+from kwiq.core.task import Task
+
+BUSY_SECONDS = 0.05
+
+
+def busy(seconds: float) -> int:
+    end = time.thread_time() + seconds
+    count = 0
+    while time.thread_time() < end:
+        count += 1
+    return count
+
+
+class BusyTask(Task):
+    name: str = "busy"
+
+    def fn(self, seconds: float) -> int:
+        return busy(seconds)
+
+
+class AsyncBusyTask(Task):
+    name: str = "async-busy"
+
+    async def fn(self, seconds: float) -> int:
+        return busy(seconds)
+
+
+class Recorder(hooks.ExecutionHook):
+    def __init__(self):
+        self.executions = []
+
+    def after(self, execution: hooks.Execution):
+        self.executions.append(execution)
+
+
+@pytest.fixture
+def recorder():
+    recorder = Recorder()
+    hooks.add_hook(recorder)
+    yield recorder
+    hooks.remove_hook(recorder)
+
+
+def test_execute_measures_the_cpu_of_fn(recorder):
+    BusyTask().execute(seconds=BUSY_SECONDS)
+    assert recorder.executions[0].cpu_time >= BUSY_SECONDS
+
+
+def test_aexecute_measures_the_cpu_of_the_executor_thread(recorder):
+    asyncio.run(BusyTask().aexecute(seconds=BUSY_SECONDS))
+    assert BUSY_SECONDS <= recorder.executions[0].cpu_time < recorder.executions[0].wall_time + BUSY_SECONDS
+
+
+def test_aexecute_of_async_fn_leaves_cpu_out(recorder):
+    metrics = Metrics()
+    metrics.enable()
+    try:
+        asyncio.run(AsyncBusyTask().aexecute(seconds=BUSY_SECONDS))
+    finally:
+        metrics.disable()
+
+    assert recorder.executions[0].cpu_time is None
+    assert metrics.tasks['async-busy'].calls == 1
+    assert metrics.tasks['async-busy'].cpu_time == 0.0
@@ -0,0 +1,75 @@
+import json
+import random
+
+import jmespath
+import pytest
+from pydantic import BaseModel
+
+from kwiq.iterator.json_iterator import JsonIterator
+from kwiq.iterator.json_lines import iter_json_lines
+
+PATHS = ['*', 'id', 'payload.user', 'tags', 'tags[0]', 'payload.[user, action]', 'length(tags)', 'missing.key']
+
+
+class Payload(BaseModel):
+    user: int
+    action: str
+
+
+def reference(path, json_path):
+    """
+    Line by line json.loads and jmespath.search, lists flattened and missing values skipped.
+    """
+    values = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            value = json.loads(line)
+            if json_path != '*':
+                value = jmespath.search(json_path, value)
+            if value is None:
+                continue
+            values.extend(value if isinstance(value, list) else [value])
+    return values
+
+
+@pytest.fixture
+def events(tmp_path):
+    random.seed(11)
+    path = tmp_path / 'events.jsonl'
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(500):
+            event = {"id": i, "tags": [f"t{i}", "é\\n\"x"][:random.randint(0, 2)],
+                     "payload": {"user": i % 7, "action": random.choice(["buy", "view\n", "ünïcode"])}}
+            f.write(json.dumps(event, ensure_ascii=random.random() < 0.5))
+            f.write('\n\n' if i % 50 == 0 else '\n')
+    return path
+
+
+@pytest.mark.parametrize('json_path', PATHS)
+@pytest.mark.parametrize('range_size', [1, 97, 4096, 1 << 22])
+def test_ranges_match_line_by_line_parsing(events, json_path, range_size):
+    assert list(iter_json_lines(events, json_path, range_size=range_size)) == reference(events, json_path)
+
+
+@pytest.mark.parametrize('json_path', ['*', 'payload.user', 'tags[0]'])
+def test_workers_match_line_by_line_parsing(events, json_path):
+    assert list(iter_json_lines(events, json_path, workers=2, range_size=997)) == reference(events, json_path)
+
+
+def test_data_models(events):
+    expected = [Payload(**value) for value in reference(events, 'payload')]
+    assert list(JsonIterator(file_path=events, json_path='payload', data_model=Payload, json_lines=True)) == expected
+    assert list(JsonIterator(file_path=events, json_path='payload', data_model=Payload, json_lines=True,
+                             workers=2)) == expected
+
+
+def test_interleaved_iterators_keep_their_own_state(tmp_path):
+    a = tmp_path / 'a.jsonl'
+    b = tmp_path / 'b.jsonl'
+    a.write_text(''.join(json.dumps({"a": i}) + '\n' for i in range(20)))
+    b.write_text(''.join(json.dumps({"i": i * 10}) + '\n' for i in range(20)))
+
+    pairs = list(zip(iter_json_lines(a, '*', range_size=20), iter_json_lines(b, 'i', range_size=20)))
+    assert pairs == [({"a": i}, i * 10) for i in range(20)]
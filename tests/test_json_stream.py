@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from pydantic import BaseModel
+
+from kwiq.iterator.json_iterator import JsonIterator
+from kwiq.iterator.json_stream import stream_path_keys
+
+DOCUMENT = {
+    "x": {"a": 1, "b": None, "c": [1, 2], "d": {"e": "f"}, "g": -12.5e-3},
+    "items": [{"id": 1, "name": "one"}, None, {"id": 2, "name": "t\\w\"oé"}],
+    "numbers": [0, 123456789, 1.5e10, -7, None, True],
+    "empty": {},
+    "scalar": "text",
+}
+PATHS = ['*', '@', 'x', 'x.*', 'x[*]', 'items', 'items[*]', 'items.*', 'numbers', 'numbers[*]', 'empty', 'empty.*',
+         'scalar', 'scalar.*', 'x.d', 'x.d.*', 'x.c[*]', 'missing', 'x.missing.*']
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / 'document.json'
+    path.write_text(json.dumps(DOCUMENT, indent=1))
+    return path
+
+
+@pytest.mark.parametrize('json_path', PATHS)
+@pytest.mark.parametrize('chunk_size', [1, 7, 1 << 20])
+def test_stream_matches_jmespath(document, json_path, chunk_size):
+    expected = list(JsonIterator(file_path=document, json_path=json_path))
+    assert list(JsonIterator(file_path=document, json_path=json_path, stream=True, chunk_size=chunk_size)) == expected
+
+
+def test_stream_builds_data_models(document):
+    expected = list(JsonIterator(file_path=document, json_path='items[*]', data_model=Item))
+    assert expected == [Item(id=1, name='one'), Item(id=2, name='t\\w"oé')]
+    assert list(JsonIterator(file_path=document, json_path='items[*]', data_model=Item, stream=True)) == expected
+
+
+def test_stream_path_keys():
+    assert stream_path_keys('*') == ([], '{')
+    assert stream_path_keys('data.items[*]') == (['data', 'items'], '[')
+    assert stream_path_keys('data.items') == (['data', 'items'], None)
+    with pytest.raises(ValueError):
+        stream_path_keys('data[0]')
@@ -0,0 +1,79 @@
+import csv
+import shutil
+from pathlib import Path
+
+from kwiq.db.manifest import FileManifest
+from kwiq.task.apply_renames import apply_renames
+from kwiq.task.extract_words import extract_word_stats
+
+FILE_COUNT = 50
+
+
+def write_tree(directory: Path, content: str):
+    for i in range(FILE_COUNT):
+        file_path = directory / f"pkg{i % 5}" / f"module_{i}.py"
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
+
+
+def write_mappings(path: Path, mappings: dict):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['original_word', 'renamed_word'])
+        writer.writerows(mappings.items())
+
+
+def read_tree(directory: Path) -> dict:
+    return {str(path.relative_to(directory)): path.read_text() for path in directory.rglob('*.py')}
+
+
+def manifest_paths(manifest_path: Path, task: str, root: Path) -> set:
+    manifest = FileManifest(db_path=manifest_path, task=task, key='', root=root)
+    try:
+        return set(manifest.entries)
+    finally:
+        manifest.close()
+
+
+def test_trees_sharing_a_database_keep_their_entries(tmp_path):
+    # tree2 starts like tree: only the files below each root belong to its runs
+    write_tree(tmp_path / 'tree', 'alpha beta\n')
+    write_tree(tmp_path / 'tree2', 'alpha gamma\n')
+    manifest_path = tmp_path / 'manifest.db'
+
+    for name in ('tree', 'tree2', 'tree'):
+        expected = extract_word_stats('alpha', tmp_path / name)
+        assert extract_word_stats('alpha', tmp_path / name, manifest_path=manifest_path) == expected
+
+    for name in ('tree', 'tree2'):
+        assert len(manifest_paths(manifest_path, 'extract-words', tmp_path / name)) == FILE_COUNT
+
+    (tmp_path / 'tree' / 'pkg0' / 'module_0.py').unlink()
+    extract_word_stats('alpha', tmp_path / 'tree', manifest_path=manifest_path)
+    assert len(manifest_paths(manifest_path, 'extract-words', tmp_path / 'tree')) == FILE_COUNT - 1
+    assert len(manifest_paths(manifest_path, 'extract-words', tmp_path / 'tree2')) == FILE_COUNT
+
+
+def test_rename_manifest_runs_match_full_runs(tmp_path):
+    write_mappings(tmp_path / 'mappings.csv', {'alpha': 'renamed_alpha'})
+    write_tree(tmp_path / 'full', 'alpha beta\n')
+    write_tree(tmp_path / 'tracked', 'alpha beta\n')
+    manifest_path = tmp_path / 'manifest.db'
+
+    def run_both():
+        full = apply_renames(tmp_path / 'full', tmp_path / 'mappings.csv', workers=1)
+        tracked = apply_renames(tmp_path / 'tracked', tmp_path / 'mappings.csv', workers=1,
+                                manifest_path=manifest_path)
+        assert read_tree(tmp_path / 'tracked') == read_tree(tmp_path / 'full')
+        return full, tracked
+
+    full, tracked = run_both()
+    assert tracked.hits == full.hits == {'alpha': FILE_COUNT}
+
+    # only the files written since are renamed again
+    for directory in ('full', 'tracked'):
+        (tmp_path / directory / 'pkg1' / 'module_1.py').write_text('alpha alpha\n')
+        shutil.copytree(tmp_path / directory / 'pkg2', tmp_path / directory / 'pkg5')
+    full, tracked = run_both()
+    assert full.hits == tracked.hits == {'alpha': 2}
+    assert tracked.files_changed == 1
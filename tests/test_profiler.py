@@ -0,0 +1,75 @@
+import cProfile
+import threading
+from typing import Any
+
+from kwiq.core.flow import Flow
+from kwiq.core.profiler import Profiler
+from kwiq.core.scheduler import Scheduler
+from kwiq.core.step import Step
+from kwiq.core.task import Task
+
+barrier = threading.Barrier(2)
+
+
+class SpinTask(Task):
+    name: str = "spin"
+
+    def fn(self, count: int) -> int:
+        # both steps are in their section at once
+        barrier.wait(timeout=10)
+        return sum(i * i for i in range(count))
+
+
+class SpinStep(Step):
+    def run(self, **inputs) -> Any:
+        return SpinTask().execute(count=20000)
+
+
+class ParallelFlow(Flow):
+    def fn(self) -> dict:
+        steps = [SpinStep(name=f"spin-{i}", outputs=[f"spin-{i}"]) for i in range(2)]
+        return Scheduler(max_workers=2).run(steps).artifacts
+
+
+class ExclusiveProfile(cProfile.Profile):
+    """
+    cProfile of Python 3.12 and later: a single profiler can be enabled in the process.
+    """
+    active = None
+
+    def enable(self, *args, **kwargs):
+        if ExclusiveProfile.active not in (None, self):
+            raise ValueError("Another profiling tool is already active")
+        ExclusiveProfile.active = self
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        if ExclusiveProfile.active is self:
+            ExclusiveProfile.active = None
+        super().disable()
+
+
+def run_profiled(tmp_path) -> Profiler:
+    profiler = Profiler(output_path=tmp_path / 'profile', interval=0.001)
+    profiler.start()
+    try:
+        ParallelFlow(name='parallel').execute()
+    finally:
+        profiler.stop()
+    profiler.write()
+    return profiler
+
+
+def test_sections_of_concurrent_threads_are_profiled(tmp_path):
+    profiler = run_profiled(tmp_path)
+    assert profiler.unprofiled_sections == 0
+    assert (tmp_path / 'profile.spin.pstats').exists()
+    assert (tmp_path / 'profile.collapsed').exists()
+
+
+def test_sections_are_only_sampled_when_another_profiler_is_active(tmp_path, monkeypatch):
+    monkeypatch.setattr(cProfile, 'Profile', ExclusiveProfile)
+    profiler = run_profiled(tmp_path)
+    assert profiler.unprofiled_sections >= 1
+    assert (tmp_path / 'profile.pstats').exists()
+    assert (tmp_path / 'profile.collapsed').exists()
@@ -0,0 +1,28 @@
+import time
+from typing import Any
+
+from kwiq.core.scheduler import Scheduler
+from kwiq.core.step import Step
+
+STEP_SECONDS = 0.1
+
+
+class SleepStep(Step):
+    def run(self, **inputs) -> Any:
+        time.sleep(STEP_SECONDS)
+        return self.name
+
+
+def test_timings_leave_out_the_wait_for_a_worker():
+    steps = [SleepStep(name='a', outputs=['a']), SleepStep(name='b', outputs=['b']),
+             SleepStep(name='c', inputs=['a', 'b'])]
+    result = Scheduler(max_workers=1).run(steps)
+
+    first, second = sorted((result.timings['a'], result.timings['b']), key=lambda timing: timing.start)
+    # the second independent step waited for the only worker: it starts when the first ends
+    assert second.start >= first.end - 0.01
+    for timing in result.timings.values():
+        assert STEP_SECONDS <= timing.wall_time < STEP_SECONDS * 1.5
+    assert result.critical_path[-1] == 'c'
+    assert result.critical_path_time < STEP_SECONDS * 2.5
+    assert result.wall_time >= STEP_SECONDS * 3
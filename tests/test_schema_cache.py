@@ -0,0 +1,60 @@
+from pydantic import BaseModel
+
+from kwiq.core import schema_cache
+from kwiq.core.task import Task
+
+
+class Address(BaseModel):
+    city: str
+
+
+class GreetTask(Task):
+    name: str = "greet"
+
+    def fn(self, person: str, address: Address) -> str:
+        return f"{person} from {address.city}"
+
+
+def forget_schema(cls):
+    cls._Typed__schema = None
+    cls._Typed__compact_schema = None
+
+
+def test_schema_is_built_on_first_use_and_cached_on_disk(tmp_path, monkeypatch):
+    monkeypatch.setenv('KWIQ_CACHE_DIR', str(tmp_path))
+    forget_schema(GreetTask)
+
+    assert GreetTask().execute(person='Ada', address={'city': 'London'}) == 'Ada from London'
+    assert GreetTask._Typed__schema is None
+    assert not (tmp_path / 'schemas').exists()
+
+    schema = GreetTask.get_schema()
+    compact_schema = GreetTask.get_compact_schema()
+    assert 'person' in compact_schema and 'city' in compact_schema
+    assert len(list((tmp_path / 'schemas').glob('*.pickle'))) == 1
+
+    # read back from disk, without building it again
+    forget_schema(GreetTask)
+    monkeypatch.setattr(GreetTask, 'validate_and_build_fn_schema',
+                        classmethod(lambda cls, fn: (_ for _ in ()).throw(AssertionError("schema rebuilt"))))
+    assert GreetTask.get_schema() == schema
+    assert GreetTask.get_compact_schema() == compact_schema
+
+
+def test_unreadable_entries_are_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setenv('KWIQ_CACHE_DIR', str(tmp_path))
+    key = schema_cache.source_key(GreetTask)
+    (tmp_path / 'schemas').mkdir()
+    (tmp_path / 'schemas' / f"{key}.pickle").write_bytes(b'not a pickle')
+
+    forget_schema(GreetTask)
+    assert 'city' in GreetTask.get_compact_schema()
+    assert schema_cache.load(key) is not None
+
+
+def test_source_key_follows_the_model_modules(monkeypatch):
+    key = schema_cache.source_key(GreetTask)
+    assert key == schema_cache.source_key(GreetTask)
+    # a model defined in another module makes that module part of the key
+    monkeypatch.setattr(Address, '__module__', 'kwiq.core.binding')
+    assert schema_cache.source_key(GreetTask) != key
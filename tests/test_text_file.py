@@ -0,0 +1,50 @@
+import io
+import re
+
+from kwiq.iterator.text_file import BINARY_SNIFF_SIZE, TextFileReader
+
+PATTERN = re.compile(r'\bw[\wé]*\d\b')
+
+
+def write_text(path, count: int) -> str:
+    # multi-byte characters land on chunk boundaries
+    content = ''.join(f"wé{i} line {i}\r\n" if i % 3 else f"wörd{i}, " for i in range(count))
+    path.write_bytes(content.encode('utf-8'))
+    return content
+
+
+def test_binary_sniffing_only_reads_the_first_block(tmp_path):
+    binary = tmp_path / 'binary.bin'
+    binary.write_bytes(b'text' * 10 + b'\0' + b'x' * 100000)
+    late_nul = tmp_path / 'late_nul.txt'
+    late_nul.write_bytes(b'x' * BINARY_SNIFF_SIZE + b'\0')
+
+    reader = TextFileReader(binary)
+    assert reader.is_binary()
+    assert len(reader.head()) == BINARY_SNIFF_SIZE
+    assert not TextFileReader(late_nul).is_binary()
+
+
+def test_chunks_decode_the_whole_file(tmp_path):
+    content = write_text(tmp_path / 'text.txt', 2000)
+    reader = TextFileReader(tmp_path / 'text.txt', encoding='utf-8', chunk_size=1001)
+
+    assert reader.is_large()
+    assert ''.join(reader.chunks()) == content
+
+
+def test_finditer_matches_across_chunks(tmp_path):
+    content = write_text(tmp_path / 'text.txt', 2000)
+    reader = TextFileReader(tmp_path / 'text.txt', encoding='utf-8', chunk_size=1001, overlap=64)
+
+    assert [m.group() for m in reader.finditer(PATTERN)] == PATTERN.findall(content)
+
+
+def test_subn_matches_the_whole_file_subn(tmp_path):
+    content = write_text(tmp_path / 'text.txt', 2000)
+    reader = TextFileReader(tmp_path / 'text.txt', encoding='utf-8', chunk_size=1001, overlap=64)
+
+    output = io.StringIO()
+    count = reader.subn(PATTERN, lambda match: match.group().upper(), output.write)
+
+    assert (output.getvalue(), count) == PATTERN.subn(lambda match: match.group().upper(), content)
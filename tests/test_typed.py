@@ -0,0 +1,60 @@
+from typing import Any, List
+
+from pydantic import BaseModel
+
+from kwiq.core import hooks
+from kwiq.core.cache import ResultCache
+from kwiq.core.task import Task
+
+
+class Square(BaseModel):
+    value: int
+
+
+class SquareTask(Task):
+    name: str = "square"
+    batches: List[int] = []
+
+    def fn(self, value: int) -> Square:
+        return Square(value=value * value)
+
+    def fn_batch(self, batch: list[dict[str, Any]]) -> list[Any]:
+        self.batches.append(len(batch))
+        return super().fn_batch(batch)
+
+
+class Recorder(hooks.ExecutionHook):
+    def __init__(self):
+        self.executions = []
+
+    def after(self, execution: hooks.Execution):
+        self.executions.append(execution)
+
+
+def test_execute_many_validates_in_batches():
+    task = SquareTask()
+    results = task.execute_many(({'value': str(i)} for i in range(10)), batch_size=4)
+    assert results == [Square(value=i * i) for i in range(10)]
+    assert task.batches == [4, 4, 2]
+
+
+def test_execute_many_goes_through_the_hooks():
+    task = SquareTask()
+    recorder = Recorder()
+    hooks.add_hook(recorder)
+    try:
+        results = task.execute_many([{'value': i} for i in range(3)])
+    finally:
+        hooks.remove_hook(recorder)
+
+    assert results == [Square(value=i * i) for i in range(3)]
+    assert [execution.fn_args for execution in recorder.executions] == [{'value': i} for i in range(3)]
+    assert task.batches == []
+
+
+def test_execute_many_goes_through_the_result_cache(tmp_path):
+    cache = ResultCache(db_path=tmp_path / 'cache.db')
+    task = SquareTask().use_cache(cache)
+    task.execute_many([{'value': i} for i in range(3)])
+    assert task.execute_many([{'value': i} for i in range(4)]) == [Square(value=i * i) for i in range(4)]
+    assert (cache.hits, cache.misses) == (3, 4)